@@ -3,9 +3,12 @@ from __future__ import annotations
 import binascii
 import copy
 import hashlib
+import hmac
 import re
 from base64 import b64decode
+from enum import IntEnum, auto
 from logging import getLogger
+from time import time
 from typing import Any
 from urllib.parse import parse_qs
 from uuid import uuid4
@@ -17,7 +20,12 @@ from asgi_webdav.cache import (
     DAVCacheType,
 )
 from asgi_webdav.config import Config
-from asgi_webdav.constants import DAVMethod, DAVUpperEnumAbc, DAVUser
+from asgi_webdav.constants import (
+    DEFAULT_HTTP_DIGEST_AUTH_NONCE_LIFETIME,
+    DAVMethod,
+    DAVUpperEnumAbc,
+    DAVUser,
+)
 from asgi_webdav.exceptions import DAVExceptionAuthFailed, DAVExceptionConfig
 from asgi_webdav.request import DAVRequest
 from asgi_webdav.response import DAVResponse
@@ -322,6 +330,122 @@ class HTTPBasicAuth(HTTPAuthAbc):
         return False
 
 
+class DigestNonceState(IntEnum):
+    VALID = auto()
+    STALE = auto()  # signed by us, but expired
+    INVALID = auto()  # not signed by us
+    REPLAY = auto()  # nc is not greater than the last one seen
+
+
+class HTTPDigestNonceKeeper:
+    """
+    nonce = hex(issue time) + HMAC(secret, hex(issue time))
+
+    - Signature and age can be verified without any storage, so a client can
+      reuse one nonce for many requests until it expires.
+    - The seen nc of each nonce is kept in time buckets, one bucket per
+      lifetime; when a bucket is older than one lifetime, all its nonces are
+      expired, and the whole bucket is dropped at once.
+    - The seen nc is a sliding window below the largest nc, like IPsec's
+      anti-replay window; concurrent requests of one client may arrive out of
+      order, every nc is accepted once.
+    - The secret must be shared by all workers, see HTTPDigestAuth.secret
+    """
+
+    _secret: bytes
+    _lifetime: int
+    # bucket id => {nonce: (largest nc, bitmap of the seen nc in the window)}
+    _buckets: dict[int, dict[str, tuple[int, int]]]
+
+    _TIMESTAMP_LENGTH = 8
+    _SIGNATURE_LENGTH = 32
+    _NC_WINDOW_SIZE = 64
+
+    def __init__(self, secret: str, lifetime: int):
+        self._secret = secret.encode("utf-8")
+        self._lifetime = max(lifetime, 1)
+        self._buckets = dict()
+
+    def _sign(self, timestamp_hex: str) -> str:
+        return hmac.new(
+            self._secret, timestamp_hex.encode("utf-8"), hashlib.sha256
+        ).hexdigest()[: self._SIGNATURE_LENGTH]
+
+    def new(self, now: float | None = None) -> str:
+        if now is None:
+            now = time()
+
+        timestamp_hex = f"{int(now):0{self._TIMESTAMP_LENGTH}x}"
+        return timestamp_hex + self._sign(timestamp_hex)
+
+    def _get_issue_time(self, nonce: str) -> int | None:
+        if len(nonce) != self._TIMESTAMP_LENGTH + self._SIGNATURE_LENGTH:
+            return None
+
+        timestamp_hex = nonce[: self._TIMESTAMP_LENGTH]
+        if not hmac.compare_digest(
+            nonce[self._TIMESTAMP_LENGTH :], self._sign(timestamp_hex)
+        ):
+            return None
+
+        try:
+            return int(timestamp_hex, 16)
+        except ValueError:
+            return None
+
+    def check(
+        self, nonce: str, nc: str | None, now: float | None = None
+    ) -> DigestNonceState:
+        """verify nonce, and record nc(when it exists) for replay protection"""
+        issue_time = self._get_issue_time(nonce)
+        if issue_time is None:
+            return DigestNonceState.INVALID
+
+        if now is None:
+            now = time()
+
+        if now - issue_time > self._lifetime:
+            return DigestNonceState.STALE
+
+        if nc is None:
+            # RFC2069 compatibility mode, without nc
+            return DigestNonceState.VALID
+
+        try:
+            nc_value = int(nc, 16)
+        except ValueError:
+            return DigestNonceState.INVALID
+
+        current_bucket_id = int(now) // self._lifetime
+        for bucket_id in list(self._buckets.keys()):
+            if bucket_id < current_bucket_id - 1:
+                self._buckets.pop(bucket_id)
+
+        bucket = self._buckets.setdefault(issue_time // self._lifetime, dict())
+        largest_nc, seen = bucket.get(nonce, (0, 0))
+        if nc_value > largest_nc:
+            # slide the window; bit i: nc(largest_nc - i) is seen
+            shift = nc_value - largest_nc
+            if shift < self._NC_WINDOW_SIZE:
+                seen = (seen << shift) & ((1 << self._NC_WINDOW_SIZE) - 1)
+            else:
+                seen = 0
+
+            bucket[nonce] = (nc_value, seen | 1)
+            return DigestNonceState.VALID
+
+        offset = largest_nc - nc_value
+        if offset >= self._NC_WINDOW_SIZE or seen & (1 << offset):
+            # too old to be checked, or seen
+            return DigestNonceState.REPLAY
+
+        bucket[nonce] = (largest_nc, seen | (1 << offset))
+        return DigestNonceState.VALID
+
+    def __len__(self) -> int:
+        return sum([len(bucket) for bucket in self._buckets.values()])
+
+
 DIGEST_AUTHORIZATION_PARAMS = {
     "username",
     "realm",
@@ -358,7 +482,12 @@ class HTTPDigestAuth(HTTPAuthAbc):
     # sends these parameters with quotes—this is not known to cause any problems with
     # other server implementations.
 
-    def __init__(self, realm: str, secret: str | None = None):
+    def __init__(
+        self,
+        realm: str,
+        secret: str | None = None,
+        nonce_lifetime: int = DEFAULT_HTTP_DIGEST_AUTH_NONCE_LIFETIME,
+    ):
         super().__init__(realm=realm)
 
         if secret is None:
@@ -367,12 +496,15 @@ class HTTPDigestAuth(HTTPAuthAbc):
             self.secret = secret
 
         self.opaque = uuid4().hex.upper()
+        self.nonce_keeper = HTTPDigestNonceKeeper(
+            secret=self.secret, lifetime=nonce_lifetime
+        )
 
     @staticmethod
     def is_credential(auth_header_type: bytes) -> bool:
         return auth_header_type.lower() == b"digest"
 
-    def make_auth_challenge_string(self) -> bytes:
+    def make_auth_challenge_string(self, stale: bool = False) -> bytes:
         return "Digest {}".format(
             self.authorization_string_build_from_data(
                 {
@@ -381,7 +513,7 @@ class HTTPDigestAuth(HTTPAuthAbc):
                     "nonce": self.nonce,
                     "opaque": self.opaque,
                     "algorithm": "MD5",
-                    "stale": "false",
+                    "stale": "true" if stale else "false",
                 }
             )
         ).encode("utf-8")
@@ -431,7 +563,12 @@ class HTTPDigestAuth(HTTPAuthAbc):
 
     @property
     def nonce(self) -> str:
-        return _md5(f"{uuid4().hex}{self.secret}")
+        return self.nonce_keeper.new()
+
+    def check_nonce(self, digest_auth_data: dict[str, str]) -> DigestNonceState:
+        return self.nonce_keeper.check(
+            digest_auth_data.get("nonce", ""), digest_auth_data.get("nc")
+        )
 
     @staticmethod
     def authorization_str_parser_to_data(authorization: str) -> dict[str, str]:
@@ -570,7 +707,11 @@ class DAVAuth:
             cache_type=self.config.http_basic_auth.cache_type,
             cache_timeout=self.config.http_basic_auth.cache_timeout,
         )
-        self.http_digest_auth = HTTPDigestAuth(realm=self.realm, secret=uuid4().hex)
+        self.http_digest_auth = HTTPDigestAuth(
+            realm=self.realm,
+            secret=self.config.http_digest_auth.secret or None,
+            nonce_lifetime=self.config.http_digest_auth.nonce_lifetime,
+        )
 
     # async def pick_out_user(self, request: DAVRequest) -> tuple[DAVUser | None, str]:
     async def pick_out_user(self, request: DAVRequest) -> None | str:
@@ -655,6 +796,19 @@ class DAVAuth:
                 )
                 return "no permission"
 
+            # check nonce after digest, stale=true only make sense with right password
+            match self.http_digest_auth.check_nonce(digest_auth_data):
+                case DigestNonceState.VALID:
+                    pass
+
+                case DigestNonceState.STALE:
+                    request.authorization_stale = True
+                    return "stale nonce"
+
+                case _:
+                    logger.debug(f"invalid or replayed nonce: {digest_auth_data}")
+                    return "no permission"
+
             # https://datatracker.ietf.org/doc/html/rfc2617#page-15
             # macOS 11.4 finder supported
             #   WebDAVFS/3.0.0 (03008000) Darwin/20.5.0 (x86_64)
@@ -691,7 +845,9 @@ class DAVAuth:
                 enable_digest = False
 
         if enable_digest:
-            challenge_string = self.http_digest_auth.make_auth_challenge_string()
+            challenge_string = self.http_digest_auth.make_auth_challenge_string(
+                stale=request.authorization_stale
+            )
             logger.debug("response Digest auth challenge")
         else:
             challenge_string = self.http_basic_auth.make_auth_challenge_string()
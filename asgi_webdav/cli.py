@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from logging import getLogger
+from pathlib import Path
 from typing import Any
 
 import click
@@ -120,3 +121,26 @@ def main(**kwargs: dict[str, Any]) -> None:
     logger.debug(f"uvicorn's kwargs:{kwargs}")
 
     return uvicorn.run(**kwargs)  # type: ignore
+
+
+@click.command(
+    "migrate-property",
+    help="Migrate .WebDAV sidecar files under ROOT_PATH to the SQLite property store",
+)
+@click.argument("root_path", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--remove-sidecar",
+    is_flag=True,
+    default=False,
+    help="Remove the sidecar files after migrated.",
+)
+def migrate_property(root_path: str, remove_sidecar: bool) -> None:
+    from asgi_webdav.provider.property_store import (
+        DAV_PROPERTY_STORE_SQLITE_FILE_NAME,
+        migrate_sidecar_to_sqlite,
+    )
+
+    count = migrate_sidecar_to_sqlite(Path(root_path), remove_sidecar)
+    print(
+        f"Migrated {count} resource(s) to {Path(root_path, DAV_PROPERTY_STORE_SQLITE_FILE_NAME)}"
+    )
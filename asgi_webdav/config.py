@@ -17,16 +17,57 @@ from dataclass_wizard import EnvWizard, JSONPyWizard
 
 from asgi_webdav.cache import DAVCacheType
 from asgi_webdav.constants import (
+    DEFAULT_COMPRESSION_CACHE_ENTRY_MAX_SIZE,
+    DEFAULT_COMPRESSION_CACHE_SIZE,
+    DEFAULT_COMPRESSION_ENCODING_PREFERENCE,
+    DEFAULT_COMPRESSION_EXECUTOR_MAX_WORKERS,
     DEFAULT_FILENAME_CONTENT_TYPE_MAPPING,
     DEFAULT_HTTP_BASIC_AUTH_CACHE_TIMEOUT,
+    DEFAULT_HTTP_DIGEST_AUTH_NONCE_LIFETIME,
+    DEFAULT_MEMORY_SNAPSHOT_INTERVAL,
     DEFAULT_PASSWORD,
     DEFAULT_PASSWORD_ANONYMOUS,
     DEFAULT_PERMISSIONS,
+    DEFAULT_PROVIDER_CACHE_ENTRY_MAX_SIZE,
+    DEFAULT_PROVIDER_CACHE_METADATA_TTL,
+    DEFAULT_PROVIDER_CACHE_SIZE,
+    DEFAULT_S3_CONNECT_TIMEOUT,
+    DEFAULT_S3_COPY_CONCURRENCY,
+    DEFAULT_S3_ENDPOINT_URL,
+    DEFAULT_S3_KEEPALIVE_EXPIRY,
+    DEFAULT_S3_LIST_MAX_KEYS,
+    DEFAULT_S3_MAX_CONNECTIONS,
+    DEFAULT_S3_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_S3_METADATA_TTL,
+    DEFAULT_S3_MULTIPART_CONCURRENCY,
+    DEFAULT_S3_MULTIPART_PART_SIZE,
+    DEFAULT_S3_POOL_TIMEOUT,
+    DEFAULT_S3_READ_TIMEOUT,
+    DEFAULT_S3_REGION,
+    DEFAULT_S3_WRITE_TIMEOUT,
     DEFAULT_SUFFIX_CONTENT_TYPE_MAPPING,
+    DEFAULT_UPLOAD_BUFFER_SIZE,
+    DEFAULT_UPLOAD_RESUMABLE_SESSION_TIMEOUT,
     DEFAULT_USERNAME,
     DEFAULT_USERNAME_ANONYMOUS,
+    DEFAULT_WEBHDFS_CONNECT_TIMEOUT,
+    DEFAULT_WEBHDFS_COPY_CONCURRENCY,
+    DEFAULT_WEBHDFS_COPY_SEGMENT_SIZE,
+    DEFAULT_WEBHDFS_DELEGATION_TOKEN_TTL,
+    DEFAULT_WEBHDFS_KEEPALIVE_EXPIRY,
+    DEFAULT_WEBHDFS_LIST_STATUS_CONCURRENCY,
+    DEFAULT_WEBHDFS_MAX_CONNECTIONS,
+    DEFAULT_WEBHDFS_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_WEBHDFS_METADATA_TTL,
+    DEFAULT_WEBHDFS_PARALLEL_READ_CONCURRENCY,
+    DEFAULT_WEBHDFS_PARALLEL_READ_SEGMENT_SIZE,
+    DEFAULT_WEBHDFS_POOL_TIMEOUT,
+    DEFAULT_WEBHDFS_READ_TIMEOUT,
+    DEFAULT_WEBHDFS_WRITE_TIMEOUT,
     AppEntryParameters,
     DAVCompressLevel,
+    DAVETagType,
+    DAVPropertyStoreType,
     LoggingLevel,
 )
 
@@ -78,6 +119,92 @@ class HTTPDigestAuth:
     enable_rule: str = ""  # Valid when "enable" is false
     disable_rule: str = "neon/"  # Valid when "enable" is true
     # TODO Compatible with neon
+    nonce_lifetime: int = DEFAULT_HTTP_DIGEST_AUTH_NONCE_LIFETIME  # x second
+    # sign the nonce; "": random, only valid in one process
+    secret: str = ""
+
+
+@dataclass
+class ProviderCache:
+    """
+    CachingProvider only, uri: cache+{origin provider's uri}
+    """
+
+    path: str = ""  # local cache directory, "": in memory
+    size: int = DEFAULT_PROVIDER_CACHE_SIZE  # bytes
+    entry_max_size: int = DEFAULT_PROVIDER_CACHE_ENTRY_MAX_SIZE  # bytes
+    metadata_ttl: int = DEFAULT_PROVIDER_CACHE_METADATA_TTL  # seconds
+
+
+@dataclass
+class WebHDFS:
+    """
+    WebHDFSProvider only, Provider.webhdfs; one connection pool per provider
+    """
+
+    max_connections: int = DEFAULT_WEBHDFS_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_WEBHDFS_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = DEFAULT_WEBHDFS_KEEPALIVE_EXPIRY
+
+    connect_timeout: float = DEFAULT_WEBHDFS_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_WEBHDFS_READ_TIMEOUT
+    write_timeout: float = DEFAULT_WEBHDFS_WRITE_TIMEOUT
+    pool_timeout: float = DEFAULT_WEBHDFS_POOL_TIMEOUT
+
+    # require package: h2
+    enable_http2: bool = False
+
+    # fetch a delegation token once per user, send it instead of doAs;
+    # the namenode skips the Kerberos(SPNEGO) negotiation
+    enable_delegation_token: bool = False
+    delegation_token_ttl: int = DEFAULT_WEBHDFS_DELEGATION_TOKEN_TTL
+
+    # reuse the file status of a path, until it expires or is modified by self
+    metadata_ttl: float = DEFAULT_WEBHDFS_METADATA_TTL
+
+    # PROPFIND: the max number of LISTSTATUS_BATCH requests in flight
+    list_status_concurrency: int = DEFAULT_WEBHDFS_LIST_STATUS_CONCURRENCY
+
+    # COPY: the max number of OPEN -> CREATE pipes in flight
+    copy_concurrency: int = DEFAULT_WEBHDFS_COPY_CONCURRENCY
+    # a larger file is copied in segments concurrently, then CONCAT; 0: disable
+    copy_segment_size: int = DEFAULT_WEBHDFS_COPY_SEGMENT_SIZE
+
+    # GET: a larger range is split into segments, read by concurrent OPEN requests
+    enable_parallel_read: bool = False
+    parallel_read_concurrency: int = DEFAULT_WEBHDFS_PARALLEL_READ_CONCURRENCY
+    parallel_read_segment_size: int = DEFAULT_WEBHDFS_PARALLEL_READ_SEGMENT_SIZE
+
+
+@dataclass
+class S3:
+    """
+    S3Provider only, Provider.s3; one connection pool per provider
+    """
+
+    # path-style request: {endpoint_url}/{bucket}/{key}
+    endpoint_url: str = DEFAULT_S3_ENDPOINT_URL
+    region: str = DEFAULT_S3_REGION
+    # empty: anonymous request, the bucket must be public
+    access_key_id: str = ""
+    secret_access_key: str = ""
+
+    max_connections: int = DEFAULT_S3_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_S3_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = DEFAULT_S3_KEEPALIVE_EXPIRY
+
+    connect_timeout: float = DEFAULT_S3_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_S3_READ_TIMEOUT
+    write_timeout: float = DEFAULT_S3_WRITE_TIMEOUT
+    pool_timeout: float = DEFAULT_S3_POOL_TIMEOUT
+
+    multipart_part_size: int = DEFAULT_S3_MULTIPART_PART_SIZE
+    multipart_concurrency: int = DEFAULT_S3_MULTIPART_CONCURRENCY
+    copy_concurrency: int = DEFAULT_S3_COPY_CONCURRENCY
+    list_max_keys: int = DEFAULT_S3_LIST_MAX_KEYS
+
+    # reuse the metadata of an object, until it expires or is modified by self
+    metadata_ttl: float = DEFAULT_S3_METADATA_TTL
 
 
 @dataclass
@@ -101,6 +228,25 @@ class Provider:
     home_dir: bool = False
     read_only: bool = False
     ignore_property_extra: bool = True
+    property_store: DAVPropertyStoreType = DAVPropertyStoreType.SIDECAR
+    cache: ProviderCache = field(default_factory=ProviderCache)
+    webhdfs: WebHDFS = field(default_factory=WebHDFS)
+    s3: S3 = field(default_factory=S3)
+
+
+@dataclass
+class Upload:
+    # FileSystemProvider only, PUT to a temp file then rename it to the target
+    buffer_size: int = DEFAULT_UPLOAD_BUFFER_SIZE  # coalesce small chunks
+    enable_fallocate: bool = True  # preallocate when Content-Length is known
+    enable_fsync: bool = False
+
+    # PUT with Content-Range, FileSystemProvider and MemoryProvider only
+    enable_resumable: bool = True
+    resumable_session_timeout: int = DEFAULT_UPLOAD_RESUMABLE_SESSION_TIMEOUT
+
+    # FileSystemProvider only, content-addressed store, hard link same content
+    enable_deduplication: bool = False
 
 
 @dataclass
@@ -118,6 +264,20 @@ class TextFileCharsetDetect:
     default: str = "utf-8"
 
 
+@dataclass
+class CompressionEncodingRule:
+    """server side preference of encodings and level,
+    for body >= content_length_minimum and Content-Type match content_type_rule
+    """
+
+    content_length_minimum: int = 0
+    encodings: list[str] = field(
+        default_factory=lambda: list(DEFAULT_COMPRESSION_ENCODING_PREFERENCE)
+    )
+    content_type_rule: str = ""  # regex, "": all compressible types
+    level: DAVCompressLevel | None = None  # None: Compression.level
+
+
 @dataclass
 class Compression:
     enable: bool = True
@@ -126,8 +286,39 @@ class Compression:
     enable_gzip: bool = True
 
     level: DAVCompressLevel = DAVCompressLevel.RECOMMEND
+    encoding_rules: list[CompressionEncodingRule] = field(
+        default_factory=lambda: [CompressionEncodingRule()]
+    )
 
     content_type_user_rule: str = ""
+    # send the body as is, if the first block looks incompressible
+    enable_entropy_probe: bool = True
+
+    # FileSystemProvider only, serve/generate foo.txt.zst and foo.txt.gz
+    enable_precompressed: bool = False
+    enable_precompressed_generator: bool = False
+
+    # memory cap of compressed response body cache, 0: disable
+    cache_size: int = DEFAULT_COMPRESSION_CACHE_SIZE
+    cache_entry_max_size: int = DEFAULT_COMPRESSION_CACHE_ENTRY_MAX_SIZE
+
+    # max in-flight compression jobs in thread pool, 0: compress in event loop
+    executor_max_workers: int = DEFAULT_COMPRESSION_EXECUTOR_MAX_WORKERS
+
+
+@dataclass
+class MemorySnapshot:
+    """
+    MemoryProvider only, persist the content to:
+    - {path}/{quoted prefix}.snapshot
+    - {path}/{quoted prefix}.journal.{generation}
+    """
+
+    enable: bool = False
+    path: str = ""  # directory
+    interval: int = DEFAULT_MEMORY_SNAPSHOT_INTERVAL  # seconds
+    # fsync the journal after every mutation
+    enable_fsync: bool = False
 
 
 @dataclass
@@ -172,6 +363,8 @@ class Config(JSONPyWizard):
 
     # provider
     provider_mapping: list[Provider] = field(default_factory=list)
+    upload: Upload = field(default_factory=Upload)
+    memory_snapshot: MemorySnapshot = field(default_factory=MemorySnapshot)
 
     # rules process
     hide_file_in_dir: HideFileInDir = field(default_factory=HideFileInDir)
@@ -184,6 +377,7 @@ class Config(JSONPyWizard):
     compression: Compression = field(default_factory=Compression)
     cors: CORS = field(default_factory=CORS)
     enable_dir_browser: bool = True
+    etag_type: DAVETagType = DAVETagType.FAST
 
     # other
     logging: Logging = field(default_factory=Logging)
@@ -6,7 +6,8 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum, IntEnum, auto
 from functools import cache, cached_property, lru_cache
-from time import time
+from math import modf
+from time import gmtime, time
 from typing import Any, TypeAlias
 from uuid import UUID
 from zoneinfo import ZoneInfo
@@ -181,32 +182,24 @@ DAVPathCacheSize = 1024
 
 
 class DAVPath:
-    parts: list[str]
-    parts_count: int
-
-    @cached_property
-    def raw(self) -> str:
-        """start with '/', end without '/'"""
-        return "/" + "/".join(self.parts)
+    """immutable path object; compare and check prefix by precomputed raw string"""
 
-    @cached_property
-    def raw_count(self) -> int:
-        return len(self.raw)
+    __slots__ = ("parts", "parts_count", "raw", "hash_value")
 
-    @cached_property
-    def hash_value(self) -> int:
-        return hash(self.raw)
+    parts: tuple[str, ...]
+    parts_count: int
+    raw: str  # start with '/', end without '/'
+    hash_value: int
 
     def __init__(
         self,
         path: str | bytes | None = None,
-        parts: list[str] | None = None,
+        parts: tuple[str, ...] | list[str] | None = None,
         count: int | None = None,
     ):
         match path, parts, count:
-            case None, list(), int():
-                self.parts = parts
-                self.parts_count = count
+            case None, tuple() | list(), int():
+                self._init_from_parts(tuple(parts), "/" + "/".join(parts))
                 return
 
             case str(), None, None:
@@ -222,82 +215,103 @@ class DAVPath:
                 raise DAVCodingError(f"Incorrect path value for DAVPath: {path!r}")
 
         if new_path == "/":
-            self.parts = []
-            self.parts_count = 0
+            self._init_from_parts((), "/")
             return
 
-        new_path = new_path.strip("/")
-        new_parts: list[str] = list()
-        for item in new_path.split("/"):
+        new_parts = tuple(new_path.strip("/").split("/"))
+        for item in new_parts:
             if len(item) == 0 or item.isspace() or item in {".", ".."}:
                 raise ValueError(f"incorrect path value for DAVPath: {path!r}")
 
-            new_parts.append(item)
+        self._init_from_parts(new_parts, "/" + "/".join(new_parts))
 
-        self.parts = new_parts
-        self.parts_count = len(new_parts)
+    def _init_from_parts(self, parts: tuple[str, ...], raw: str) -> None:
+        self.parts = parts
+        self.parts_count = len(parts)
+        self.raw = raw
+        self.hash_value = hash(raw)
+
+    @classmethod
+    def _create(cls, parts: tuple[str, ...], raw: str) -> DAVPath:
+        """skip parse and check, parts and raw must be valid"""
+        path = cls.__new__(cls)
+        path._init_from_parts(parts, raw)
+        return path
+
+    def intern(self) -> DAVPath:
+        """return the shared object of the same path, for hot path like prefix"""
+        path = _dav_path_intern_table.get(self.raw)
+        if path is not None:
+            return path
+
+        if len(_dav_path_intern_table) < DAVPathCacheSize:
+            _dav_path_intern_table[self.raw] = self
+
+        return self
+
+    @property
+    def raw_count(self) -> int:
+        return len(self.raw)
 
     @property
     def parent(self) -> DAVPath:
-        return DAVPath(
-            parts=self.parts[: self.parts_count - 1], count=self.parts_count - 1
-        )
+        if self.parts_count <= 1:
+            return _DAV_PATH_ROOT
 
-    @cached_property
+        return DAVPath._create(self.parts[:-1], self.raw[: self.raw.rindex("/")])
+
+    @property
     def name(self) -> str:
         if self.parts_count == 0:
             return "/"
 
-        return self.parts[self.parts_count - 1]
+        return self.parts[-1]
 
-    @lru_cache(DAVPathCacheSize)
     def is_parent_of(self, path: DAVPath) -> bool:
-        if self.parts_count == 0 and path.parts_count > 0:
-            return True
-
-        parent, child = path.raw[: self.raw_count], path.raw[self.raw_count :]
-
-        if parent != self.raw:
-            return False
-
-        if child.startswith("/"):
-            return True
+        if self.parts_count == 0:
+            return path.parts_count > 0
 
-        return False
+        raw_count = len(self.raw)
+        return (
+            len(path.raw) > raw_count
+            and path.raw[raw_count] == "/"
+            and path.raw.startswith(self.raw)
+        )
 
-    @lru_cache(DAVPathCacheSize)
     def is_parent_of_or_is_self(self, path: DAVPath) -> bool:
         """is parent of or is the same/self"""
-        if self.parts_count == 0:
-            return True
-
-        if self == path:
+        if self.parts_count == 0 or self.raw == path.raw:
             return True
 
-        parent, child = path.raw[: self.raw_count], path.raw[self.raw_count :]
-
-        if parent != self.raw:
-            return False
+        raw_count = len(self.raw)
+        return (
+            len(path.raw) > raw_count
+            and path.raw[raw_count] == "/"
+            and path.raw.startswith(self.raw)
+        )
 
-        if child.startswith("/"):
-            return True
+    def get_child(self, parent: DAVPath) -> DAVPath:
+        """the relative path under the parent; itself if it's not under the parent"""
+        if parent.parts_count == 0 or not parent.is_parent_of_or_is_self(self):
+            return self
 
-        return False
+        if parent.parts_count == self.parts_count:
+            return _DAV_PATH_ROOT
 
-    def get_child(self, parent: DAVPath) -> DAVPath:
-        return DAVPath(
-            parts=self.parts[parent.parts_count :],
-            count=self.parts_count - parent.parts_count,
-        )
+        parts = self.parts[parent.parts_count :]
+        return DAVPath._create(parts, "/" + "/".join(parts))
 
     def add_child(self, child: DAVPath | str) -> DAVPath:
         if not isinstance(child, DAVPath):
             child = DAVPath(child)
 
-        return DAVPath(
-            parts=self.parts + child.parts,
-            count=self.parts_count + child.parts_count,
-        )
+        if child.parts_count == 0:
+            return self
+
+        if self.parts_count == 0:
+            return child
+
+        return DAVPath._create(self.parts + child.parts, self.raw + child.raw)
 
     def __hash__(self) -> int:
         return self.hash_value
@@ -306,7 +320,7 @@ class DAVPath:
         if not isinstance(other, DAVPath):
             return False
 
-        return self.hash_value == other.hash_value
+        return self.hash_value == other.hash_value and self.raw == other.raw
 
     def __lt__(self, other: DAVPath) -> bool:
         return self.raw < other.raw
@@ -327,6 +341,10 @@ class DAVPath:
         return self.raw
 
 
+_DAV_PATH_ROOT = DAVPath("/")
+_dav_path_intern_table: dict[str, DAVPath] = {_DAV_PATH_ROOT.raw: _DAV_PATH_ROOT}
+
+
 class DAVDepth(Enum):
     """
     - https://datatracker.ietf.org/doc/html/rfc4918#section-14.4
@@ -343,17 +361,77 @@ class DAVDepth(Enum):
     INFINITY = "infinity"
 
 
+DAVTimeCacheSize = 4096
+
+_HTTP_DATE_WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_HTTP_DATE_MONTH_NAMES = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+@lru_cache(DAVTimeCacheSize)
+def _format_utc_second(second: int) -> tuple[str, str, str]:
+    """return (http_date, date, time) of UTC second; many files share one second"""
+    st = gmtime(second)
+    date_str = f"{st.tm_year:04d}-{st.tm_mon:02d}-{st.tm_mday:02d}"
+    time_str = f"{st.tm_hour:02d}:{st.tm_min:02d}:{st.tm_sec:02d}"
+    http_date = "{}, {:02d} {} {:04d} {} GMT".format(
+        _HTTP_DATE_WEEKDAY_NAMES[st.tm_wday],
+        st.tm_mday,
+        _HTTP_DATE_MONTH_NAMES[st.tm_mon - 1],
+        st.tm_year,
+        time_str,
+    )
+
+    return http_date, date_str, time_str
+
+
 class DAVTime:
-    data: datetime
+    __slots__ = ("timestamp",)
+
     timestamp: float
 
     def __init__(self, timestamp: float | None = None):
         if timestamp is None:
-            self.data = datetime.now(timezone.utc)
-            self.timestamp = self.data.timestamp()
+            self.timestamp = time()
         else:
             self.timestamp = timestamp
-            self.data = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+    @property
+    def data(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc)
+
+    def _split_timestamp(self) -> tuple[int, int]:
+        """(second, microsecond), same rounding as datetime.fromtimestamp()"""
+        frac, second = modf(self.timestamp)
+        microsecond = round(frac * 1_000_000)
+        if microsecond >= 1_000_000:
+            second += 1
+            microsecond -= 1_000_000
+        elif microsecond < 0:
+            second -= 1
+            microsecond += 1_000_000
+
+        return int(second), microsecond
+
+    def _isoformat(self, sep: str) -> str:
+        second, microsecond = self._split_timestamp()
+        _, date_str, time_str = _format_utc_second(second)
+        if microsecond == 0:
+            return f"{date_str}{sep}{time_str}+00:00"
+
+        return f"{date_str}{sep}{time_str}.{microsecond:06d}+00:00"
 
     @classmethod
     def from_milliseconds(cls, timestamp: float) -> DAVTime:
@@ -363,7 +441,7 @@ class DAVTime:
     def from_microseconds(cls, timestamp: float) -> DAVTime:
         return cls(timestamp / 1_000_000)
 
-    @cached_property
+    @property
     def iso_8601(self) -> str:
         # - https://datatracker.ietf.org/doc/html/rfc3339#section-5.6
         # 5.8. Examples
@@ -394,14 +472,14 @@ class DAVTime:
         #    1937-06-30.  This time zone cannot be represented exactly using the
         #    HH:MM format, and this timestamp uses the closest representable UTC
         #    offset.
-        return self.data.isoformat()
+        return self._isoformat("T")
 
-    @cached_property
+    @property
     def w3c(self) -> str:
         # "1970-01-01 00:00:00+00:00"
-        return self.data.isoformat(" ")
+        return self._isoformat(" ")
 
-    @cached_property
+    @property
     def http_date(self) -> str:
         # - https://datatracker.ietf.org/doc/html/rfc9110.html#section-5.6.7
         # 5.6.7. Date/Time Formats
@@ -431,7 +509,7 @@ class DAVTime:
         # https://developer.mozilla.org/zh-CN/docs/Web/HTTP/Headers/Last-Modified
         # Last-Modified:
         #   <day-name>, <day> <month> <year> <hour>:<minute>:<second> GMT
-        return self.data.strftime("%a, %d %b %Y %H:%M:%S GMT")
+        return _format_utc_second(self._split_timestamp()[0])[0]
 
     def display(self, timezone: ZoneInfo) -> str:
         return self.data.astimezone(timezone).isoformat(" ")
@@ -612,6 +690,65 @@ DAVPropertyIdentity: TypeAlias = tuple[str, str]
 DAVPropertyPatchEntry: TypeAlias = tuple[DAVPropertyIdentity, str, bool]
 
 
+# where FileSystemProvider keeps dead property and content etag
+class DAVPropertyStoreType(DAVUpperEnumAbc):
+    SIDECAR = auto()  # {name}.WebDAV JSON file, next to the resource
+    SQLITE = auto()  # one SQLite database per provider root
+    XATTR = auto()  # Linux user.* xattr on the resource itself
+
+
+# MemoryProvider|Snapshot ---
+DEFAULT_MEMORY_SNAPSHOT_INTERVAL = 300  # seconds, 0: only journal
+
+# CachingProvider ---
+DEFAULT_PROVIDER_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_PROVIDER_CACHE_ENTRY_MAX_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_PROVIDER_CACHE_METADATA_TTL = 5  # seconds
+DEFAULT_PROVIDER_CACHE_METADATA_MAX_ENTRIES = 64 * 1024
+
+# WebHDFSProvider ---
+DEFAULT_WEBHDFS_MAX_CONNECTIONS = 100
+DEFAULT_WEBHDFS_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_WEBHDFS_KEEPALIVE_EXPIRY = 30.0  # seconds, less than the server idle timeout
+DEFAULT_WEBHDFS_CONNECT_TIMEOUT = 5.0  # seconds
+DEFAULT_WEBHDFS_READ_TIMEOUT = 60.0  # seconds, namenode may be slow on a big dir
+DEFAULT_WEBHDFS_WRITE_TIMEOUT = 60.0  # seconds
+DEFAULT_WEBHDFS_POOL_TIMEOUT = 5.0  # seconds
+# refetch before the token's renew interval(24 hours by default) is reached
+DEFAULT_WEBHDFS_DELEGATION_TOKEN_TTL = 3600  # seconds
+# GETFILESTATUS result, invalidated by the provider's own writes
+DEFAULT_WEBHDFS_METADATA_TTL = 1.0  # seconds, 0: disable
+DEFAULT_WEBHDFS_METADATA_MAX_ENTRIES = 64 * 1024
+# LISTSTATUS_BATCH requests in flight, a Depth: infinity PROPFIND lists dirs concurrently
+DEFAULT_WEBHDFS_LIST_STATUS_CONCURRENCY = 8
+# OPEN -> CREATE pipes in flight, the data goes through the server once
+DEFAULT_WEBHDFS_COPY_CONCURRENCY = 8
+# a multiple of the HDFS block size(128 MiB by default), required by CONCAT
+DEFAULT_WEBHDFS_COPY_SEGMENT_SIZE = 1024 * 1024 * 1024  # bytes
+# segments in flight of a GET, each one holds a datanode connection
+DEFAULT_WEBHDFS_PARALLEL_READ_CONCURRENCY = 4
+DEFAULT_WEBHDFS_PARALLEL_READ_SEGMENT_SIZE = 64 * 1024 * 1024  # bytes
+
+# S3Provider ---
+DEFAULT_S3_ENDPOINT_URL = "https://s3.amazonaws.com"
+DEFAULT_S3_REGION = "us-east-1"
+DEFAULT_S3_MAX_CONNECTIONS = 100
+DEFAULT_S3_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_S3_KEEPALIVE_EXPIRY = 30.0  # seconds
+DEFAULT_S3_CONNECT_TIMEOUT = 5.0  # seconds
+DEFAULT_S3_READ_TIMEOUT = 60.0  # seconds
+DEFAULT_S3_WRITE_TIMEOUT = 60.0  # seconds
+DEFAULT_S3_POOL_TIMEOUT = 5.0  # seconds
+# a larger PUT is uploaded in parts, S3 requires 5 MiB at least(except the last)
+DEFAULT_S3_MULTIPART_PART_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_S3_MULTIPART_CONCURRENCY = 4  # parts buffered and in flight of a PUT
+DEFAULT_S3_COPY_CONCURRENCY = 8  # CopyObject requests in flight of a COPY/MOVE
+DEFAULT_S3_LIST_MAX_KEYS = 1000  # one ListObjectsV2 page, 1000 at most
+# HeadObject result, invalidated by the provider's own writes
+DEFAULT_S3_METADATA_TTL = 5.0  # seconds, 0: disable
+DEFAULT_S3_METADATA_MAX_ENTRIES = 64 * 1024
+
+
 # Range ---
 # - 从 0 开始计数
 # - 左右均为闭区间
@@ -629,6 +766,23 @@ class DAVRequestRange:
     suffix_length: int | None = None  # <= file_size
 
 
+# Range|Request|PUT ---
+@dataclass(slots=True)
+class DAVRequestContentRange:
+    """PUT with Content-Range, for resumable upload"""
+
+    content_start: int | None  # None: "bytes */total", query the uploaded offset
+    content_end: int | None
+    total_length: int
+
+    @property
+    def content_length(self) -> int:
+        if self.content_start is None or self.content_end is None:
+            return 0
+
+        return self.content_end - self.content_start + 1
+
+
 # Range|Response ---
 @dataclass(slots=True)
 class DAVResponseContentRange:
@@ -663,9 +817,35 @@ class DAVSenderName(DAVLowerEnumAbc):
     GZIP = auto()
 
 
+# Request|Upload ---
+DEFAULT_UPLOAD_BUFFER_SIZE = 1024 * 1024  # bytes
+DEFAULT_UPLOAD_RESUMABLE_SESSION_TIMEOUT = 24 * 3600  # seconds, since last chunk
+
+
+# Response|ETag ---
+class DAVETagType(DAVUpperEnumAbc):
+    FAST = auto()  # weak, inode-size-mtime_ns
+    CONTENT = auto()  # strong, hash of content; fallback to FAST if not supported
+
+
 # Response|Compression ---
 DEFAULT_COMPRESSION_CONTENT_MINIMUM_LENGTH = 1024  # bytes
 DEFAULT_COMPRESSION_CONTENT_TYPE_RULE = r"^application/(?:xml|json)$|^text/"
+# generate precompressed file after x GET requests which can accept it
+DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_HITS = 3
+DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_TRACK_SIZE = 1024
+# compressed response body cache, keyed by (ETag|content digest, encoding, level)
+DEFAULT_COMPRESSION_CACHE_SIZE = 32 * 1024 * 1024  # bytes, 0: disable
+DEFAULT_COMPRESSION_CACHE_ENTRY_MAX_SIZE = 1024 * 1024  # bytes, compressed
+# server side preference, the client's q-value comes first
+DEFAULT_COMPRESSION_ENCODING_PREFERENCE = ("zstd", "deflate", "gzip")
+DEFAULT_COMPRESSION_ACCEPT_ENCODING_CACHE_SIZE = 256
+# Shannon entropy(bits per byte) of the first block's sample, 8.0 is the max
+DEFAULT_COMPRESSION_ENTROPY_PROBE_SIZE = 4096  # bytes
+DEFAULT_COMPRESSION_ENTROPY_THRESHOLD = 7.5
+# compress in thread pool, the small body is compressed in event loop directly
+DEFAULT_COMPRESSION_EXECUTOR_MAX_WORKERS = 4  # 0: disable
+DEFAULT_COMPRESSION_EXECUTOR_CONTENT_MINIMUM_LENGTH = 64 * 1024  # bytes
 
 
 class DAVCompressLevel(Enum):
@@ -692,6 +872,10 @@ DEFAULT_PERMISSIONS = ["+"]
 # >0 is seconds until cache entry expires
 DEFAULT_HTTP_BASIC_AUTH_CACHE_TIMEOUT = -1
 
+# seconds, a nonce can be reused until it expires; after that the client is
+# re-challenged with stale=true
+DEFAULT_HTTP_DIGEST_AUTH_NONCE_LIFETIME = 300
+
 
 @dataclass(slots=True)
 class DAVUser:
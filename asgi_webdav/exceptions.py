@@ -34,5 +34,9 @@ class DAVExceptionProviderInitFailed(DAVException):
     pass
 
 
+class DAVExceptionUploadAborted(DAVException):
+    pass
+
+
 class DAVExceptionAuthFailed(DAVException):
     pass
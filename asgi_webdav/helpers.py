@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import hashlib
 import re
 import sys
 import xml.parsers.expat
@@ -41,16 +40,27 @@ async def receive_all_data_in_one_call(receive: ASGIReceiveCallable) -> bytes:
     return data
 
 
-def generate_etag(f_size: int, f_modify_time: float) -> str:
-    """
+def generate_etag(f_size: int, f_modify_time_ns: int, f_inode: int = 0) -> str:
+    """fast weak etag: inode-size-mtime_ns, without hashing
     https://tools.ietf.org/html/rfc7232#section-2.3 ETag
     https://developer.mozilla.org/zh-CN/docs/Web/HTTP/Headers/ETag
     """
-    return 'W/"{}"'.format(hashlib.md5(f"{f_size}{f_modify_time}".encode()).hexdigest())
+    return f'W/"{f_inode:x}-{f_size:x}-{f_modify_time_ns:x}"'
+
+
+def generate_strong_etag(content_hash: str) -> str:
+    """strong etag: hash of content"""
+    return f'"{content_hash}"'
+
+
+# entity-tag = [ weak ] opaque-tag
+# opaque-tag = DQUOTE *etagc DQUOTE
+# etagc      = %x21 / %x23-7E / obs-text
+_ETAG_REGEX = re.compile(r'(W/)?"[\x21\x23-\x7e\x80-\xff]*"')
 
 
 def is_etag(etag: str) -> bool:
-    return re.match(r'W/"[a-f0-9]{32}"', etag) is not None
+    return _ETAG_REGEX.fullmatch(etag) is not None
 
 
 def guess_type(config: Config, file: str | Path) -> tuple[str | None, str | None]:
@@ -20,6 +20,11 @@ class DAVPropertyBasicData:
     content_charset: str | None = None
     content_length: int = 0
     content_encoding: str | None = None
+    # the content is stored encoded and served as is, eg: precompressed file
+    response_content_encoding: str | None = None
+
+    # precomputed by provider(eg: from a directory listing), or generate_etag()
+    etag: str = ""
 
     def __post_init__(self) -> None:
         # https://developer.mozilla.org/zh-CN/docs/Web/HTTP/Basics_of_HTTP/MIME_types
@@ -30,15 +35,13 @@ class DAVPropertyBasicData:
             else:
                 self.content_type = "application/octet-stream"
 
-    _etag: str | None = None
+        if not self.etag:
+            self.update_etag()
 
-    @property
-    def etag(self) -> str:
-        if self._etag is None:
-            self._etag = generate_etag(
-                self.content_length, self.last_modified.timestamp
-            )
-        return self._etag
+    def update_etag(self) -> None:
+        self.etag = generate_etag(
+            self.content_length, int(self.last_modified.timestamp * 1_000_000_000)
+        )
 
     def get_get_head_response_headers(self) -> dict[bytes, bytes]:
         if self.content_type.startswith("text/") and self.content_charset:
@@ -64,6 +67,25 @@ class DAVPropertyBasicData:
                 }
             )
 
+        if self.response_content_encoding:
+            headers.update(
+                {
+                    b"Content-Encoding": self.response_content_encoding.encode("utf-8"),
+                    b"Vary": b"Accept-Encoding",
+                }
+            )
+
+        return headers
+
+    def get_not_modified_response_headers(self) -> dict[bytes, bytes]:
+        """for 304 response"""
+        headers = {
+            b"ETag": self.etag.encode("utf-8"),
+            b"Last-Modified": self.last_modified.http_date.encode("utf-8"),
+        }
+        if self.response_content_encoding:
+            headers[b"Vary"] = b"Accept-Encoding"
+
         return headers
 
     def as_dict(self) -> dict[str, str | int]:
@@ -0,0 +1,557 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from collections.abc import Callable
+from copy import copy
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from time import monotonic
+from typing import Any
+from uuid import uuid4
+
+import aiofiles
+
+from asgi_webdav.config import ProviderCache
+from asgi_webdav.constants import (
+    DEFAULT_PROVIDER_CACHE_METADATA_MAX_ENTRIES,
+    RESPONSE_DATA_BLOCK_SIZE,
+    DAVPath,
+    DAVResponseBodyGenerator,
+    DAVResponseContentRange,
+)
+from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
+from asgi_webdav.provider.common import (
+    DAVProvider,
+    DAVProviderFeature,
+    DAVUploadSession,
+    get_response_content_range,
+)
+from asgi_webdav.request import DAVRequest
+from asgi_webdav.response import get_response_body_generator
+
+logger = getLogger(__name__)
+
+CACHING_PROVIDER_URI_PREFIX = "cache+"
+"""cache+file:///data, cache+http://namenode:9870/webhdfs/v1"""
+CACHING_PROVIDER_DIR_NAME = "asgi-webdav-cache"
+"""disk tier: owned by the provider, in the configured path"""
+CACHING_PROVIDER_FILE_EXTENSION = "cache"
+"""disk tier: {path}/asgi-webdav-cache/{sha256 of cache key}.cache"""
+
+
+@dataclass(slots=True)
+class DAVContentCacheEntry:
+    # validated with origin's metadata
+    etag: str
+    last_modified: float
+
+    size: int
+    content: bytes | None = None  # memory tier
+    fs_path: Path | None = None  # disk tier
+
+
+def _write_content_cache_file(fs_path: Path, content: bytes) -> None:
+    tmp_path = fs_path.with_name(f"{fs_path.name}.{uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+
+        os.replace(tmp_path, fs_path)
+
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+async def _content_cache_file_body_generator(
+    fs_path: Path,
+    start: int,
+    end: int,
+    fallback: DAVResponseBodyGenerator,
+    block_size: int = RESPONSE_DATA_BLOCK_SIZE,
+) -> DAVResponseBodyGenerator:
+    try:
+        f = await aiofiles.open(fs_path, mode="rb")
+    except FileNotFoundError:
+        # evicted after the lookup, read it from origin
+        async for item in fallback:
+            yield item
+
+        return
+
+    await fallback.aclose()
+    try:
+        await f.seek(start)
+        remain = end - start + 1
+        more_body = True
+        while more_body:
+            body = await f.read(min(remain, block_size))
+            remain -= len(body)
+            more_body = remain > 0 and len(body) > 0
+
+            yield body, more_body
+
+    finally:
+        await f.close()
+
+
+class DAVContentCache:
+    """LRU cache of origin's file content, bounded by total bytes
+    - memory tier: keep the content in memory
+    - disk tier: one file per entry, in a subdirectory of the cache directory
+    """
+
+    size: int
+    entry_max_size: int
+    path: Path | None
+
+    current_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, size: int, entry_max_size: int, path: Path | None = None):
+        self.size = max(size, 0)
+        self.entry_max_size = min(entry_max_size, self.size)
+        self.path = None
+        if path is not None:
+            # the configured path may be shared, touch only our own directory
+            self.path = path.joinpath(CACHING_PROVIDER_DIR_NAME)
+            # the index is in memory, files of last run are unknown
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path.mkdir(parents=True, exist_ok=True)
+
+        self._data: OrderedDict[DAVPath, DAVContentCacheEntry] = OrderedDict()
+        self.current_size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enable(self) -> bool:
+        return self.size > 0
+
+    def _get_fs_path(self, key: DAVPath) -> Path:
+        assert self.path is not None
+        name = hashlib.sha256(key.raw.encode("utf-8")).hexdigest()
+        return self.path.joinpath(f"{name}.{CACHING_PROVIDER_FILE_EXTENSION}")
+
+    def get(
+        self, key: DAVPath, etag: str, last_modified: float
+    ) -> DAVContentCacheEntry | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.etag != etag or entry.last_modified != last_modified:
+            # changed on origin
+            self.remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def set(
+        self, key: DAVPath, etag: str, last_modified: float, content: bytes
+    ) -> None:
+        if len(content) > self.entry_max_size:
+            return
+
+        entry = DAVContentCacheEntry(
+            etag=etag, last_modified=last_modified, size=len(content)
+        )
+        if self.path is None:
+            entry.content = content
+        else:
+            entry.fs_path = self._get_fs_path(key)
+            try:
+                await asyncio.to_thread(
+                    _write_content_cache_file, entry.fs_path, content
+                )
+            except OSError as e:
+                logger.warning(f"write content cache failed: {e}")
+                return
+
+        # same key, same file name; the old file was replaced
+        old_entry = self._data.pop(key, None)
+        if old_entry is not None:
+            self.current_size -= old_entry.size
+
+        self._data[key] = entry
+        self.current_size += entry.size
+
+        while self.current_size > self.size:
+            _, evicted_entry = self._data.popitem(last=False)
+            self._remove_entry(evicted_entry)
+            self.evictions += 1
+
+    def _remove_entry(self, entry: DAVContentCacheEntry) -> None:
+        self.current_size -= entry.size
+        if entry.fs_path is not None:
+            # a reader has opened it, can read to the end
+            entry.fs_path.unlink(missing_ok=True)
+
+    def remove(self, key: DAVPath) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._remove_entry(entry)
+
+    def remove_tree(self, key: DAVPath) -> None:
+        for sub_key in [k for k in self._data if key.is_parent_of_or_is_self(k)]:
+            self.remove(sub_key)
+
+    def purge(self) -> None:
+        for key in list(self._data):
+            self.remove(key)
+
+    def get_info(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": self.size,
+            "current_size": self.current_size,
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": 0.0 if total == 0 else self.hits / total,
+            "evictions": self.evictions,
+        }
+
+
+class CachingProvider(DAVProvider):
+    """read-through cache in front of a slow origin provider
+    - metadata: HEAD result of origin, per user, expires after metadata_ttl
+    - content: validated with origin's ETag and Last-Modified
+    - writes go through to origin, then invalidate the cache
+    - PROPFIND and lock are not cached
+    """
+
+    type = "cache"
+    feature = DAVProviderFeature(
+        content_range=True,
+        home_dir=True,
+        resumable_upload=True,
+    )
+
+    def __init__(
+        self,
+        *args: Any,
+        origin_class: Callable[..., DAVProvider],
+        origin_kwargs: dict[str, Any],
+        cache: ProviderCache,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.origin: DAVProvider = origin_class(
+            config=self.config,
+            prefix=self.prefix,
+            uri=self.uri.removeprefix(CACHING_PROVIDER_URI_PREFIX),
+            home_dir=self.home_dir,
+            read_only=self.read_only,
+            ignore_property_extra=self.ignore_property_extra,
+            property_store=self.property_store_type,
+            **origin_kwargs,
+        )
+        self.feature = DAVProviderFeature(
+            content_range=True,
+            home_dir=self.origin.feature.home_dir,
+            resumable_upload=self.origin.feature.resumable_upload,
+        )
+
+        self.metadata_ttl = cache.metadata_ttl
+        # dict[cache key, dict[username, (expire time, basic data)]]
+        self._metadata: OrderedDict[
+            DAVPath, dict[str, tuple[float, DAVPropertyBasicData]]
+        ] = OrderedDict()
+        self.content_cache = DAVContentCache(
+            size=cache.size,
+            entry_max_size=cache.entry_max_size,
+            path=Path(cache.path) if cache.path else None,
+        )
+
+    def __repr__(self) -> str:
+        return f"{CACHING_PROVIDER_URI_PREFIX}{self.origin!r}"
+
+    async def close(self) -> None:
+        await self.origin.close()
+
+    def _get_cache_key(self, path: DAVPath, username: str | None) -> DAVPath:
+        if self.home_dir and username:
+            # same path, different user's file
+            return DAVPath(f"/{username}").add_child(path)
+
+        return path
+
+    # --- metadata
+    async def _get_basic_data(
+        self, request: DAVRequest
+    ) -> tuple[int, DAVPropertyBasicData | None]:
+        key = self._get_cache_key(request.dist_src_path, request.user.username)
+        user_metadata = self._metadata.get(key)
+        if user_metadata is not None:
+            value = user_metadata.get(request.user.username)
+            if value is not None and value[0] > monotonic():
+                self._metadata.move_to_end(key)
+                # the caller may update it, eg: dir browser
+                return 200, copy(value[1])
+
+        http_status, basic_data = await self.origin._do_head(request)
+        if (
+            http_status == 200
+            and basic_data is not None
+            and basic_data.response_content_encoding is None
+        ):
+            self._set_basic_data(key, request.user.username, basic_data)
+
+        return http_status, basic_data
+
+    def _set_basic_data(
+        self, key: DAVPath, username: str, basic_data: DAVPropertyBasicData
+    ) -> None:
+        if self.metadata_ttl <= 0:
+            return
+
+        user_metadata = self._metadata.get(key)
+        if user_metadata is None:
+            user_metadata = dict()
+            self._metadata[key] = user_metadata
+            if len(self._metadata) > DEFAULT_PROVIDER_CACHE_METADATA_MAX_ENTRIES:
+                self._metadata.popitem(last=False)
+
+        user_metadata[username] = (
+            monotonic() + self.metadata_ttl,
+            copy(basic_data),
+        )
+
+    def _invalidate(self, path: DAVPath, username: str, tree: bool = False) -> None:
+        key = self._get_cache_key(path, username)
+        if tree:
+            for sub_key in [
+                k for k in self._metadata if key.is_parent_of_or_is_self(k)
+            ]:
+                self._metadata.pop(sub_key)
+
+            self.content_cache.remove_tree(key)
+
+        else:
+            self._metadata.pop(key, None)
+            self.content_cache.remove(key)
+
+        # parent dir's last modified is changed
+        self._metadata.pop(key.parent, None)
+
+    # --- read
+    async def _get_res_etag(self, request: DAVRequest) -> str:
+        return await self.origin._get_res_etag(request)
+
+    async def _get_res_etag_from_res_dist_path(
+        self, res_dist_path: DAVPath, username: str | None = None
+    ) -> str:
+        return await self.origin._get_res_etag_from_res_dist_path(
+            res_dist_path, username
+        )
+
+    async def _do_propfind(self, request: DAVRequest) -> dict[DAVPath, DAVProperty]:
+        return await self.origin._do_propfind(request)
+
+    async def _do_head(
+        self, request: DAVRequest
+    ) -> tuple[int, DAVPropertyBasicData | None]:
+        return await self._get_basic_data(request)
+
+    async def _do_get(self, request: DAVRequest) -> tuple[
+        int,
+        DAVPropertyBasicData | None,
+        DAVResponseBodyGenerator | None,
+        DAVResponseContentRange | None,
+    ]:
+        if not self.content_cache.enable:
+            return await self.origin._do_get(request)
+
+        http_status, basic_data = await self._get_basic_data(request)
+        if (
+            http_status != 200
+            or basic_data is None
+            or basic_data.is_collection
+            or basic_data.response_content_encoding is not None
+        ):
+            return await self.origin._do_get(request)
+
+        key = self._get_cache_key(request.dist_src_path, request.user.username)
+        entry = self.content_cache.get(
+            key, basic_data.etag, basic_data.last_modified.timestamp
+        )
+        if entry is None:
+            return await self._do_get_from_origin(request, key)
+
+        response_content_range = None
+        if len(request.ranges) != 0:
+            response_content_range = get_response_content_range(
+                request_ranges=request.ranges,
+                file_size=basic_data.content_length,
+            )
+            if (
+                response_content_range is not None
+                and request.if_range
+                and not request.if_range.match(
+                    etag=basic_data.etag,
+                    last_modified=basic_data.last_modified.http_date,
+                )
+            ):
+                # IfRange is not match
+                return (416, basic_data, None, response_content_range)
+
+        if entry.content is not None:
+            if response_content_range is None:
+                body_generator = get_response_body_generator(entry.content)
+            else:
+                body_generator = get_response_body_generator(
+                    entry.content,
+                    response_content_range.content_start,
+                    response_content_range.content_end,
+                )
+
+        else:
+            assert entry.fs_path is not None
+            if response_content_range is None:
+                start, end = 0, entry.size - 1
+            else:
+                start = response_content_range.content_start
+                end = response_content_range.content_end
+
+            body_generator = _content_cache_file_body_generator(
+                entry.fs_path, start, end, self._get_body_from_origin(request)
+            )
+
+        if response_content_range is None:
+            return 200, basic_data, body_generator, None
+
+        return 206, basic_data, body_generator, response_content_range
+
+    async def _get_body_from_origin(
+        self, request: DAVRequest
+    ) -> DAVResponseBodyGenerator:
+        _, _, body_generator, _ = await self.origin._do_get(request)
+        if body_generator is None:
+            yield b"", False
+            return
+
+        async for item in body_generator:
+            yield item
+
+    async def _do_get_from_origin(self, request: DAVRequest, key: DAVPath) -> tuple[
+        int,
+        DAVPropertyBasicData | None,
+        DAVResponseBodyGenerator | None,
+        DAVResponseContentRange | None,
+    ]:
+        http_status, basic_data, body_generator, response_content_range = (
+            await self.origin._do_get(request)
+        )
+        if (
+            http_status != 200
+            or basic_data is None
+            or body_generator is None
+            or response_content_range is not None
+            or basic_data.response_content_encoding is not None
+            or basic_data.content_length > self.content_cache.entry_max_size
+        ):
+            return http_status, basic_data, body_generator, response_content_range
+
+        self._set_basic_data(key, request.user.username, basic_data)
+        return (
+            http_status,
+            basic_data,
+            self._fill_content_cache(key, basic_data, body_generator),
+            response_content_range,
+        )
+
+    async def _fill_content_cache(
+        self,
+        key: DAVPath,
+        basic_data: DAVPropertyBasicData,
+        body_generator: DAVResponseBodyGenerator,
+    ) -> DAVResponseBodyGenerator:
+        # copy the values, the caller may update basic_data
+        etag = basic_data.etag
+        last_modified = basic_data.last_modified.timestamp
+        content_length = basic_data.content_length
+
+        content: bytearray | None = bytearray()
+        async for body, more_body in body_generator:
+            if content is not None:
+                content += body
+                if len(content) > content_length:
+                    content = None  # changed while reading, give up
+
+            if not more_body and content is not None:
+                # the sender stops after the last block
+                if len(content) == content_length:
+                    await self.content_cache.set(
+                        key, etag, last_modified, bytes(content)
+                    )
+
+            yield body, more_body
+
+    # --- write
+    async def _do_proppatch(self, request: DAVRequest) -> int:
+        return await self.origin._do_proppatch(request)
+
+    async def _do_mkcol(self, request: DAVRequest) -> int:
+        http_status = await self.origin._do_mkcol(request)
+        self._invalidate(request.dist_src_path, request.user.username)
+        return http_status
+
+    async def _do_delete(self, request: DAVRequest) -> int:
+        http_status = await self.origin._do_delete(request)
+        self._invalidate(request.dist_src_path, request.user.username, tree=True)
+        return http_status
+
+    async def _do_put(self, request: DAVRequest) -> int:
+        try:
+            return await self.origin._do_put(request)
+        finally:
+            self._invalidate(request.dist_src_path, request.user.username)
+
+    async def _do_copy(self, request: DAVRequest) -> int:
+        http_status = await self.origin._do_copy(request)
+        self._invalidate(request.dist_dst_path, request.user.username, tree=True)
+        return http_status
+
+    async def _do_move(self, request: DAVRequest) -> int:
+        http_status = await self.origin._do_move(request)
+        self._invalidate(request.dist_src_path, request.user.username, tree=True)
+        self._invalidate(request.dist_dst_path, request.user.username, tree=True)
+        return http_status
+
+    async def _create_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int | None:
+        return await self.origin._create_upload_session(request, session)
+
+    async def _append_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession, content_length: int
+    ) -> bool:
+        return await self.origin._append_upload_session(
+            request, session, content_length
+        )
+
+    async def _commit_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int:
+        try:
+            return await self.origin._commit_upload_session(request, session)
+        finally:
+            self._invalidate(session.path, request.user.username)
+
+    async def _remove_upload_session(self, session: DAVUploadSession) -> None:
+        await self.origin._remove_upload_session(session)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import urllib.parse
 from collections.abc import Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from logging import getLogger
+from time import time
 from typing import Any
 from uuid import UUID
 
@@ -14,6 +16,7 @@ from asgi_webdav.constants import (
     DAVMethod,
     DAVPath,
     DAVPropertyIdentity,
+    DAVPropertyStoreType,
     DAVRangeType,
     DAVRequestIf,
     DAVRequestIfConditionType,
@@ -92,6 +95,41 @@ def get_response_content_range(
             raise DAVCodingError()  # pragma: no cover
 
 
+def _get_etag_opaque_tag(etag: str) -> str:
+    if etag.startswith("W/"):
+        return etag[2:]
+
+    return etag
+
+
+def is_not_modified(
+    request: DAVRequest, property_basic_data: DAVPropertyBasicData
+) -> bool:
+    """evaluate If-None-Match/If-Modified-Since for GET/HEAD
+    - https://www.rfc-editor.org/rfc/rfc9110#section-13.2.2
+    """
+    if property_basic_data.is_collection:
+        # its mtime/ETag doesn't follow the children, or the dir browser page
+        return False
+
+    if_none_match = request.if_none_match
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        if "*" in if_none_match:
+            return True
+
+        # weak comparison
+        opaque_tag = _get_etag_opaque_tag(property_basic_data.etag)
+        return any(_get_etag_opaque_tag(etag) == opaque_tag for etag in if_none_match)
+
+    if_modified_since = request.if_modified_since
+    if if_modified_since is not None:
+        # HTTP-date has one second resolution
+        return int(property_basic_data.last_modified.timestamp) <= if_modified_since
+
+    return False
+
+
 @dataclass(slots=True)
 class DAVProviderFeature:
     # support HTTP Range header with one or more ranges
@@ -100,6 +138,27 @@ class DAVProviderFeature:
 
     home_dir: bool
 
+    # PUT with Content-Range
+    resumable_upload: bool = False
+
+
+@dataclass(slots=True)
+class DAVUploadSession:
+    """resumable upload, the chunks are staged until the last byte arrives"""
+
+    username: str
+    path: DAVPath  # dist path
+    total_length: int
+
+    offset: int = 0
+    expire_time: float = 0.0
+    # FileSystemProvider: staged file's Path; MemoryProvider: bytearray
+    staged_data: Any = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+DAVUploadSessionKey = tuple[str, DAVPath, int]  # username, dist path, total length
+
 
 class DAVProvider:
     type: str  # TODO: rename => name
@@ -117,6 +176,7 @@ class DAVProvider:
         home_dir: bool,
         read_only: bool,
         ignore_property_extra: bool,
+        property_store: DAVPropertyStoreType = DAVPropertyStoreType.SIDECAR,
     ):
         self.config = config
 
@@ -144,12 +204,18 @@ class DAVProvider:
             ).encode()
 
         self.ignore_property_extra = ignore_property_extra
+        self.property_store_type = property_store
 
         self.lock_keeper = DAVLockKeeper()
+        self.upload_sessions: dict[DAVUploadSessionKey, DAVUploadSession] = dict()
 
     def __repr__(self) -> str:
         raise NotImplementedError  # pragma: no cover
 
+    async def close(self) -> None:
+        """release the resources, on app shutdown"""
+        pass
+
     def get_dist_path(self, path: DAVPath) -> DAVPath:
         return path.get_child(self.prefix)
 
@@ -745,7 +811,18 @@ class DAVProvider:
         DAVResponseBodyGenerator | None,
         DAVResponseContentRange | None,
     ]:
-        return await self._do_get(request)
+        http_status, property_basic_data, body_generator, content_range = (
+            await self._do_get(request)
+        )
+        if (
+            http_status in {200, 206, 416}
+            and property_basic_data is not None
+            and is_not_modified(request, property_basic_data)
+        ):
+            # body_generator is never started, the file is not opened
+            return 304, property_basic_data, None, None
+
+        return http_status, property_basic_data, body_generator, content_range
 
     async def _do_get(self, request: DAVRequest) -> tuple[
         int,
@@ -760,7 +837,17 @@ class DAVProvider:
 
     async def do_head(self, request: DAVRequest) -> DAVResponse:
         http_status, property_basic_data = await self._do_head(request)
-        if http_status == 200:
+        if (
+            http_status == 200
+            and property_basic_data is not None
+            and is_not_modified(request, property_basic_data)
+        ):
+            response = DAVResponse(
+                status=304,
+                headers=property_basic_data.get_not_modified_response_headers(),
+                response_type=DAVResponseContentType.ANY,
+            )
+        elif http_status == 200:
             headers = property_basic_data.get_get_head_response_headers()  # type: ignore
             response = DAVResponse(
                 status=http_status,
@@ -933,12 +1020,137 @@ class DAVProvider:
         if locked:
             return DAVResponse(423)
 
+        if b"content-range" in request.headers:
+            return await self._do_put_with_content_range(request)
+
         http_status = await self._do_put(request)
         return DAVResponse(http_status)
 
     async def _do_put(self, request: DAVRequest) -> int:
         raise NotImplementedError  # pragma: no cover
 
+    """
+    Resumable upload, PUT with Content-Range
+    https://www.rfc-editor.org/rfc/rfc9110#section-14.5
+
+    - PUT Content-Range: bytes {start}-{end}/{total}
+        append the chunk to the staged data, start must be the uploaded offset
+    - PUT Content-Range: bytes */{total}
+        query the uploaded offset, or commit the completed upload again
+    - the response of an incomplete upload is 202, with header
+        Range: bytes=0-{offset - 1}
+    - the staged data is committed to the resource after the last byte arrives,
+      the lock and If header are checked again before committing
+    """
+
+    @staticmethod
+    def _create_upload_session_response(
+        status: int, session: DAVUploadSession
+    ) -> DAVResponse:
+        headers = dict()
+        if session.offset > 0:
+            headers[b"Range"] = f"bytes=0-{session.offset - 1}".encode()
+
+        return DAVResponse(status, headers=headers)
+
+    async def _purge_expired_upload_sessions(self) -> None:
+        now = time()
+        for key, session in list(self.upload_sessions.items()):
+            if session.expire_time > now or session.lock.locked():
+                continue
+
+            logger.debug(f"upload session expired: {session.path}")
+            self.upload_sessions.pop(key, None)
+            await self._remove_upload_session(session)
+
+    async def _do_put_with_content_range(self, request: DAVRequest) -> DAVResponse:
+        content_range = request.content_range
+        if (
+            content_range is None
+            or not self.feature.resumable_upload
+            or not self.config.upload.enable_resumable
+        ):
+            # MUST send 400, if PUT with Content-Range is not supported
+            return DAVResponse(400)
+
+        await self._purge_expired_upload_sessions()
+
+        key = (
+            request.user.username,
+            request.dist_src_path,
+            content_range.total_length,
+        )
+        session = self.upload_sessions.get(key)
+        if session is None:
+            session = DAVUploadSession(
+                username=request.user.username,
+                path=request.dist_src_path,
+                total_length=content_range.total_length,
+                expire_time=time() + self.config.upload.resumable_session_timeout,
+            )
+            http_status = await self._create_upload_session(request, session)
+            if http_status is not None:
+                return DAVResponse(http_status)
+
+            self.upload_sessions[key] = session
+
+        async with session.lock:
+            if self.upload_sessions.get(key) is not session:
+                # committed or purged by another request
+                return DAVResponse(409)
+
+            if content_range.content_start is not None:
+                if content_range.content_start != session.offset:
+                    return self._create_upload_session_response(416, session)
+
+                completed = await self._append_upload_session(
+                    request, session, content_range.content_length
+                )
+                session.expire_time = (
+                    time() + self.config.upload.resumable_session_timeout
+                )
+                if not completed:
+                    return self._create_upload_session_response(400, session)
+
+            if session.offset < session.total_length:
+                return self._create_upload_session_response(202, session)
+
+            # the resource may be locked while uploading
+            locked, precondition_failed = await self._check_request_ifs_with_res_paths(
+                request_ifs=request.lock_ifs, res_paths=[request.src_path]
+            )
+            if precondition_failed:
+                return DAVResponse(412)
+            if locked:
+                return DAVResponse(423)
+
+            http_status = await self._commit_upload_session(request, session)
+            self.upload_sessions.pop(key, None)
+            return DAVResponse(http_status)
+
+    async def _create_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int | None:
+        """prepare session.staged_data, return http status if failed"""
+        raise NotImplementedError  # pragma: no cover
+
+    async def _append_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession, content_length: int
+    ) -> bool:
+        """append request body(at most content_length bytes) to staged data,
+        update session.offset; return False if body is incomplete
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    async def _commit_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int:
+        """move staged data to resource, return http status"""
+        raise NotImplementedError  # pragma: no cover
+
+    async def _remove_upload_session(self, session: DAVUploadSession) -> None:
+        raise NotImplementedError  # pragma: no cover
+
     """
     https://tools.ietf.org/html/rfc4918#page-51
     9.8.  COPY Method
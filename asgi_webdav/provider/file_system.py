@@ -1,114 +1,93 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import os
 import shutil
+import sqlite3
+import sys
+import threading
+import zlib
+from collections.abc import Callable
+from dataclasses import replace
 from logging import getLogger
 from pathlib import Path
 from stat import S_ISDIR
-from typing import Any
+from time import time
+from typing import Any, BinaryIO
+from uuid import uuid4
 
 import aiofiles
 import aiofiles.os
 import aiofiles.ospath
 from asgiref.typing import HTTPRequestEvent
 
+if sys.version_info >= (3, 14):
+    from compression import zstd
+else:
+    from backports import zstd  # type: ignore # pragma: no cover
+
 from asgi_webdav.constants import (
+    DEFAULT_COMPRESSION_CONTENT_MINIMUM_LENGTH,
+    DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_HITS,
+    DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_TRACK_SIZE,
     RESPONSE_DATA_BLOCK_SIZE,
+    DAVCompressLevel,
     DAVDepth,
+    DAVETagType,
     DAVPath,
-    DAVPropertyIdentity,
-    DAVPropertyPatchEntry,
+    DAVPropertyStoreType,
     DAVResponseBodyGenerator,
     DAVResponseContentRange,
+    DAVSenderName,
     DAVTime,
 )
-from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
-from asgi_webdav.helpers import detect_charset, generate_etag, guess_type
+from asgi_webdav.exceptions import (
+    DAVCodingError,
+    DAVExceptionProviderInitFailed,
+    DAVExceptionUploadAborted,
+)
+from asgi_webdav.helpers import (
+    detect_charset,
+    generate_etag,
+    generate_strong_etag,
+    guess_type,
+)
 from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
 from asgi_webdav.provider.common import (
     DAVProvider,
     DAVProviderFeature,
+    DAVUploadSession,
     get_response_content_range,
 )
+from asgi_webdav.provider.property_store import (
+    DAV_EXTENSION_INFO_FILE_EXTENSION,
+    DAV_PROPERTY_STORE_SQLITE_FILE_NAME,
+    DAVPropertyStoreAbc,
+    DAVPropertyStoreSidecar,
+    DAVPropertyStoreSQLite,
+    DAVPropertyStoreXattr,
+    _copy_xattr,
+    _parser_content_etag_from_json,
+    _parser_property_from_json,
+)
 from asgi_webdav.request import DAVRequest
+from asgi_webdav.response import DAVResponse, parse_accept_encoding
 
 logger = getLogger(__name__)
 
-DAV_EXTENSION_INFO_FILE_EXTENSION = "WebDAV"
-"""dav extension info file format: JSON
-{
-    'property': [
-        [[namespace, key], value],
-    ]
-}
+DAV_UPLOAD_TEMP_FILE_EXTENSION = "WebDAV-upload"
+"""PUT writes to .{name}.{uuid}.WebDAV-upload, then renames it to {name}"""
+DAV_DEDUPLICATION_STORE_DIR_NAME = ".WebDAV-store"
+"""content-addressed store: {root}/.WebDAV-store/{sha256[:2]}/{sha256}
+- every file with the same content is a hard link of the blob
+- the blob's st_nlink is the reference count, st_nlink == 1 means unreferenced
+"""
+DAV_PRECOMPRESSED_DIR_NAME = ".WebDAV-precompressed"
+"""generated precompressed files: {root}/.WebDAV-precompressed/{path}{.zst|.gz}
+- the user's foo.txt.gz next to foo.txt is never written or removed
+- the generated file has the same mtime as its source, it's outdated if they differ
 """
-
-
-def _parser_property_from_json(data: dict[str, Any]) -> dict[DAVPropertyIdentity, str]:
-    try:
-        if not isinstance(data, dict):
-            raise ValueError
-
-        props = data.get("property")
-        if not isinstance(props, list):
-            raise ValueError
-
-    except ValueError:
-        return dict()
-
-    return {tuple(k): v for k, v in props}
-
-
-async def _load_extra_property(file: Path) -> dict[DAVPropertyIdentity, str]:
-    async with aiofiles.open(file, "r") as fp:
-        tmp = await fp.read()
-        try:
-            data = json.loads(tmp)
-
-        except json.JSONDecodeError as e:
-            logger.warning(f"load extra property failed: {e}")
-            return dict()
-
-    return _parser_property_from_json(data)
-
-
-async def _update_extra_property(
-    file: Path, property_patches: list[DAVPropertyPatchEntry]
-) -> bool:
-    if not await aiofiles.ospath.exists(file):
-        file.touch()  # TODO: aiofiles
-
-    async with aiofiles.open(file, "r+") as fp:
-        tmp = await fp.read()
-        if len(tmp) == 0:
-            data = dict()
-
-        else:
-            try:
-                data = json.loads(tmp)
-
-            except json.JSONDecodeError as e:
-                logger.critical(f"update extra property failed: {e}")
-                return False
-
-            data = _parser_property_from_json(data)
-
-        for sn_key, value, is_set_method in property_patches:
-            if is_set_method:
-                # set/update
-                data[sn_key] = value
-            else:
-                # remove
-                data.pop(sn_key, None)
-
-        data = {"property": [tuple((tuple(k), v)) for k, v in data.items()]}
-        tmp = json.dumps(data)
-        await fp.seek(0)
-        await fp.write(tmp)
-        await fp.truncate()
-
-    return True
 
 
 async def _dav_response_body_generator(
@@ -149,17 +128,357 @@ async def _dav_response_body_generator(
                 yield body, more_body
 
 
+# precompressed file: foo.txt => foo.txt.zst, foo.txt.gz; by preference
+_PRECOMPRESSED_FILE_SUFFIXES = (
+    (DAVSenderName.ZSTD, ".zst"),
+    (DAVSenderName.GZIP, ".gz"),
+)
+
+
+def _generate_precompressed_file(
+    fs_path: Path,
+    precompressed_path: Path,
+    sender_name: DAVSenderName,
+    level: DAVCompressLevel,
+) -> None:
+    """blocking, run in thread"""
+    compressor: Any
+    match sender_name, level:
+        case DAVSenderName.ZSTD, DAVCompressLevel.FAST:
+            compressor = zstd.ZstdCompressor(level=1)
+        case DAVSenderName.ZSTD, DAVCompressLevel.BEST:
+            compressor = zstd.ZstdCompressor(level=19)
+        case DAVSenderName.ZSTD, _:
+            compressor = zstd.ZstdCompressor(level=zstd.COMPRESSION_LEVEL_DEFAULT)
+        case DAVSenderName.GZIP, DAVCompressLevel.FAST:
+            compressor = zlib.compressobj(1, zlib.DEFLATED, 31)
+        case DAVSenderName.GZIP, DAVCompressLevel.BEST:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        case DAVSenderName.GZIP, _:
+            compressor = zlib.compressobj(4, zlib.DEFLATED, 31)
+        case _:
+            raise DAVCodingError(f"unsupported precompressed type: {sender_name}")
+
+    precompressed_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = precompressed_path.with_name(f".{precompressed_path.name}.tmp")
+    try:
+        with open(fs_path, "rb") as src, open(tmp_path, "wb") as dst:
+            stat_result = os.fstat(src.fileno())
+            while data := src.read(RESPONSE_DATA_BLOCK_SIZE):
+                dst.write(compressor.compress(data))
+
+            dst.write(compressor.flush())
+
+        new_stat_result = os.stat(fs_path)
+        if (
+            new_stat_result.st_mtime_ns != stat_result.st_mtime_ns
+            or new_stat_result.st_size != stat_result.st_size
+            or new_stat_result.st_ino != stat_result.st_ino
+        ):
+            # file has been modified while compressing
+            return
+
+        # the mark of the source's version
+        os.utime(tmp_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+        # atomic, a reader never sees a half written file
+        os.replace(tmp_path, precompressed_path)
+
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _remove_precompressed_files(precompressed_path: Path) -> None:
+    """blocking, run in thread; precompressed_path: the mirror of a file or a dir
+    in the precompressed dir"""
+    shutil.rmtree(precompressed_path, ignore_errors=True)
+    for _, suffix in _PRECOMPRESSED_FILE_SUFFIXES:
+        try:
+            precompressed_path.with_name(f"{precompressed_path.name}{suffix}").unlink()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            pass
+
+
+def _move_precompressed_files(src_path: Path, dst_path: Path) -> None:
+    """blocking, run in thread; MOVE keeps the mtime, the generated files are
+    still valid"""
+    _remove_precompressed_files(dst_path)
+    for suffix in ("", *(suffix for _, suffix in _PRECOMPRESSED_FILE_SUFFIXES)):
+        src = src_path.with_name(f"{src_path.name}{suffix}")
+        if not os.path.lexists(src):
+            continue
+
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(src, dst_path.with_name(f"{dst_path.name}{suffix}"))
+
+
+def _get_upload_temp_path(fs_path: Path) -> Path:
+    return fs_path.with_name(
+        f".{fs_path.name}.{uuid4().hex}.{DAV_UPLOAD_TEMP_FILE_EXTENSION}"
+    )
+
+
+def _open_upload_temp_file(tmp_path: Path, preallocate_size: int | None) -> BinaryIO:
+    """blocking, run in thread"""
+    f = open(tmp_path, "xb")
+    if preallocate_size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, preallocate_size)
+        except OSError:
+            pass  # eg: not supported by the filesystem
+
+    return f
+
+
+def _commit_upload_temp_file(
+    f: BinaryIO,
+    tmp_path: Path,
+    fs_path: Path,
+    fsync: bool,
+    blob_path: Path | None = None,
+) -> None:
+    """blocking, run in thread"""
+    f.truncate(f.tell())  # drop the preallocated space which is not used
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+    f.close()
+
+    if blob_path is None:
+        try:
+            shutil.copymode(fs_path, tmp_path)  # keep the old file's mode
+        except FileNotFoundError:
+            pass
+        else:
+            # and the dead properties in the xattr property store
+            _copy_xattr(fs_path, tmp_path)
+
+    else:
+        # the inode is shared, don't change the mode
+        try:
+            min_mtime_ns: int | None = os.stat(fs_path).st_mtime_ns
+        except FileNotFoundError:
+            min_mtime_ns = None
+
+        tmp_path = _link_deduplication_blob(tmp_path, blob_path, min_mtime_ns)
+
+    # atomic, a reader never sees a half written file
+    try:
+        os.replace(tmp_path, fs_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if fsync:
+        dir_fd = os.open(fs_path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _abort_upload_temp_file(f: BinaryIO, tmp_path: Path) -> None:
+    """blocking, run in thread"""
+    f.close()
+    tmp_path.unlink(missing_ok=True)
+
+
+def _get_deduplication_blob_path(store_path: Path, content_hash: str) -> Path:
+    return store_path.joinpath(content_hash[:2], content_hash)
+
+
+def _link_deduplication_blob(
+    tmp_path: Path, blob_path: Path, min_mtime_ns: int | None = None
+) -> Path:
+    """blocking, run in thread; return the path which will be renamed to the target
+    - new content: the temp file becomes the blob
+    - known content: a hard link of the blob, the temp file is removed
+    - the filesystem does not support hard link: the temp file, not deduplicated
+    - the blob is older than min_mtime_ns: the temp file, not deduplicated;
+        the shared inode's mtime can't be changed for one file
+    """
+    try:
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.link(tmp_path, blob_path)
+        return tmp_path
+
+    except FileExistsError:
+        pass
+
+    except OSError as e:
+        # eg: EXDEV, EPERM
+        logger.warning(f"store blob failed: {blob_path}, {e}")
+        return tmp_path
+
+    linked_path = tmp_path.with_name(f".{uuid4().hex}.{DAV_UPLOAD_TEMP_FILE_EXTENSION}")
+    try:
+        blob_stat_result = os.stat(blob_path)
+        if blob_stat_result.st_size != os.stat(tmp_path).st_size:
+            logger.warning(f"blob is damaged: {blob_path}")
+            return tmp_path
+
+        if min_mtime_ns is not None and blob_stat_result.st_mtime_ns < min_mtime_ns:
+            # Last-Modified of the target must not go back
+            return tmp_path
+
+        os.link(blob_path, linked_path)
+
+    except OSError as e:
+        # eg: blob was purged just now, EMLINK
+        logger.debug(f"link blob failed: {blob_path}, {e}")
+        return tmp_path
+
+    tmp_path.unlink()
+    return linked_path
+
+
+def _link_or_copy_file(src: str | Path, dst: str | Path) -> None:
+    """blocking, run in thread; COPY costs no extra disk or I/O"""
+    src_path, dst_path = Path(src), Path(dst)
+    if src_path.name.endswith(f".{DAV_EXTENSION_INFO_FILE_EXTENSION}"):
+        # property file is updated in place, can't be shared
+        shutil.copy2(src_path, dst_path)
+        return
+
+    linked_path = _get_upload_temp_path(dst_path)
+    try:
+        os.link(src_path, linked_path)
+    except OSError:
+        shutil.copy2(src_path, dst_path)
+        return
+
+    try:
+        os.replace(linked_path, dst_path)
+    except BaseException:
+        linked_path.unlink(missing_ok=True)
+        raise
+
+
+def _purge_upload_temp_files(
+    root_path: Path, reserved_dir_names: tuple[str, ...], timeout: int
+) -> int:
+    """blocking, run in thread; remove the temp/staged files which are left by the
+    last run, eg: killed while PUT, upload session expired while stopped;
+    return the count"""
+    count = 0
+    expire_time = time() - timeout
+    suffix = f".{DAV_UPLOAD_TEMP_FILE_EXTENSION}"
+    for dir_path, dir_names, file_names in os.walk(root_path):
+        if dir_path == str(root_path):
+            dir_names[:] = [
+                name for name in dir_names if name not in reserved_dir_names
+            ]
+
+        for file_name in file_names:
+            if not file_name.startswith(".") or not file_name.endswith(suffix):
+                continue
+
+            file_path = os.path.join(dir_path, file_name)
+            try:
+                # a staged file is touched by every chunk, see resumable upload
+                if os.stat(file_path).st_mtime > expire_time:
+                    continue
+
+                os.unlink(file_path)
+                count += 1
+
+            except FileNotFoundError:
+                pass
+
+    return count
+
+
+def _purge_deduplication_store(store_path: Path) -> int:
+    """blocking, run in thread; remove unreferenced blobs, return the count"""
+    count = 0
+    for dir_entry in os.scandir(store_path):
+        if not dir_entry.is_dir(follow_symlinks=False):
+            continue
+
+        for blob_entry in os.scandir(dir_entry.path):
+            try:
+                if blob_entry.stat(follow_symlinks=False).st_nlink > 1:
+                    continue
+
+                os.unlink(blob_entry.path)
+                count += 1
+
+            except FileNotFoundError:
+                pass
+
+    return count
+
+
+def _get_upload_session_path(fs_path: Path, username: str, total_length: int) -> Path:
+    """same user and same total length, same staged file; resumable after restart"""
+    digest = hashlib.sha256(f"{username}/{total_length}".encode()).hexdigest()[:16]
+    return fs_path.with_name(
+        f".{fs_path.name}.{digest}.{DAV_UPLOAD_TEMP_FILE_EXTENSION}"
+    )
+
+
+def _prepare_upload_session_file(
+    staged_path: Path, total_length: int, timeout: int
+) -> int:
+    """blocking, run in thread; return the uploaded offset"""
+    try:
+        stat_result = os.stat(staged_path)
+        if (
+            stat_result.st_mtime + timeout > time()
+            and stat_result.st_size <= total_length
+        ):
+            return stat_result.st_size
+
+    except FileNotFoundError:
+        pass
+
+    with open(staged_path, "wb"):
+        pass
+
+    return 0
+
+
+def _open_upload_session_file(staged_path: Path, offset: int) -> BinaryIO:
+    """blocking, run in thread"""
+    f = open(staged_path, "r+b")
+    f.seek(offset)
+    f.truncate()  # drop the data after offset, eg: from an overflowed chunk
+    return f
+
+
+def _get_file_sha256(path: Path) -> str:
+    """blocking, run in thread"""
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(RESPONSE_DATA_BLOCK_SIZE):
+            content_hash.update(data)
+
+    return content_hash.hexdigest()
+
+
 class FileSystemProvider(DAVProvider):
     type = "fs"
     feature = DAVProviderFeature(
         content_range=True,
         home_dir=True,
+        resumable_upload=True,
     )
 
     def __init__(self, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
         self.root_path = Path(self.uri[7:])
 
+        # precompressed file generator
+        self.precompressed_path = self.root_path.joinpath(DAV_PRECOMPRESSED_DIR_NAME)
+        self._precompressed_hits: dict[Path, int] = dict()
+        self._precompressed_tasks: dict[Path, asyncio.Task[None]] = dict()
+
+        # deduplication
+        self.deduplication_store_path = self.root_path.joinpath(
+            DAV_DEDUPLICATION_STORE_DIR_NAME
+        )
+        self._deduplication_purge_task: asyncio.Task[None] | None = None
+        self._deduplication_purge_again = False
+
         if not self.root_path.exists():
             raise DAVExceptionProviderInitFailed(
                 'Init FileSystemProvider failed, "{}" is not exists.'.format(
@@ -167,33 +486,167 @@ class FileSystemProvider(DAVProvider):
                 )
             )
 
+        self.property_store: DAVPropertyStoreAbc
+        match self.property_store_type:
+            case DAVPropertyStoreType.SQLITE:
+                try:
+                    self.property_store = DAVPropertyStoreSQLite(self.root_path)
+                except sqlite3.Error as e:
+                    raise DAVExceptionProviderInitFailed(
+                        f"Init SQLite property store failed, {e}"
+                    )
+            case DAVPropertyStoreType.XATTR:
+                self.property_store = DAVPropertyStoreXattr(self.root_path)
+            case _:
+                self.property_store = DAVPropertyStoreSidecar()
+
+        self.enable_deduplication = self.config.upload.enable_deduplication
+        if (
+            self.enable_deduplication
+            and self.property_store_type == DAVPropertyStoreType.XATTR
+        ):
+            # hard linked files share the xattr
+            logger.warning(
+                f"deduplication is disabled, it does not work with xattr property store: {self.root_path}"
+            )
+            self.enable_deduplication = False
+
+        # startup, in background; the tree may be large, walk it only if the
+        #   staged files of resumable upload may be there
+        self._upload_temp_files_purge_thread: threading.Thread | None = None
+        if self.config.upload.enable_resumable:
+            self._upload_temp_files_purge_thread = threading.Thread(
+                target=self._purge_upload_temp_files, daemon=True
+            )
+            self._upload_temp_files_purge_thread.start()
+
+    def _purge_upload_temp_files(self) -> None:
+        try:
+            count = _purge_upload_temp_files(
+                self.root_path,
+                (DAV_DEDUPLICATION_STORE_DIR_NAME, DAV_PRECOMPRESSED_DIR_NAME),
+                self.config.upload.resumable_session_timeout,
+            )
+        except OSError as e:
+            logger.warning(f"purge upload temp files failed: {self.root_path}, {e}")
+            return
+
+        if count:
+            logger.info(f"purge upload temp files: {self.root_path}, {count}")
+
     def __repr__(self) -> str:
         if self.home_dir:
             return f"file://{self.root_path}/{{user name}}"
         else:
             return f"file://{self.root_path}"
 
+    async def close(self) -> None:
+        await self.property_store.close()
+
     def _get_fs_path(self, path: DAVPath, username: str | None) -> Path:
         if self.home_dir and username:
             return self.root_path.joinpath(username, *path.parts)
 
         return self.root_path.joinpath(*path.parts)
 
+    def _is_reserved_fs_path(self, fs_path: Path) -> bool:
+        """the deduplication store, generated precompressed files and property
+        database can't be modified by request"""
+        if fs_path.parent == self.root_path and fs_path.name.startswith(
+            DAV_PROPERTY_STORE_SQLITE_FILE_NAME
+        ):
+            return True
+
+        return fs_path.is_relative_to(
+            self.deduplication_store_path
+        ) or fs_path.is_relative_to(self.precompressed_path)
+
+    def _get_precompressed_path(self, fs_path: Path, suffix: str = "") -> Path:
+        """the generated file of fs_path, or the mirror of a dir without suffix"""
+        return self.precompressed_path.joinpath(
+            fs_path.relative_to(self.root_path)
+        ).with_name(f"{fs_path.name}{suffix}")
+
+    def _get_deduplication_blob_path(self, content_hash: str) -> Path:
+        return _get_deduplication_blob_path(self.deduplication_store_path, content_hash)
+
+    async def _is_deduplicated(self, fs_path: Path) -> bool:
+        """the path may hold blob references, check it before remove or overwrite"""
+        if not self.enable_deduplication:
+            return False
+
+        try:
+            stat_result = await aiofiles.os.stat(fs_path)
+        except FileNotFoundError:
+            return False
+
+        return S_ISDIR(stat_result.st_mode) or stat_result.st_nlink > 1
+
+    def _purge_deduplication_store_later(self) -> None:
+        if self._deduplication_purge_task is not None:
+            # running, purge again after it's done
+            self._deduplication_purge_again = True
+            return
+
+        task = asyncio.create_task(self._purge_deduplication_store())
+        self._deduplication_purge_task = task
+
+        def done_callback(_: asyncio.Task[None]) -> None:
+            self._deduplication_purge_task = None
+
+        task.add_done_callback(done_callback)
+
+    async def _purge_deduplication_store(self) -> None:
+        more = True
+        while more:
+            self._deduplication_purge_again = False
+            try:
+                count = await asyncio.to_thread(
+                    _purge_deduplication_store, self.deduplication_store_path
+                )
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                logger.warning(f"purge deduplication store failed: {e}")
+                return
+
+            if count:
+                logger.debug(f"purge deduplication store, remove {count} blob(s)")
+
+            more = self._deduplication_purge_again
+
     async def _get_res_etag(self, request: DAVRequest) -> str:
-        fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
-        stat_result = await aiofiles.os.stat(fs_path)
-        return generate_etag(stat_result.st_size, stat_result.st_mtime)
+        return await self._get_res_etag_from_res_dist_path(
+            request.dist_src_path, request.user.username
+        )
 
     async def _get_res_etag_from_res_dist_path(
         self, res_dist_path: DAVPath, username: str | None = None
     ) -> str:
         fs_path = self._get_fs_path(res_dist_path, username)
         stat_result = await aiofiles.os.stat(fs_path)
-        return generate_etag(stat_result.st_size, stat_result.st_mtime)
+        return await self._get_fs_etag(fs_path, stat_result)
 
-    @staticmethod
-    def _get_fs_properties_path(path: Path) -> Path:
-        return path.parent.joinpath(f"{path.name}.{DAV_EXTENSION_INFO_FILE_EXTENSION}")
+    async def _get_fs_etag(
+        self,
+        fs_path: Path,
+        stat_result: os.stat_result,
+        extension_info: dict[str, Any] | None = None,
+    ) -> str:
+        if self.config.etag_type == DAVETagType.CONTENT and not S_ISDIR(
+            stat_result.st_mode
+        ):
+            if extension_info is None:
+                extension_info = await self.property_store.get(fs_path)
+
+            if extension_info:
+                etag = _parser_content_etag_from_json(extension_info, stat_result)
+                if etag is not None:
+                    return etag
+
+        return generate_etag(
+            stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+        )
 
     async def _create_dav_property_obj(
         self,
@@ -201,8 +654,19 @@ class FileSystemProvider(DAVProvider):
         href_path: DAVPath,
         fs_path: Path,
         stat_result: os.stat_result,
+        extension_info: dict[str, Any] | None = None,
     ) -> DAVProperty:
         is_collection = S_ISDIR(stat_result.st_mode)
+        fetch_extra = self._is_fetch_property_extra(request)
+
+        # extension info, for extra property and content etag
+        if extension_info is None and (
+            fetch_extra
+            or (self.config.etag_type == DAVETagType.CONTENT and not is_collection)
+        ):
+            extension_info = await self.property_store.get(fs_path)
+
+        etag = await self._get_fs_etag(fs_path, stat_result, extension_info or dict())
 
         # basic
         if is_collection:
@@ -211,6 +675,7 @@ class FileSystemProvider(DAVProvider):
                 display_name=href_path.name,
                 creation_date=DAVTime(stat_result.st_ctime),
                 last_modified=DAVTime(stat_result.st_mtime),
+                etag=etag,
             )
 
         else:
@@ -231,6 +696,7 @@ class FileSystemProvider(DAVProvider):
                 content_charset=charset,
                 content_length=stat_result.st_size,
                 content_encoding=content_encoding,
+                etag=etag,
             )
 
         dav_property = DAVProperty(
@@ -238,12 +704,11 @@ class FileSystemProvider(DAVProvider):
         )
 
         # extra
-        if self.ignore_property_extra or request.propfind_only_fetch_basic:
+        if not fetch_extra:
             return dav_property
 
-        properties_path = self._get_fs_properties_path(fs_path)
-        if await aiofiles.ospath.exists(properties_path):
-            extra_data = await _load_extra_property(properties_path)
+        if extension_info:
+            extra_data = _parser_property_from_json(extension_info)
             dav_property.extra_data = extra_data
 
             s = set(request.propfind_extra_keys) - set(extra_data.keys())
@@ -251,6 +716,9 @@ class FileSystemProvider(DAVProvider):
 
         return dav_property
 
+    def _is_fetch_property_extra(self, request: DAVRequest) -> bool:
+        return not (self.ignore_property_extra or request.propfind_only_fetch_basic)
+
     async def _get_dav_property_d0(
         self, request: DAVRequest, href_path: DAVPath, fs_path: Path
     ) -> DAVProperty:
@@ -271,17 +739,47 @@ class FileSystemProvider(DAVProvider):
     ) -> None:
         sub_dir_names: list[str] = list()
         dav_extension_info_file_extension = f".{DAV_EXTENSION_INFO_FILE_EXTENSION}"
+        dav_upload_temp_file_extension = f".{DAV_UPLOAD_TEMP_FILE_EXTENSION}"
+        # the reserved names are only in the root, see _is_reserved_fs_path()
+        is_root = fs_path_base == self.root_path
+
+        # one batched lookup for the whole dir
+        children_extension_info = None
+        if (
+            self._is_fetch_property_extra(request)
+            or self.config.etag_type == DAVETagType.CONTENT
+        ):
+            children_extension_info = await self.property_store.get_children(
+                fs_path_base
+            )
 
         dir_entry_iter = await aiofiles.os.scandir(fs_path_base)
         for dir_entry in dir_entry_iter:
             if dir_entry.name.endswith(dav_extension_info_file_extension):
                 # Found a WebDAV DAV info file
                 continue
+            if dir_entry.name.endswith(dav_upload_temp_file_extension):
+                # Found an uploading file
+                continue
+            if is_root and (
+                dir_entry.name
+                in (DAV_DEDUPLICATION_STORE_DIR_NAME, DAV_PRECOMPRESSED_DIR_NAME)
+                or dir_entry.name.startswith(DAV_PROPERTY_STORE_SQLITE_FILE_NAME)
+            ):
+                continue
 
             href_path = href_path_base.add_child(dir_entry.name)
             fs_path = fs_path_base.joinpath(dir_entry.name)
             dav_properties[href_path] = await self._create_dav_property_obj(
-                request, href_path, fs_path, dir_entry.stat()
+                request,
+                href_path,
+                fs_path,
+                dir_entry.stat(),
+                (
+                    None
+                    if children_extension_info is None
+                    else children_extension_info.get(dir_entry.name, dict())
+                ),
             )
 
             if dir_entry.is_dir() and infinity:
@@ -333,12 +831,13 @@ class FileSystemProvider(DAVProvider):
             return 207
 
         fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
-        properties_path = self._get_fs_properties_path(fs_path)
+        if self._is_reserved_fs_path(fs_path):
+            return 403
         if not await aiofiles.ospath.exists(fs_path):
             return 404
 
-        success = await _update_extra_property(
-            properties_path, request.proppatch_entries
+        success = await self.property_store.update_property(
+            fs_path, request.proppatch_entries
         )
         if success:
             return 207
@@ -347,6 +846,8 @@ class FileSystemProvider(DAVProvider):
 
     async def _do_mkcol(self, request: DAVRequest) -> int:
         fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
+        if self._is_reserved_fs_path(fs_path):
+            return 403
 
         try:
             await aiofiles.os.mkdir(fs_path)
@@ -380,41 +881,45 @@ class FileSystemProvider(DAVProvider):
             return 200, dav_property.basic_data, None, None
 
         # target is file ---
+        fs_path, basic_data = await self._match_precompressed_file(
+            request, fs_path, dav_property.basic_data, generate=True
+        )
+
         if len(request.ranges) == 0:
             # --- without range,response the entire file
             return (
                 200,
-                dav_property.basic_data,
+                basic_data,
                 _dav_response_body_generator(fs_path),
                 None,
             )
 
         response_content_range = get_response_content_range(
             request_ranges=request.ranges,
-            file_size=dav_property.basic_data.content_length,
+            file_size=basic_data.content_length,
         )
         if response_content_range is None:
             # can't get correct content range
             # TODO: logging
             return (
                 200,
-                dav_property.basic_data,
+                basic_data,
                 _dav_response_body_generator(fs_path),
                 None,
             )
 
         if request.if_range and not request.if_range.match(
-            etag=dav_property.basic_data.etag,
-            last_modified=dav_property.basic_data.last_modified.http_date,
+            etag=basic_data.etag,
+            last_modified=basic_data.last_modified.http_date,
         ):
             # IfRange is not match
             # TODO: other soultion: return 200 with full file, control by config
-            return (416, dav_property.basic_data, None, response_content_range)
+            return (416, basic_data, None, response_content_range)
 
         # --- response file in range
         return (
             206,
-            dav_property.basic_data,
+            basic_data,
             _dav_response_body_generator(fs_path, content_range=response_content_range),
             response_content_range,
         )
@@ -429,27 +934,201 @@ class FileSystemProvider(DAVProvider):
         dav_property = await self._get_dav_property_d0(
             request, request.src_path, fs_path
         )
-        return 200, dav_property.basic_data
+        if dav_property.is_collection:
+            return 200, dav_property.basic_data
+
+        _, basic_data = await self._match_precompressed_file(
+            request, fs_path, dav_property.basic_data, generate=False
+        )
+        return 200, basic_data
+
+    def _get_precompressed_accepted(
+        self, request: DAVRequest
+    ) -> list[tuple[DAVSenderName, str]]:
+        compression = self.config.compression
+        if not compression.enable or not compression.enable_precompressed:
+            return []
+
+        q_values = dict(parse_accept_encoding(request.accept_encoding))
+        q_value_default = q_values.get("*", 0.0)
+        accepted = list()
+        for sender_name, suffix in self._get_precompressed_file_suffixes():
+            q_value = q_values.get(sender_name.name.lower(), q_value_default)
+            if q_value > 0:
+                accepted.append((q_value, sender_name, suffix))
+
+        accepted.sort(key=lambda item: item[0], reverse=True)  # stable
+        return [(sender_name, suffix) for _, sender_name, suffix in accepted]
+
+    def _get_precompressed_file_suffixes(self) -> list[tuple[DAVSenderName, str]]:
+        enabled = {
+            DAVSenderName.ZSTD: self.config.compression.enable_zstd,
+            DAVSenderName.GZIP: self.config.compression.enable_gzip,
+        }
+        return [
+            (sender_name, suffix)
+            for sender_name, suffix in _PRECOMPRESSED_FILE_SUFFIXES
+            if enabled[sender_name]
+        ]
+
+    async def _match_precompressed_file(
+        self,
+        request: DAVRequest,
+        fs_path: Path,
+        basic_data: DAVPropertyBasicData,
+        generate: bool,
+    ) -> tuple[Path, DAVPropertyBasicData]:
+        """return precompressed file and it's basic data, if it exists and is newer"""
+        accepted = self._get_precompressed_accepted(request)
+        if not accepted:
+            return fs_path, basic_data
+
+        source_mtime = basic_data.last_modified.timestamp
+        for sender_name, suffix in accepted:
+            # the user's file first, then the generated file
+            candidates = [(fs_path.with_name(f"{fs_path.name}{suffix}"), False)]
+            if self.config.compression.enable_precompressed_generator:
+                candidates.append((self._get_precompressed_path(fs_path, suffix), True))
+
+            for precompressed_path, generated in candidates:
+                try:
+                    stat_result = await aiofiles.os.stat(precompressed_path)
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+
+                if (
+                    stat_result.st_mtime != source_mtime
+                    if generated
+                    else stat_result.st_mtime < source_mtime
+                ):
+                    # outdated
+                    continue
+
+                return precompressed_path, replace(
+                    basic_data,
+                    content_length=stat_result.st_size,
+                    response_content_encoding=sender_name.value,  # type: ignore # py3.11+ EnumStr
+                    etag=generate_etag(
+                        stat_result.st_size,
+                        stat_result.st_mtime_ns,
+                        stat_result.st_ino,
+                    ),
+                )
+
+        if generate:
+            self._precompressed_file_generator(fs_path, basic_data)
+
+        return fs_path, basic_data
+
+    def _precompressed_file_generator(
+        self, fs_path: Path, basic_data: DAVPropertyBasicData
+    ) -> None:
+        """generate precompressed files in background for hot text file"""
+        compression = self.config.compression
+        if not (
+            compression.enable_precompressed
+            and compression.enable_precompressed_generator
+        ):
+            # the generated files are served by enable_precompressed only
+            return
+
+        if basic_data.content_encoding:
+            # already encoded, eg: app.css.gz
+            return
+
+        if basic_data.content_length < DEFAULT_COMPRESSION_CONTENT_MINIMUM_LENGTH:
+            return
+
+        if not DAVResponse._can_be_compressed(
+            basic_data.content_type, compression.content_type_user_rule
+        ):
+            return
+
+        if fs_path in self._precompressed_tasks:
+            return
+
+        hits = self._precompressed_hits.get(fs_path, 0) + 1
+        if hits < DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_HITS:
+            if len(self._precompressed_hits) >= (
+                DEFAULT_COMPRESSION_PRECOMPRESSED_HOT_TRACK_SIZE
+            ):
+                self._precompressed_hits.clear()
+
+            self._precompressed_hits[fs_path] = hits
+            return
+
+        self._precompressed_hits.pop(fs_path, None)
+        task = asyncio.create_task(self._generate_precompressed_files(fs_path))
+        self._precompressed_tasks[fs_path] = task
+        task.add_done_callback(lambda _: self._precompressed_tasks.pop(fs_path, None))
+
+    async def _generate_precompressed_files(self, fs_path: Path) -> None:
+        for sender_name, suffix in self._get_precompressed_file_suffixes():
+            try:
+                await asyncio.to_thread(
+                    _generate_precompressed_file,
+                    fs_path,
+                    self._get_precompressed_path(fs_path, suffix),
+                    sender_name,
+                    self.config.compression.level,
+                )
+            except OSError as e:
+                logger.warning(f"generate precompressed file failed: {fs_path}, {e}")
+                return
+
+            logger.debug(f"generate precompressed file: {fs_path}{suffix}")
+
+    async def _remove_precompressed_files(self, fs_path: Path) -> None:
+        """the source file or dir is changed or removed, remove the generated files
+        - COPY keeps the mtime, it can't tell the generated file is outdated
+        """
+        self._precompressed_hits.pop(fs_path, None)
+        if not self.config.compression.enable_precompressed_generator:
+            return
+
+        await asyncio.to_thread(
+            _remove_precompressed_files, self._get_precompressed_path(fs_path)
+        )
+
+    async def _move_precompressed_files(
+        self, src_fs_path: Path, dst_fs_path: Path
+    ) -> None:
+        self._precompressed_hits.pop(src_fs_path, None)
+        self._precompressed_hits.pop(dst_fs_path, None)
+        if not self.config.compression.enable_precompressed_generator:
+            return
+
+        try:
+            await asyncio.to_thread(
+                _move_precompressed_files,
+                self._get_precompressed_path(src_fs_path),
+                self._get_precompressed_path(dst_fs_path),
+            )
+        except OSError as e:
+            logger.warning(f"move precompressed files failed: {src_fs_path}, {e}")
+            await self._remove_precompressed_files(src_fs_path)
+            await self._remove_precompressed_files(dst_fs_path)
 
     async def _fs_delete(self, path: DAVPath, username: str | None) -> int:
         fs_path = self._get_fs_path(path, username)
-        properties_path = self._get_fs_properties_path(fs_path)
+        if self._is_reserved_fs_path(fs_path):
+            return 403
         if not await aiofiles.ospath.exists(fs_path):
             return 404
 
+        deduplicated = await self._is_deduplicated(fs_path)
+
         if await aiofiles.ospath.isdir(fs_path):
             shutil.rmtree(fs_path)  # TODO aiofile
-            try:
-                await aiofiles.os.remove(properties_path)
-            except FileNotFoundError:
-                pass
-
         else:
             await aiofiles.os.remove(fs_path)
-            try:
-                await aiofiles.os.remove(properties_path)
-            except FileNotFoundError:
-                pass
+
+        await self._remove_precompressed_files(fs_path)
+
+        await self.property_store.remove(fs_path)
+
+        if deduplicated:
+            self._purge_deduplication_store_later()
 
         return 204
 
@@ -458,27 +1137,222 @@ class FileSystemProvider(DAVProvider):
 
     async def _do_put(self, request: DAVRequest) -> int:
         fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
+        if self._is_reserved_fs_path(fs_path):
+            return 403
         if await aiofiles.ospath.exists(fs_path):
             if await aiofiles.ospath.isdir(fs_path):
                 return 405
         if not await aiofiles.ospath.isdir(fs_path.parent):
             return 409
 
+        upload = self.config.upload
+        content_hash = None
+        if self.config.etag_type == DAVETagType.CONTENT or self.enable_deduplication:
+            # hashing alongside the write
+            content_hash = hashlib.sha256()
+
+        content_length = request.content_length
+        tmp_path = _get_upload_temp_path(fs_path)
+        try:
+            f = await asyncio.to_thread(
+                _open_upload_temp_file,
+                tmp_path,
+                content_length if upload.enable_fallocate else None,
+            )
+        except PermissionError:
+            return 403
+
+        try:
+            received_length, completed = await self._receive_request_body_to_file(
+                request, f, content_hash
+            )
+            if not completed:
+                raise DAVExceptionUploadAborted("client disconnected")
+
+            if content_length is not None and received_length != content_length:
+                raise DAVExceptionUploadAborted(
+                    f"received {received_length} bytes, expected {content_length}"
+                )
+
+            blob_path = None
+            if self.enable_deduplication and content_hash is not None:
+                blob_path = self._get_deduplication_blob_path(content_hash.hexdigest())
+
+            deduplicated = await self._is_deduplicated(fs_path)
+            await asyncio.to_thread(
+                _commit_upload_temp_file,
+                f,
+                tmp_path,
+                fs_path,
+                upload.enable_fsync,
+                blob_path,
+            )
+
+        except DAVExceptionUploadAborted as e:
+            logger.warning(f"PUT {request.src_path} aborted: {e}")
+            await asyncio.to_thread(_abort_upload_temp_file, f, tmp_path)
+            return 400
+
+        except PermissionError:
+            await asyncio.to_thread(_abort_upload_temp_file, f, tmp_path)
+            return 403
+
+        except BaseException:
+            await asyncio.to_thread(_abort_upload_temp_file, f, tmp_path)
+            raise
+
+        await self._remove_precompressed_files(fs_path)
+        if deduplicated:
+            self._purge_deduplication_store_later()
+
+        if self.config.etag_type == DAVETagType.CONTENT and content_hash is not None:
+            await self.property_store.update_content_etag(
+                fs_path,
+                generate_strong_etag(content_hash.hexdigest()),
+                await aiofiles.os.stat(fs_path),
+            )
+
+        return 201
+
+    async def _receive_request_body_to_file(
+        self,
+        request: DAVRequest,
+        f: BinaryIO,
+        content_hash: hashlib._Hash | None = None,
+        max_length: int | None = None,
+    ) -> tuple[int, bool]:
+        """coalesce small ASGI chunks, one thread hop per buffer_size
+        - return: received length, completed
+        - not completed: client disconnected, or sent more than max_length
+        """
+        buffer_size = self.config.upload.buffer_size
+        buffer = bytearray()
+        received_length = 0
+        completed = True
+        more_body = True
+        while more_body:
+            request_event = await request.receive()
+            if request_event.get("type") == "http.disconnect":
+                completed = False
+                break
+
+            request_data: HTTPRequestEvent = request_event  # type: ignore
+            more_body = request_data.get("more_body", False)
+
+            data = request_data.get("body", b"")
+            if max_length is not None and received_length + len(data) > max_length:
+                data = data[: max_length - received_length]
+                completed = False
+                more_body = False
+
+            buffer += data
+            received_length += len(data)
+            if content_hash is not None:
+                content_hash.update(data)
+
+            if len(buffer) >= buffer_size:
+                await asyncio.to_thread(f.write, buffer)
+                buffer.clear()
+
+        if buffer:
+            await asyncio.to_thread(f.write, buffer)
+
+        return received_length, completed
+
+    async def _create_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int | None:
+        fs_path = self._get_fs_path(session.path, session.username)
+        if self._is_reserved_fs_path(fs_path):
+            return 403
+        if await aiofiles.ospath.isdir(fs_path):
+            return 405
+        if not await aiofiles.ospath.isdir(fs_path.parent):
+            return 409
+
+        staged_path = _get_upload_session_path(
+            fs_path, session.username, session.total_length
+        )
         try:
-            async with aiofiles.open(fs_path, "wb") as f:
-                more_body = True
-                while more_body:
-                    request_data: HTTPRequestEvent = await request.receive()  # type: ignore
-                    more_body = request_data.get("more_body")
+            session.offset = await asyncio.to_thread(
+                _prepare_upload_session_file,
+                staged_path,
+                session.total_length,
+                self.config.upload.resumable_session_timeout,
+            )
+        except PermissionError:
+            return 403
 
-                    data = request_data.get("body", b"")
-                    await f.write(data)
+        session.staged_data = staged_path
+        return None
 
+    async def _append_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession, content_length: int
+    ) -> bool:
+        f = await asyncio.to_thread(
+            _open_upload_session_file, session.staged_data, session.offset
+        )
+        try:
+            received_length, completed = await self._receive_request_body_to_file(
+                request, f, max_length=content_length
+            )
+        finally:
+            await asyncio.to_thread(f.close)
+
+        session.offset += received_length
+        return completed and received_length == content_length
+
+    async def _commit_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int:
+        fs_path = self._get_fs_path(session.path, session.username)
+        if await aiofiles.ospath.isdir(fs_path):
+            return 405
+
+        upload = self.config.upload
+        staged_path: Path = session.staged_data
+        content_hash = None
+        if self.config.etag_type == DAVETagType.CONTENT or self.enable_deduplication:
+            content_hash = await asyncio.to_thread(_get_file_sha256, staged_path)
+
+        blob_path = None
+        if self.enable_deduplication and content_hash is not None:
+            blob_path = self._get_deduplication_blob_path(content_hash)
+
+        deduplicated = await self._is_deduplicated(fs_path)
+        f = await asyncio.to_thread(open, staged_path, "ab")
+        try:
+            await asyncio.to_thread(
+                _commit_upload_temp_file,
+                f,
+                staged_path,
+                fs_path,
+                upload.enable_fsync,
+                blob_path,
+            )
         except PermissionError:
             return 403
+        finally:
+            # closed by the commit, unless it failed before that
+            await asyncio.to_thread(f.close)
+
+        await self._remove_precompressed_files(fs_path)
+        if deduplicated:
+            self._purge_deduplication_store_later()
+
+        if self.config.etag_type == DAVETagType.CONTENT and content_hash is not None:
+            await self.property_store.update_content_etag(
+                fs_path,
+                generate_strong_etag(content_hash),
+                await aiofiles.os.stat(fs_path),
+            )
 
         return 201
 
+    async def _remove_upload_session(self, session: DAVUploadSession) -> None:
+        if session.staged_data is not None:
+            await asyncio.to_thread(session.staged_data.unlink, missing_ok=True)
+
     @staticmethod
     def _copy_dir_depth0(
         src_path: Path, dst_path: Path, overwrite: bool = False
@@ -491,18 +1365,6 @@ class FileSystemProvider(DAVProvider):
 
         return True
 
-    async def _copy_property_file(self, src_path: Path, des_path: Path) -> None:
-        property_src_path = self._get_fs_properties_path(src_path)
-        if not await aiofiles.ospath.exists(property_src_path):
-            return
-
-        property_des_path = self._get_fs_properties_path(des_path)
-        if await aiofiles.ospath.exists(property_des_path):
-            await aiofiles.os.remove(property_des_path)
-
-        shutil.copy2(property_src_path, property_des_path)  # TODO: aiofiles
-        return
-
     async def _do_copy(self, request: DAVRequest) -> int:
         def success_return() -> int:
             if request.overwrite:
@@ -512,11 +1374,15 @@ class FileSystemProvider(DAVProvider):
 
         # check src_path
         src_fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
+        if self._is_reserved_fs_path(src_fs_path):
+            return 403
         if not await aiofiles.ospath.exists(src_fs_path):
             return 403
 
         # check dst_path
         dst_fs_path = self._get_fs_path(request.dist_dst_path, request.user.username)
+        if self._is_reserved_fs_path(dst_fs_path):
+            return 403
         if not await aiofiles.ospath.exists(dst_fs_path.parent):
             return 409
         if not request.overwrite and await aiofiles.ospath.exists(dst_fs_path):
@@ -525,37 +1391,42 @@ class FileSystemProvider(DAVProvider):
         # below ---
         # overwrite or not dst_fs_path.exists()
 
+        copy_function: Callable[[str | Path, str | Path], Any] = shutil.copy2
+        if self.enable_deduplication:
+            copy_function = _link_or_copy_file
+
         # copy file
         if not await aiofiles.ospath.isdir(src_fs_path):
-            shutil.copy2(src_fs_path, dst_fs_path)  # TODO aiofile
-            await self._copy_property_file(src_fs_path, dst_fs_path)
+            deduplicated = await self._is_deduplicated(dst_fs_path)
+            await asyncio.to_thread(copy_function, src_fs_path, dst_fs_path)
+            await self.property_store.copy(src_fs_path, dst_fs_path)
+            await self._remove_precompressed_files(dst_fs_path)
+            if deduplicated:
+                self._purge_deduplication_store_later()
             return success_return()
 
         # copy dir
         if request.depth != DAVDepth.ZERO:  # TODO .d1 .infinity
-            # TODO aiofile
-            shutil.copytree(src_fs_path, dst_fs_path, dirs_exist_ok=request.overwrite)
-            await self._copy_property_file(src_fs_path, dst_fs_path)
+            deduplicated = await self._is_deduplicated(dst_fs_path)
+            await self._remove_precompressed_files(dst_fs_path)
+            await asyncio.to_thread(
+                shutil.copytree,
+                src_fs_path,
+                dst_fs_path,
+                copy_function=copy_function,
+                dirs_exist_ok=request.overwrite,
+            )
+            await self.property_store.copy(src_fs_path, dst_fs_path)
+            if deduplicated:
+                self._purge_deduplication_store_later()
             return success_return()
 
         if self._copy_dir_depth0(src_fs_path, dst_fs_path, request.overwrite):
-            await self._copy_property_file(src_fs_path, dst_fs_path)
+            await self.property_store.copy(src_fs_path, dst_fs_path)
             return success_return()
 
         return 412
 
-    async def _move_property_file(self, src_path: Path, des_path: Path) -> None:
-        property_src_path = self._get_fs_properties_path(src_path)
-        if not await aiofiles.ospath.exists(property_src_path):
-            return
-
-        property_des_path = self._get_fs_properties_path(des_path)
-        if await aiofiles.ospath.exists(property_des_path):
-            await aiofiles.os.remove(property_des_path)
-
-        await aiofiles.os.rename(property_src_path, property_des_path)
-        return
-
     async def _do_move(self, request: DAVRequest) -> int:
         def success_return() -> int:
             if request.overwrite:
@@ -572,6 +1443,10 @@ class FileSystemProvider(DAVProvider):
 
         src_fs_path = self._get_fs_path(request.dist_src_path, request.user.username)
         dst_fs_path = self._get_fs_path(request.dist_dst_path, request.user.username)
+        if self._is_reserved_fs_path(src_fs_path) or self._is_reserved_fs_path(
+            dst_fs_path
+        ):
+            return 403
         src_exists = await aiofiles.ospath.exists(src_fs_path)
         # src_is_dir = await aiofiles.ospath.isdir(src_fs_path)
         dst_exists = await aiofiles.ospath.exists(dst_fs_path)
@@ -594,6 +1469,7 @@ class FileSystemProvider(DAVProvider):
         # if not overwrite and dst_exists and (src_is_dir != dst_is_dir):
         #     return 999
 
+        deduplicated = await self._is_deduplicated(dst_fs_path)
         if dst_exists:
             if dst_is_dir:
                 # It's not a MERGE
@@ -602,5 +1478,8 @@ class FileSystemProvider(DAVProvider):
                 await aiofiles.os.remove(dst_fs_path)
 
         await aiofiles.os.rename(src_fs_path, dst_fs_path)
-        await self._move_property_file(src_fs_path, dst_fs_path)
+        await self.property_store.move(src_fs_path, dst_fs_path)
+        await self._move_precompressed_files(src_fs_path, dst_fs_path)
+        if deduplicated:
+            self._purge_deduplication_store_later()
         return success_return()
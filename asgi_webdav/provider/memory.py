@@ -3,6 +3,7 @@ from __future__ import annotations
 from asyncio import Lock
 from copy import deepcopy
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
 from asgiref.typing import HTTPRequestEvent
@@ -15,12 +16,15 @@ from asgi_webdav.constants import (
     DAVResponseContentRange,
     DAVTime,
 )
+from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
 from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
 from asgi_webdav.provider.common import (
     DAVProvider,
     DAVProviderFeature,
+    DAVUploadSession,
     get_response_content_range,
 )
+from asgi_webdav.provider.memory_snapshot import MemoryFSSnapshot
 from asgi_webdav.request import DAVRequest
 from asgi_webdav.response import get_response_body_generator
 
@@ -38,12 +42,26 @@ class MemoryFSNode:
 
     children: dict[str, MemoryFSNode] = field(default_factory=dict)
 
+    # content is still in the snapshot(mmap), see MemoryFSSnapshot
+    content_view: memoryview | None = None
+
     def __post_init__(self) -> None:
         self.is_folder = not self.is_file
 
+    def get_content(self) -> bytes:
+        if self.content_view is not None:
+            # materialize it on first read
+            self.content = self.content_view.tobytes()
+            self.content_view = None
+
+        return self.content
+
     def update_content(self, content: bytes) -> None:
         self.content = content
+        self.content_view = None
+        self.property_basic_data.content_length = len(content)
         self.property_basic_data.last_modified = DAVTime()
+        self.property_basic_data.update_etag()
 
 
 class MemoryFS:
@@ -197,7 +215,7 @@ class MemoryFS:
                 self.add_node(
                     dst_node_path=dst_path,
                     dst_node_parent=dst_node_parent,
-                    content=src_node.content,
+                    content=src_node.get_content(),
                     property_basic_data=deepcopy(src_node.property_basic_data),
                     property_extra_data=deepcopy(src_node.property_extra_data),
                 )
@@ -232,7 +250,7 @@ class MemoryFS:
             self.add_node(
                 dst_node_path=dst_path,
                 dst_node_parent=dst_node_parent,
-                content=src_node.content,
+                content=src_node.get_content(),
                 property_basic_data=deepcopy(src_node.property_basic_data),
                 property_extra_data=deepcopy(src_node.property_extra_data),
             )
@@ -270,7 +288,7 @@ class MemoryFS:
                 self.add_node(
                     dst_node_path=dst_path.add_child(child_name),
                     dst_node_parent=dst_node,
-                    content=child_node.content,
+                    content=child_node.get_content(),
                     property_basic_data=deepcopy(src_node.property_basic_data),
                     property_extra_data=deepcopy(src_node.property_extra_data),
                 )
@@ -316,7 +334,7 @@ class MemoryFS:
             self.add_node(
                 dst_node_path=dst_node_path,
                 dst_node_parent=dst_node_parent,
-                content=src_node.content,
+                content=src_node.get_content(),
                 property_basic_data=src_node.property_basic_data,
                 property_extra_data=src_node.property_extra_data,
             )
@@ -357,7 +375,7 @@ class MemoryFS:
                 self.add_node(
                     dst_node_path=dst_node_path.add_child(child_name),
                     dst_node_parent=dst_node,
-                    content=child_node.content,
+                    content=child_node.get_content(),
                     property_basic_data=child_node.property_basic_data,
                     property_extra_data=child_node.property_extra_data,
                 )
@@ -372,6 +390,7 @@ class MemoryProvider(DAVProvider):
     feature = DAVProviderFeature(
         content_range=True,
         home_dir=False,
+        resumable_upload=True,
     )
 
     def __init__(self, *args: Any, **kwargs: Any):
@@ -380,9 +399,31 @@ class MemoryProvider(DAVProvider):
         self.fs = MemoryFS(self.prefix)
         self.fs_lock = Lock()
 
+        self.snapshot: MemoryFSSnapshot | None = None
+        snapshot_config = self.config.memory_snapshot
+        if snapshot_config.enable:
+            if not snapshot_config.path:
+                raise DAVExceptionProviderInitFailed(
+                    "Init MemoryProvider failed, memory_snapshot.path is empty."
+                )
+
+            self.snapshot = MemoryFSSnapshot(
+                fs=self.fs,
+                fs_lock=self.fs_lock,
+                path=Path(snapshot_config.path),
+                prefix=self.prefix,
+                interval=snapshot_config.interval,
+                enable_fsync=snapshot_config.enable_fsync,
+            )
+            self.snapshot.load()
+
     def __repr__(self) -> str:
         return "memory:///"
 
+    async def close(self) -> None:
+        if self.snapshot is not None:
+            await self.snapshot.close()
+
     async def _get_res_etag(self, request: DAVRequest) -> str:
         node = self.fs.get_node(request.dist_src_path)
         if node is None:
@@ -477,6 +518,9 @@ class MemoryProvider(DAVProvider):
                     if sn_key in node.property_extra_data:
                         node.property_extra_data.pop(sn_key)
 
+            if self.snapshot:
+                await self.snapshot.journal_props(request.dist_src_path, node)
+
             return 207  # TODO 409 ??
 
     async def _do_get(self, request: DAVRequest) -> tuple[
@@ -500,7 +544,7 @@ class MemoryProvider(DAVProvider):
                 return (
                     200,
                     node.property_basic_data,
-                    get_response_body_generator(node.content),
+                    get_response_body_generator(node.get_content()),
                     None,
                 )
 
@@ -514,7 +558,7 @@ class MemoryProvider(DAVProvider):
                 return (
                     200,
                     node.property_basic_data,
-                    get_response_body_generator(node.content),
+                    get_response_body_generator(node.get_content()),
                     None,
                 )
 
@@ -531,7 +575,7 @@ class MemoryProvider(DAVProvider):
                 206,
                 node.property_basic_data,
                 get_response_body_generator(
-                    node.content,
+                    node.get_content(),
                     response_content_range.content_start,
                     response_content_range.content_end,
                 ),
@@ -559,7 +603,10 @@ class MemoryProvider(DAVProvider):
             if self.fs.has_node(request.dist_src_path):
                 return 405
 
-            self.fs.add_node(request.dist_src_path, dst_node_parent=parent_node)
+            node = self.fs.add_node(request.dist_src_path, dst_node_parent=parent_node)
+            if self.snapshot:
+                await self.snapshot.journal_node(request.dist_src_path, node)
+
             return 201
 
     async def _do_delete(self, request: DAVRequest) -> int:
@@ -572,6 +619,9 @@ class MemoryProvider(DAVProvider):
                 return 404
 
             self.fs.del_node(node)  # TOOD: failed
+            if self.snapshot:
+                await self.snapshot.journal_delete(request.dist_src_path)
+
             return 204
 
     async def _do_put(self, request: DAVRequest) -> int:
@@ -593,14 +643,87 @@ class MemoryProvider(DAVProvider):
                 content += request_data.get("body", b"")
 
             if node is None:
-                self.fs.add_node(
+                node = self.fs.add_node(
                     request.dist_src_path, dst_node_parent=parent_node, content=content
                 )
             else:
                 node.update_content(content)
 
+            if self.snapshot:
+                await self.snapshot.journal_node(request.dist_src_path, node)
+
+            return 201
+
+    async def _create_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int | None:
+        async with self.fs_lock:
+            node = self.fs.get_node(session.path)
+            if node and node.is_folder:
+                return 405
+
+            if self.fs.get_node(session.path.parent) is None:
+                return 409
+
+        session.staged_data = bytearray()
+        return None
+
+    async def _append_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession, content_length: int
+    ) -> bool:
+        staged_data: bytearray = session.staged_data
+        received_length = 0
+        overflowed = False
+        more_body = True
+        while more_body:
+            request_event = await request.receive()
+            if request_event.get("type") == "http.disconnect":
+                return False
+
+            request_data: HTTPRequestEvent = request_event  # type: ignore
+            more_body = request_data.get("more_body", False)
+
+            data = request_data.get("body", b"")
+            if received_length + len(data) > content_length:
+                # more than Content-Range
+                data = data[: content_length - received_length]
+                overflowed = True
+                more_body = False
+
+            staged_data += data
+            received_length += len(data)
+            session.offset += len(data)
+
+        return received_length == content_length and not overflowed
+
+    async def _commit_upload_session(
+        self, request: DAVRequest, session: DAVUploadSession
+    ) -> int:
+        async with self.fs_lock:
+            node = self.fs.get_node(session.path)
+            if node and node.is_folder:
+                return 405
+
+            parent_node = self.fs.get_node(session.path.parent)
+            if parent_node is None:
+                return 409
+
+            content = bytes(session.staged_data)
+            if node is None:
+                node = self.fs.add_node(
+                    session.path, dst_node_parent=parent_node, content=content
+                )
+            else:
+                node.update_content(content)
+
+            if self.snapshot:
+                await self.snapshot.journal_node(session.path, node)
+
             return 201
 
+    async def _remove_upload_session(self, session: DAVUploadSession) -> None:
+        session.staged_data = None
+
     async def _do_copy(self, request: DAVRequest) -> int:
         def success_return() -> int:
             if request.overwrite:
@@ -627,6 +750,14 @@ class MemoryProvider(DAVProvider):
                 depth=request.depth,
                 overwrite=request.overwrite,
             ):
+                if self.snapshot:
+                    await self.snapshot.journal_copy(
+                        request.dist_src_path,
+                        request.dist_dst_path,
+                        request.depth,
+                        request.overwrite,
+                    )
+
                 return success_return()
 
             return 412
@@ -659,6 +790,13 @@ class MemoryProvider(DAVProvider):
                 dst_node_parent=dst_node_parent,
                 overwrite=request.overwrite,
             ):
+                if self.snapshot:
+                    await self.snapshot.journal_move(
+                        request.dist_src_path,
+                        request.dist_dst_path,
+                        request.overwrite,
+                    )
+
                 return success_return()
 
             raise
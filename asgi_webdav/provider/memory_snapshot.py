@@ -0,0 +1,538 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+from asyncio import Lock
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, TypeVar
+from urllib.parse import quote
+
+from asgi_webdav.constants import DAVDepth, DAVPath, DAVPropertyIdentity, DAVTime
+from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
+from asgi_webdav.property import DAVPropertyBasicData
+
+if TYPE_CHECKING:
+    from asgi_webdav.provider.memory import MemoryFS, MemoryFSNode
+
+logger = getLogger(__name__)
+
+MEMORY_SNAPSHOT_MAGIC = b"DAVMEM\x00\x01"
+"""snapshot file format:
+- header: magic(8s), generation(Q), node table length(Q)
+- node table: JSON, parent node before child node
+    [
+        [path, is_file, creation_date, last_modified, content_type, etag,
+         content_offset, content_length, [[namespace, key, value], ...]],
+    ]
+- content region: node content, content_offset is relative to region's start
+"""
+MEMORY_JOURNAL_RECORD_HEADER = struct.Struct("<IQ")
+"""journal file format, append only records:
+- header length(I), content length(Q)
+- header: JSON, {"op": "node"|"props"|"delete"|"copy"|"move", ...}
+- content: node content of "node" op
+"""
+
+_SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+_ROOT_PATH = DAVPath("/")
+
+_T = TypeVar("_T")
+
+
+def _dump_property_extra_data(
+    data: dict[DAVPropertyIdentity, str],
+) -> list[list[str]]:
+    return [[ns, key, value] for (ns, key), value in data.items()]
+
+
+def _load_property_extra_data(data: list[list[str]]) -> dict[DAVPropertyIdentity, str]:
+    return {(ns, key): value for ns, key, value in data}
+
+
+def _dump_node_header(path: DAVPath, node: MemoryFSNode) -> dict[str, Any]:
+    basic_data = node.property_basic_data
+    return {
+        "op": "node",
+        "path": path.raw,
+        "is_file": node.is_file,
+        "creation_date": basic_data.creation_date.timestamp,
+        "last_modified": basic_data.last_modified.timestamp,
+        "content_type": basic_data.content_type,
+        "etag": basic_data.etag,
+    }
+
+
+def _upsert_node(
+    fs: MemoryFS,
+    path: DAVPath,
+    is_file: bool,
+    creation_date: float,
+    last_modified: float,
+    content_type: str,
+    etag: str,
+    content: bytes | memoryview,
+    property_extra_data: dict[DAVPropertyIdentity, str] | None,
+) -> None:
+    """property_extra_data: None, keep the existing one"""
+    node = fs.get_node(path)
+    if path == _ROOT_PATH:
+        if node is not None and property_extra_data is not None:
+            node.property_extra_data = property_extra_data
+
+        return
+
+    if node is not None and node.is_file != is_file:
+        fs.del_node(node)
+        node = None
+
+    property_basic_data = DAVPropertyBasicData(
+        is_collection=not is_file,
+        display_name=path.name,
+        creation_date=DAVTime(creation_date),
+        last_modified=DAVTime(last_modified),
+        content_type=content_type,
+        content_length=len(content),
+        etag=etag,
+    )
+    if node is None:
+        parent_node = fs.get_node(path.parent)
+        if parent_node is None:
+            logger.warning(f"memory snapshot: parent of {path} not exist, skipped")
+            return
+
+        node = fs.add_node(
+            path,
+            dst_node_parent=parent_node,
+            content=b"" if is_file else None,
+            property_basic_data=property_basic_data,
+            property_extra_data=property_extra_data,
+        )
+
+    else:
+        node.property_basic_data = property_basic_data
+        if property_extra_data is not None:
+            node.property_extra_data = property_extra_data
+
+    if not is_file:
+        return
+
+    if isinstance(content, memoryview):
+        # materialize it on first read
+        node.content = b""
+        node.content_view = content
+    else:
+        node.content = content
+        node.content_view = None
+
+
+class MemoryFSSnapshot:
+    """persist a MemoryFS with snapshot and journal
+    - every mutation is appended to the journal of current generation
+    - snapshot: switch to a new journal generation under fs_lock, write the
+      nodes to {name}.snapshot in thread, then remove the older journals
+    - startup: mmap the snapshot, node content is a memoryview of it until
+      the first read; then replay the journals since snapshot's generation
+    """
+
+    def __init__(
+        self,
+        fs: MemoryFS,
+        fs_lock: Lock,
+        path: Path,
+        prefix: DAVPath,
+        interval: int,
+        enable_fsync: bool,
+    ) -> None:
+        self.fs = fs
+        self.fs_lock = fs_lock
+        self.path = path
+        self.interval = interval
+        self.enable_fsync = enable_fsync
+
+        name = quote(prefix.raw, safe="")
+        self.snapshot_path = path.joinpath(f"{name}.snapshot")
+        self._journal_name_prefix = f"{name}.journal."
+
+        self.generation = 0
+        self._journal: BinaryIO | None = None
+        self._journal_dirty = False
+        # keep the snapshot mapped, while any node's content_view refer to it
+        self._mmap: mmap.mmap | None = None
+
+        # journal records are written in order, by one thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="asgi-webdav-memory-journal"
+        )
+        self._snapshot_task: asyncio.Task[None] | None = None
+        # one snapshot is written at a time
+        self._snapshot_lock = Lock()
+
+    def _get_journal_path(self, generation: int) -> Path:
+        return self.path.joinpath(f"{self._journal_name_prefix}{generation}")
+
+    def _list_journal(self) -> list[tuple[int, Path]]:
+        result = list()
+        for journal_path in self.path.glob(f"{self._journal_name_prefix}*"):
+            generation = journal_path.name[len(self._journal_name_prefix) :]
+            if generation.isdigit():
+                result.append((int(generation), journal_path))
+
+        return sorted(result)
+
+    def load(self) -> None:
+        """restore the MemoryFS, call it before any mutation"""
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        generation = self._load_snapshot()
+        for journal_generation, journal_path in self._list_journal():
+            if journal_generation < generation:
+                # snapshot was written, but the journal wasn't removed
+                journal_path.unlink(missing_ok=True)
+                continue
+
+            if self._replay_journal(journal_path):
+                # not in the snapshot yet
+                self._journal_dirty = True
+            generation = journal_generation
+
+        # don't append to a journal, which may end with a truncated record
+        self.generation = generation + 1
+        self._journal = self._open_journal(self.generation)
+
+    def _load_snapshot(self) -> int:
+        try:
+            f = open(self.snapshot_path, "rb")
+        except FileNotFoundError:
+            return 0
+
+        with f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, generation, table_length = _SNAPSHOT_HEADER.unpack_from(mm, 0)
+        if magic != MEMORY_SNAPSHOT_MAGIC:
+            raise DAVExceptionProviderInitFailed(
+                f"Init MemoryProvider failed, {self.snapshot_path} is not a snapshot."
+            )
+
+        content_start = _SNAPSHOT_HEADER.size + table_length
+        table = json.loads(mm[_SNAPSHOT_HEADER.size : content_start])
+        view = memoryview(mm)
+        for (
+            path,
+            is_file,
+            creation_date,
+            last_modified,
+            content_type,
+            etag,
+            content_offset,
+            content_length,
+            property_extra_data,
+        ) in table:
+            content_offset += content_start
+            _upsert_node(
+                self.fs,
+                DAVPath(path),
+                is_file,
+                creation_date,
+                last_modified,
+                content_type,
+                etag,
+                view[content_offset : content_offset + content_length],
+                _load_property_extra_data(property_extra_data),
+            )
+
+        self._mmap = mm
+        logger.info(f"Load memory snapshot: {self.snapshot_path}, {len(table)} nodes")
+        return int(generation)
+
+    def _replay_journal(self, journal_path: Path) -> int:
+        """return the count of replayed records"""
+        count = 0
+        with open(journal_path, "rb") as f:
+            data = f.read()
+
+        position = 0
+        while position + MEMORY_JOURNAL_RECORD_HEADER.size <= len(data):
+            header_length, content_length = MEMORY_JOURNAL_RECORD_HEADER.unpack_from(
+                data, position
+            )
+            header_start = position + MEMORY_JOURNAL_RECORD_HEADER.size
+            content_start = header_start + header_length
+            position = content_start + content_length
+            if position > len(data):
+                break
+
+            header = json.loads(data[header_start:content_start])
+            self._replay_record(header, data[content_start:position])
+            count += 1
+
+        if position != len(data):
+            logger.warning(f"memory journal: {journal_path} is truncated, skipped")
+
+        return count
+
+    def _replay_record(self, header: dict[str, Any], content: bytes) -> None:
+        fs = self.fs
+        match header["op"]:
+            case "node":
+                _upsert_node(
+                    fs,
+                    DAVPath(header["path"]),
+                    header["is_file"],
+                    header["creation_date"],
+                    header["last_modified"],
+                    header["content_type"],
+                    header["etag"],
+                    content,
+                    None,
+                )
+
+            case "props":
+                node = fs.get_node(DAVPath(header["path"]))
+                if node is not None:
+                    node.property_extra_data = _load_property_extra_data(
+                        header["props"]
+                    )
+
+            case "delete":
+                node = fs.get_node(DAVPath(header["path"]))
+                if node is not None:
+                    fs.del_node(node)
+
+            case "copy":
+                src_node = fs.get_node(DAVPath(header["src"]))
+                dst_path = DAVPath(header["dst"])
+                dst_node_parent = fs.get_node(dst_path.parent)
+                if src_node is not None and dst_node_parent is not None:
+                    fs.copy_node(
+                        src_node=src_node,
+                        dst_path=dst_path,
+                        dst_node_parent=dst_node_parent,
+                        depth=DAVDepth(header["depth"]),
+                        overwrite=header["overwrite"],
+                    )
+
+            case "move":
+                src_path = DAVPath(header["src"])
+                src_node = fs.get_node(src_path)
+                src_node_parent = fs.get_node(src_path.parent)
+                dst_path = DAVPath(header["dst"])
+                dst_node_parent = fs.get_node(dst_path.parent)
+                if (
+                    src_node is not None
+                    and src_node_parent is not None
+                    and dst_node_parent is not None
+                ):
+                    fs.move_node(
+                        src_node=src_node,
+                        src_node_parent=src_node_parent,
+                        dst_path=dst_path,
+                        dst_node_parent=dst_node_parent,
+                        overwrite=header["overwrite"],
+                    )
+
+    # --- journal
+    def _open_journal(self, generation: int) -> BinaryIO:
+        return open(self._get_journal_path(generation), "ab")
+
+    def _append_record(
+        self, journal: BinaryIO, header: dict[str, Any], content: bytes
+    ) -> None:
+        header_data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        journal.write(MEMORY_JOURNAL_RECORD_HEADER.pack(len(header_data), len(content)))
+        journal.write(header_data)
+        journal.write(content)
+        journal.flush()
+        if self.enable_fsync:
+            os.fsync(journal.fileno())
+
+    async def _run(self, func: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    async def _append(self, header: dict[str, Any], content: bytes = b"") -> None:
+        """call it under fs_lock, after the mutation"""
+        if self._journal is None:
+            return
+
+        await self._run(self._append_record, self._journal, header, content)
+        self._journal_dirty = True
+        self._take_snapshot_later()
+
+    async def journal_node(self, path: DAVPath, node: MemoryFSNode) -> None:
+        await self._append(
+            _dump_node_header(path, node), node.get_content() if node.is_file else b""
+        )
+
+    async def journal_props(self, path: DAVPath, node: MemoryFSNode) -> None:
+        await self._append(
+            {
+                "op": "props",
+                "path": path.raw,
+                "props": _dump_property_extra_data(node.property_extra_data),
+            }
+        )
+
+    async def journal_delete(self, path: DAVPath) -> None:
+        await self._append({"op": "delete", "path": path.raw})
+
+    async def journal_copy(
+        self, src_path: DAVPath, dst_path: DAVPath, depth: DAVDepth, overwrite: bool
+    ) -> None:
+        await self._append(
+            {
+                "op": "copy",
+                "src": src_path.raw,
+                "dst": dst_path.raw,
+                "depth": depth.value,
+                "overwrite": overwrite,
+            }
+        )
+
+    async def journal_move(
+        self, src_path: DAVPath, dst_path: DAVPath, overwrite: bool
+    ) -> None:
+        await self._append(
+            {
+                "op": "move",
+                "src": src_path.raw,
+                "dst": dst_path.raw,
+                "overwrite": overwrite,
+            }
+        )
+
+    # --- snapshot
+    def _take_snapshot_later(self) -> None:
+        if self.interval <= 0 or self._snapshot_task is not None:
+            return
+
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._journal_dirty:
+                # not interrupted by close(), it waits for the snapshot
+                await asyncio.shield(self.take_snapshot())
+
+    def _capture(self) -> tuple[list[list[Any]], list[bytes | memoryview]]:
+        table: list[list[Any]] = list()
+        contents: list[bytes | memoryview] = list()
+        content_offset = 0
+        # dict keeps insertion order, parent node is always added before child
+        for path, node in self.fs.data.items():
+            content: bytes | memoryview = b""
+            if node.is_file:
+                # content is immutable, update_content() replaces it
+                if node.content_view is None:
+                    content = node.content
+                else:
+                    content = node.content_view
+                contents.append(content)
+
+            basic_data = node.property_basic_data
+            table.append(
+                [
+                    path.raw,
+                    node.is_file,
+                    basic_data.creation_date.timestamp,
+                    basic_data.last_modified.timestamp,
+                    basic_data.content_type,
+                    basic_data.etag,
+                    content_offset,
+                    len(content),
+                    _dump_property_extra_data(node.property_extra_data),
+                ]
+            )
+            content_offset += len(content)
+
+        return table, contents
+
+    def _write_snapshot(
+        self,
+        generation: int,
+        table: list[list[Any]],
+        contents: list[bytes | memoryview],
+    ) -> None:
+        table_data = json.dumps(table, separators=(",", ":")).encode("utf-8")
+        tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _SNAPSHOT_HEADER.pack(
+                    MEMORY_SNAPSHOT_MAGIC, generation, len(table_data)
+                )
+            )
+            f.write(table_data)
+            for content in contents:
+                f.write(content)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.snapshot_path)
+
+        for journal_generation, journal_path in self._list_journal():
+            if journal_generation < generation:
+                journal_path.unlink(missing_ok=True)
+
+    async def take_snapshot(self) -> None:
+        async with self._snapshot_lock:
+            await self._take_snapshot()
+
+    async def _take_snapshot(self) -> None:
+        async with self.fs_lock:
+            table, contents = self._capture()
+
+            old_journal = self._journal
+            self.generation += 1
+            generation = self.generation
+            self._journal = await self._run(self._open_journal, generation)
+            self._journal_dirty = False
+            if old_journal is not None:
+                await self._run(old_journal.close)
+
+        try:
+            await asyncio.to_thread(self._write_snapshot, generation, table, contents)
+        except OSError as e:
+            # the journals are kept, try it again later
+            self._journal_dirty = True
+            logger.warning(f"write memory snapshot failed: {e}")
+
+    async def close(self) -> None:
+        """shutdown: take the final snapshot, the next startup doesn't replay the
+        journals; then release the journal, the mmap and the thread"""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+
+        async with self._snapshot_lock:
+            if self._journal_dirty:
+                await self._take_snapshot()
+
+        async with self.fs_lock:
+            # the later mutations are not journaled
+            journal, self._journal = self._journal, None
+            if journal is not None:
+                await self._run(journal.close)
+
+        self._executor.shutdown(wait=True)
+
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # some node's content_view still refer to it, closed by GC
+                pass
+            else:
+                self._mmap = None
@@ -0,0 +1,764 @@
+from __future__ import annotations
+
+import asyncio
+import errno
+import json
+import os
+import shutil
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import Any, TypeVar
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+
+from asgi_webdav.constants import DAVPropertyIdentity, DAVPropertyPatchEntry
+
+logger = getLogger(__name__)
+
+DAV_EXTENSION_INFO_FILE_EXTENSION = "WebDAV"
+"""dav extension info file format: JSON
+{
+    'property': [
+        [[namespace, key], value],
+    ],
+    'etag': [strong etag, file size, file mtime_ns],  # for DAVETagType.CONTENT
+}
+"""
+DAV_PROPERTY_STORE_SQLITE_FILE_NAME = ".WebDAV-property.sqlite3"
+"""{root}/.WebDAV-property.sqlite3, and its -wal/-shm files"""
+DAV_PROPERTY_STORE_XATTR_NAME = "user.webdav"
+"""xattr value is in dav extension info format"""
+
+_T = TypeVar("_T")
+
+
+def _parser_property_from_json(data: dict[str, Any]) -> dict[DAVPropertyIdentity, str]:
+    try:
+        if not isinstance(data, dict):
+            raise ValueError
+
+        props = data.get("property")
+        if not isinstance(props, list):
+            raise ValueError
+
+    except ValueError:
+        return dict()
+
+    return {tuple(k): v for k, v in props}
+
+
+def _parser_content_etag_from_json(
+    data: dict[str, Any], stat_result: os.stat_result
+) -> str | None:
+    value = data.get("etag")
+    if not isinstance(value, list) or len(value) != 3:
+        return None
+
+    etag, size, mtime_ns = value
+    if size != stat_result.st_size or mtime_ns != stat_result.st_mtime_ns:
+        # file has been modified by others
+        return None
+
+    return str(etag)
+
+
+async def _load_extension_info(file: Path) -> dict[str, Any]:
+    async with aiofiles.open(file, "r") as fp:
+        tmp = await fp.read()
+        try:
+            data = json.loads(tmp)
+
+        except json.JSONDecodeError as e:
+            logger.warning(f"load extension info failed: {e}")
+            return dict()
+
+    if not isinstance(data, dict):
+        return dict()
+
+    return data
+
+
+async def _load_extra_property(file: Path) -> dict[DAVPropertyIdentity, str]:
+    return _parser_property_from_json(await _load_extension_info(file))
+
+
+async def _update_extension_info(
+    file: Path, updater: Callable[[dict[str, Any]], None]
+) -> bool:
+    if not await aiofiles.ospath.exists(file):
+        file.touch()  # TODO: aiofiles
+
+    async with aiofiles.open(file, "r+") as fp:
+        tmp = await fp.read()
+        if len(tmp) == 0:
+            data = dict()
+
+        else:
+            try:
+                data = json.loads(tmp)
+
+            except json.JSONDecodeError as e:
+                logger.critical(f"update extension info failed: {e}")
+                return False
+
+            if not isinstance(data, dict):
+                data = dict()
+
+        updater(data)
+
+        tmp = json.dumps(data)
+        await fp.seek(0)
+        await fp.write(tmp)
+        await fp.truncate()
+
+    return True
+
+
+async def _update_extra_property(
+    file: Path, property_patches: list[DAVPropertyPatchEntry]
+) -> bool:
+    def updater(data: dict[str, Any]) -> None:
+        props = _parser_property_from_json(data)
+        for sn_key, value, is_set_method in property_patches:
+            if is_set_method:
+                # set/update
+                props[sn_key] = value
+            else:
+                # remove
+                props.pop(sn_key, None)
+
+        data["property"] = [tuple((tuple(k), v)) for k, v in props.items()]
+
+    return await _update_extension_info(file, updater)
+
+
+async def _update_content_etag(
+    file: Path, etag: str, stat_result: os.stat_result
+) -> bool:
+    def updater(data: dict[str, Any]) -> None:
+        data["etag"] = [etag, stat_result.st_size, stat_result.st_mtime_ns]
+
+    return await _update_extension_info(file, updater)
+
+
+class DAVPropertyStoreAbc:  # pragma: no cover
+    """dead property and content etag of FileSystemProvider's resource
+    - the value is in dav extension info format, see DAV_EXTENSION_INFO_FILE_EXTENSION
+    - remove/copy/move are called after the resource is removed/copied/moved,
+      they include the sub resources
+    """
+
+    async def get(self, fs_path: Path) -> dict[str, Any]:
+        raise NotImplementedError
+
+    async def get_children(self, fs_path: Path) -> dict[str, dict[str, Any]]:
+        """all the children in dir; {child name: extension info}"""
+        raise NotImplementedError
+
+    async def update_property(
+        self, fs_path: Path, property_patches: list[DAVPropertyPatchEntry]
+    ) -> bool:
+        raise NotImplementedError
+
+    async def update_content_etag(
+        self, fs_path: Path, etag: str, stat_result: os.stat_result
+    ) -> bool:
+        raise NotImplementedError
+
+    async def remove(self, fs_path: Path) -> None:
+        raise NotImplementedError
+
+    async def copy(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        raise NotImplementedError
+
+    async def move(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+
+class DAVPropertyStoreSidecar(DAVPropertyStoreAbc):
+    """{name}.WebDAV JSON file next to the resource"""
+
+    @staticmethod
+    def get_sidecar_path(fs_path: Path) -> Path:
+        return fs_path.parent.joinpath(
+            f"{fs_path.name}.{DAV_EXTENSION_INFO_FILE_EXTENSION}"
+        )
+
+    async def get(self, fs_path: Path) -> dict[str, Any]:
+        sidecar_path = self.get_sidecar_path(fs_path)
+        if not await aiofiles.ospath.exists(sidecar_path):
+            return dict()
+
+        return await _load_extension_info(sidecar_path)
+
+    async def get_children(self, fs_path: Path) -> dict[str, dict[str, Any]]:
+        # one scandir, instead of exists() for every child
+        sidecar_extension = f".{DAV_EXTENSION_INFO_FILE_EXTENSION}"
+        result: dict[str, dict[str, Any]] = dict()
+        for dir_entry in await aiofiles.os.scandir(fs_path):
+            if not dir_entry.name.endswith(sidecar_extension):
+                continue
+
+            name = dir_entry.name[: -len(sidecar_extension)]
+            result[name] = await _load_extension_info(Path(dir_entry.path))
+
+        return result
+
+    async def update_property(
+        self, fs_path: Path, property_patches: list[DAVPropertyPatchEntry]
+    ) -> bool:
+        return await _update_extra_property(
+            self.get_sidecar_path(fs_path), property_patches
+        )
+
+    async def update_content_etag(
+        self, fs_path: Path, etag: str, stat_result: os.stat_result
+    ) -> bool:
+        return await _update_content_etag(
+            self.get_sidecar_path(fs_path), etag, stat_result
+        )
+
+    async def remove(self, fs_path: Path) -> None:
+        # the sub resources' sidecars are removed with the dir
+        try:
+            await aiofiles.os.remove(self.get_sidecar_path(fs_path))
+        except FileNotFoundError:
+            pass
+
+    async def copy(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        # the sub resources' sidecars are copied with the dir
+        sidecar_src_path = self.get_sidecar_path(src_fs_path)
+        if not await aiofiles.ospath.exists(sidecar_src_path):
+            return
+
+        sidecar_dst_path = self.get_sidecar_path(dst_fs_path)
+        if await aiofiles.ospath.exists(sidecar_dst_path):
+            await aiofiles.os.remove(sidecar_dst_path)
+
+        shutil.copy2(sidecar_src_path, sidecar_dst_path)  # TODO: aiofiles
+
+    async def move(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        # the sub resources' sidecars are moved with the dir
+        sidecar_src_path = self.get_sidecar_path(src_fs_path)
+        if not await aiofiles.ospath.exists(sidecar_src_path):
+            return
+
+        sidecar_dst_path = self.get_sidecar_path(dst_fs_path)
+        if await aiofiles.ospath.exists(sidecar_dst_path):
+            await aiofiles.os.remove(sidecar_dst_path)
+
+        await aiofiles.os.rename(sidecar_src_path, sidecar_dst_path)
+
+    async def close(self) -> None:
+        pass
+
+
+# the filesystem does not support user.* xattr
+_XATTR_NOT_SUPPORTED_ERRNOS = {errno.ENOTSUP, errno.EOPNOTSUPP, errno.EPERM}
+_XATTR_NO_DATA_ERRNOS = {getattr(errno, "ENODATA", errno.ENOENT), errno.ENOENT}
+
+
+def _is_xattr_supported(path: Path) -> bool:
+    """blocking; the filesystem of the path supports user.* xattr"""
+    if not hasattr(os, "getxattr"):
+        return False
+
+    try:
+        os.getxattr(path, DAV_PROPERTY_STORE_XATTR_NAME)
+    except OSError as e:
+        if e.errno in _XATTR_NOT_SUPPORTED_ERRNOS:
+            return False
+
+    return True
+
+
+def _copy_xattr(src_path: Path, dst_path: Path) -> None:
+    """blocking, run in thread; copy the user.* xattr, like shutil.copymode()"""
+    if not hasattr(os, "listxattr"):
+        return
+
+    try:
+        for name in os.listxattr(src_path):
+            if name.startswith("user."):
+                os.setxattr(dst_path, name, os.getxattr(src_path, name))
+
+    except OSError as e:
+        # eg: FileNotFoundError, the filesystem does not support xattr
+        logger.debug(f"copy xattr failed: {src_path}, {e}")
+
+
+def _get_xattr_extension_info(
+    fs_path: Path, strict: bool = False
+) -> dict[str, Any] | None:
+    """blocking, run in thread; return None if xattr is not supported
+    - strict: raise the other read errors, instead of an empty dict
+    """
+    try:
+        value = os.getxattr(fs_path, DAV_PROPERTY_STORE_XATTR_NAME)
+    except OSError as e:
+        if e.errno in _XATTR_NO_DATA_ERRNOS:
+            return dict()
+        if e.errno in _XATTR_NOT_SUPPORTED_ERRNOS:
+            return None
+        if strict:
+            raise
+
+        # eg: EACCES, EPERM; one entry must not fail the whole PROPFIND
+        logger.warning(f"load extension info from xattr failed: {fs_path}, {e}")
+        return dict()
+
+    try:
+        data = json.loads(value)
+    except ValueError as e:
+        logger.warning(f"load extension info from xattr failed: {fs_path}, {e}")
+        return dict()
+
+    if not isinstance(data, dict):
+        return dict()
+
+    return data
+
+
+def _update_xattr_extension_info(
+    fs_path: Path, updater: Callable[[dict[str, Any]], None]
+) -> bool | None:
+    """blocking, run in thread; return None if xattr is not supported"""
+    try:
+        data = _get_xattr_extension_info(fs_path, strict=True)
+    except OSError as e:
+        # the unreadable data must not be overwritten
+        logger.warning(f"load extension info from xattr failed: {fs_path}, {e}")
+        return False
+
+    if data is None:
+        return None
+
+    updater(data)
+    try:
+        os.setxattr(fs_path, DAV_PROPERTY_STORE_XATTR_NAME, json.dumps(data).encode())
+    except OSError as e:
+        if e.errno in _XATTR_NOT_SUPPORTED_ERRNOS:
+            return None
+
+        # eg: E2BIG, ENOSPC; the value is too big for the filesystem
+        logger.critical(f"update extension info to xattr failed: {fs_path}, {e}")
+        return False
+
+    return True
+
+
+class DAVPropertyStoreXattr(DAVPropertyStoreAbc):
+    """Linux user.webdav xattr on the resource itself
+    - moved with rename, copied by shutil.copy2/copytree(copystat), no extra cost
+    - one getxattr per resource, no separate open
+    - fallback to sidecar if the filesystem does not support xattr;
+      decided once by the root, the data is never split between the two
+    """
+
+    def __init__(self, root_path: Path) -> None:
+        self._fallback = DAVPropertyStoreSidecar()
+        self.supported = _is_xattr_supported(root_path)
+        if not self.supported:
+            logger.warning(
+                f"xattr is not supported by the filesystem, fallback to sidecar: {root_path}"
+            )
+
+    async def get(self, fs_path: Path) -> dict[str, Any]:
+        if not self.supported:
+            return await self._fallback.get(fs_path)
+
+        data = await asyncio.to_thread(_get_xattr_extension_info, fs_path)
+        if data is None:
+            return dict()
+
+        return data
+
+    @staticmethod
+    def _get_children(fs_path: Path) -> dict[str, dict[str, Any]]:
+        result: dict[str, dict[str, Any]] = dict()
+        with os.scandir(fs_path) as dir_entry_iter:
+            for dir_entry in dir_entry_iter:
+                data = _get_xattr_extension_info(Path(dir_entry.path))
+                if data:
+                    result[dir_entry.name] = data
+
+        return result
+
+    async def get_children(self, fs_path: Path) -> dict[str, dict[str, Any]]:
+        if not self.supported:
+            return await self._fallback.get_children(fs_path)
+
+        # one thread hop for the whole dir
+        return await asyncio.to_thread(self._get_children, fs_path)
+
+    @staticmethod
+    async def _update(fs_path: Path, updater: Callable[[dict[str, Any]], None]) -> bool:
+        result = await asyncio.to_thread(_update_xattr_extension_info, fs_path, updater)
+        if result is None:
+            # eg: a special file, or a mount point of other filesystem
+            logger.warning(f"update extension info to xattr failed: {fs_path}")
+            return False
+
+        return result
+
+    async def update_property(
+        self, fs_path: Path, property_patches: list[DAVPropertyPatchEntry]
+    ) -> bool:
+        def updater(data: dict[str, Any]) -> None:
+            props = _parser_property_from_json(data)
+            for sn_key, value, is_set_method in property_patches:
+                if is_set_method:
+                    props[sn_key] = value
+                else:
+                    props.pop(sn_key, None)
+
+            data["property"] = [[list(k), v] for k, v in props.items()]
+
+        if not self.supported:
+            return await self._fallback.update_property(fs_path, property_patches)
+
+        return await self._update(fs_path, updater)
+
+    async def update_content_etag(
+        self, fs_path: Path, etag: str, stat_result: os.stat_result
+    ) -> bool:
+        def updater(data: dict[str, Any]) -> None:
+            data["etag"] = [etag, stat_result.st_size, stat_result.st_mtime_ns]
+
+        if not self.supported:
+            return await self._fallback.update_content_etag(fs_path, etag, stat_result)
+
+        return await self._update(fs_path, updater)
+
+    # the xattr goes with the inode, only the fallback sidecar needs to be handled
+
+    async def remove(self, fs_path: Path) -> None:
+        if not self.supported:
+            await self._fallback.remove(fs_path)
+
+    async def copy(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        if not self.supported:
+            await self._fallback.copy(src_fs_path, dst_fs_path)
+
+    async def move(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        if not self.supported:
+            await self._fallback.move(src_fs_path, dst_fs_path)
+
+    async def close(self) -> None:
+        pass
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS property (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (parent, name, namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS etag (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (parent, name)
+) WITHOUT ROWID;
+"""
+_SQLITE_TABLES = ("property", "etag")
+
+
+class DAVPropertyStoreSQLite(DAVPropertyStoreAbc):
+    """one indexed SQLite database per provider root
+    - a resource is keyed by (parent, name), eg: /a/b.txt => ("/a", "b.txt"),
+      the root dir is ("", "")
+    - children of a dir: WHERE parent = ?, one query
+    - sub resources of /a: parent = "/a" OR "/a/" <= parent < "/a0",
+      move them with one UPDATE
+    - all queries run in a single worker thread, in order
+    """
+
+    def __init__(self, root_path: Path) -> None:
+        self.root_path = root_path
+        self.db_path = root_path.joinpath(DAV_PROPERTY_STORE_SQLITE_FILE_NAME)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="asgi-webdav-property"
+        )
+        self._connection = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SQLITE_SCHEMA)
+        return connection
+
+    async def _run(self, func: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    def _get_key(self, fs_path: Path) -> tuple[str, str]:
+        parts = fs_path.relative_to(self.root_path).parts
+        if len(parts) == 0:
+            return "", ""
+
+        return "/" + "/".join(parts[:-1]), parts[-1]
+
+    @staticmethod
+    def _get_sub_parent_range(parent: str, name: str) -> tuple[str, str, str]:
+        """(path, path + '/', path + '0'); '0' is the next char of '/'"""
+        path = f"{parent.rstrip('/')}/{name}"
+        return path, f"{path}/", f"{path}0"
+
+    @staticmethod
+    def _create_extension_info(
+        props: list[tuple[str, str, str]], etag: tuple[str, int, int] | None
+    ) -> dict[str, Any]:
+        data: dict[str, Any] = dict()
+        if props:
+            data["property"] = [[[ns, key], value] for ns, key, value in props]
+        if etag is not None:
+            data["etag"] = list(etag)
+
+        return data
+
+    def _get(self, parent: str, name: str) -> dict[str, Any]:
+        props = self._connection.execute(
+            "SELECT namespace, key, value FROM property"
+            " WHERE parent = ? AND name = ?",
+            (parent, name),
+        ).fetchall()
+        etag = self._connection.execute(
+            "SELECT etag, size, mtime_ns FROM etag WHERE parent = ? AND name = ?",
+            (parent, name),
+        ).fetchone()
+
+        return self._create_extension_info(props, etag)
+
+    async def get(self, fs_path: Path) -> dict[str, Any]:
+        return await self._run(self._get, *self._get_key(fs_path))
+
+    def _get_children(self, parent: str) -> dict[str, dict[str, Any]]:
+        props: dict[str, list[tuple[str, str, str]]] = dict()
+        for name, ns, key, value in self._connection.execute(
+            "SELECT name, namespace, key, value FROM property WHERE parent = ?",
+            (parent,),
+        ):
+            props.setdefault(name, list()).append((ns, key, value))
+
+        etags: dict[str, tuple[str, int, int]] = dict()
+        for name, etag, size, mtime_ns in self._connection.execute(
+            "SELECT name, etag, size, mtime_ns FROM etag WHERE parent = ?",
+            (parent,),
+        ):
+            etags[name] = (etag, size, mtime_ns)
+
+        return {
+            name: self._create_extension_info(props.get(name, []), etags.get(name))
+            for name in props.keys() | etags.keys()
+        }
+
+    async def get_children(self, fs_path: Path) -> dict[str, dict[str, Any]]:
+        path, _, _ = self._get_sub_parent_range(*self._get_key(fs_path))
+        return await self._run(self._get_children, path)
+
+    def _update_property(
+        self, parent: str, name: str, property_patches: list[DAVPropertyPatchEntry]
+    ) -> bool:
+        try:
+            with self._connection:  # one transaction
+                self._connection.execute("BEGIN")
+                for (ns, key), value, is_set_method in property_patches:
+                    if is_set_method:
+                        self._connection.execute(
+                            "INSERT OR REPLACE INTO property"
+                            " (parent, name, namespace, key, value)"
+                            " VALUES (?, ?, ?, ?, ?)",
+                            (parent, name, ns, key, value),
+                        )
+                    else:
+                        self._connection.execute(
+                            "DELETE FROM property WHERE parent = ? AND name = ?"
+                            " AND namespace = ? AND key = ?",
+                            (parent, name, ns, key),
+                        )
+
+        except sqlite3.Error as e:
+            logger.critical(f"update property failed: {e}")
+            return False
+
+        return True
+
+    async def update_property(
+        self, fs_path: Path, property_patches: list[DAVPropertyPatchEntry]
+    ) -> bool:
+        return await self._run(
+            self._update_property, *self._get_key(fs_path), property_patches
+        )
+
+    def _update_content_etag(
+        self, parent: str, name: str, etag: str, size: int, mtime_ns: int
+    ) -> bool:
+        try:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO etag (parent, name, etag, size, mtime_ns)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (parent, name, etag, size, mtime_ns),
+            )
+
+        except sqlite3.Error as e:
+            logger.critical(f"update content etag failed: {e}")
+            return False
+
+        return True
+
+    async def update_content_etag(
+        self, fs_path: Path, etag: str, stat_result: os.stat_result
+    ) -> bool:
+        return await self._run(
+            self._update_content_etag,
+            *self._get_key(fs_path),
+            etag,
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+        )
+
+    def _remove(self, parent: str, name: str) -> None:
+        path, sub_start, sub_end = self._get_sub_parent_range(parent, name)
+        for table in _SQLITE_TABLES:
+            self._connection.execute(
+                f"DELETE FROM {table} WHERE (parent = ? AND name = ?)"
+                " OR parent = ? OR (parent >= ? AND parent < ?)",
+                (parent, name, path, sub_start, sub_end),
+            )
+
+    async def remove(self, fs_path: Path) -> None:
+        def remove() -> None:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._remove(*self._get_key(fs_path))
+
+        await self._run(remove)
+
+    def _copy_or_move(self, src_fs_path: Path, dst_fs_path: Path, move: bool) -> None:
+        src_parent, src_name = self._get_key(src_fs_path)
+        dst_parent, dst_name = self._get_key(dst_fs_path)
+        src_path, sub_start, sub_end = self._get_sub_parent_range(src_parent, src_name)
+        dst_path, _, _ = self._get_sub_parent_range(dst_parent, dst_name)
+
+        with self._connection:  # one transaction
+            self._connection.execute("BEGIN")
+            self._remove(dst_parent, dst_name)
+
+            for table in _SQLITE_TABLES:
+                columns = [
+                    row[1]
+                    for row in self._connection.execute(f"PRAGMA table_info({table})")
+                    if row[1] not in {"parent", "name"}
+                ]
+                columns_str = ", ".join(columns)
+
+                # the resource itself
+                # the sub resources, replace the prefix of parent
+                select_sqls = (
+                    (
+                        f"SELECT ?, ?, {columns_str} FROM {table}"
+                        " WHERE parent = ? AND name = ?",
+                        (dst_parent, dst_name, src_parent, src_name),
+                    ),
+                    (
+                        f"SELECT ? || substr(parent, ?), name, {columns_str}"
+                        f" FROM {table} WHERE parent = ? OR (parent >= ? AND parent < ?)",
+                        (dst_path, len(src_path) + 1, src_path, sub_start, sub_end),
+                    ),
+                )
+                for select_sql, parameters in select_sqls:
+                    self._connection.execute(
+                        f"INSERT INTO {table} (parent, name, {columns_str})"
+                        f" {select_sql}",
+                        parameters,
+                    )
+
+            if move:
+                self._remove(src_parent, src_name)
+
+    async def copy(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        await self._run(self._copy_or_move, src_fs_path, dst_fs_path, False)
+
+    async def move(self, src_fs_path: Path, dst_fs_path: Path) -> None:
+        await self._run(self._copy_or_move, src_fs_path, dst_fs_path, True)
+
+    async def close(self) -> None:
+        await self._run(self._connection.close)
+        self._executor.shutdown()
+
+
+def migrate_sidecar_to_sqlite(root_path: Path, remove_sidecar: bool = False) -> int:
+    """blocking; import all .WebDAV sidecar files under root_path to the SQLite
+    database, return the count of migrated resources
+    """
+    sidecar_extension = f".{DAV_EXTENSION_INFO_FILE_EXTENSION}"
+    store = DAVPropertyStoreSQLite(root_path)
+
+    def migrate() -> int:
+        migrated_paths: list[Path] = list()
+        connection = store._connection
+        with connection:
+            connection.execute("BEGIN")
+            for dir_path, _, file_names in os.walk(root_path):
+                for file_name in file_names:
+                    if not file_name.endswith(sidecar_extension):
+                        continue
+
+                    sidecar_path = Path(dir_path, file_name)
+                    try:
+                        data = json.loads(sidecar_path.read_text())
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"skip sidecar: {sidecar_path}, {e}")
+                        continue
+                    if not isinstance(data, dict):
+                        continue
+
+                    parent, name = store._get_key(
+                        sidecar_path.with_name(file_name[: -len(sidecar_extension)])
+                    )
+                    for (ns, key), value in _parser_property_from_json(data).items():
+                        connection.execute(
+                            "INSERT OR REPLACE INTO property"
+                            " (parent, name, namespace, key, value)"
+                            " VALUES (?, ?, ?, ?, ?)",
+                            (parent, name, ns, key, value),
+                        )
+                    etag = data.get("etag")
+                    if isinstance(etag, list) and len(etag) == 3:
+                        connection.execute(
+                            "INSERT OR REPLACE INTO etag"
+                            " (parent, name, etag, size, mtime_ns)"
+                            " VALUES (?, ?, ?, ?, ?)",
+                            (parent, name, *etag),
+                        )
+
+                    migrated_paths.append(sidecar_path)
+
+        if remove_sidecar:
+            for sidecar_path in migrated_paths:
+                sidecar_path.unlink(missing_ok=True)
+
+        connection.close()
+        return len(migrated_paths)
+
+    try:
+        return store._executor.submit(migrate).result()
+    finally:
+        store._executor.shutdown()
@@ -0,0 +1,1037 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+from collections.abc import AsyncGenerator, Container, Coroutine
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from time import monotonic
+from typing import Any
+from urllib.parse import quote
+
+import xmltodict
+from asgiref.typing import HTTPRequestEvent
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+from asgi_webdav.config import S3
+from asgi_webdav.constants import (
+    DEFAULT_S3_METADATA_MAX_ENTRIES,
+    DAVDepth,
+    DAVPath,
+    DAVRangeType,
+    DAVResponseBodyGenerator,
+    DAVResponseContentRange,
+    DAVTime,
+)
+from asgi_webdav.exceptions import (
+    DAVExceptionProviderInitFailed,
+    DAVExceptionUploadAborted,
+)
+from asgi_webdav.helpers import get_xml_from_dict, guess_type
+from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
+from asgi_webdav.provider.common import (
+    DAVProvider,
+    DAVProviderFeature,
+    get_response_content_range,
+)
+from asgi_webdav.request import DAVRequest
+
+logger = getLogger(__name__)
+
+S3_PROVIDER_URI_PREFIX = "s3://"
+
+# S3 requires it, except the last part
+S3_MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+# S3 accepts 10000 parts at most
+S3_MULTIPART_MAX_PARTS = 10000
+# DeleteObjects accepts 1000 keys at most
+S3_DELETE_OBJECTS_MAX_KEYS = 1000
+# CopyObject supports 5 GiB at most, the larger one is copied by UploadPartCopy
+S3_COPY_OBJECT_MAX_SIZE = 5 * 1024 * 1024 * 1024
+
+_UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+@dataclass(slots=True)
+class S3ObjectStatus:
+    is_collection: bool
+    size: int = 0
+    last_modified: float = 0.0  # timestamp
+    etag: str = ""
+
+
+def sign_v4(
+    method: str,
+    host: str,
+    path: str,
+    query: str,
+    headers: dict[str, str],
+    payload_hash: str,
+    amz_date: str,
+    region: str,
+    access_key_id: str,
+    secret_access_key: str,
+) -> str:
+    """AWS Signature Version 4, -> the value of the header Authorization
+    https://docs.aws.amazon.com/AmazonS3/latest/API/sig-v4-header-based-auth.html
+
+    path and query must be encoded already, the same as the request line
+    """
+    signed_headers = {k.lower(): v.strip() for k, v in headers.items()}
+    signed_headers["host"] = host
+    signed_header_names = ";".join(sorted(signed_headers))
+    canonical_request = "\n".join(
+        [
+            method,
+            path,
+            query,
+            "".join(f"{k}:{signed_headers[k]}\n" for k in sorted(signed_headers)),
+            signed_header_names,
+            payload_hash,
+        ]
+    )
+
+    date = amz_date[:8]
+    scope = f"{date}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ]
+    )
+
+    key = f"AWS4{secret_access_key}".encode()
+    for data in (date, region, "s3", "aws4_request"):
+        key = hmac.new(key, data.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    return (
+        f"AWS4-HMAC-SHA256 Credential={access_key_id}/{scope}, "
+        f"SignedHeaders={signed_header_names}, Signature={signature}"
+    )
+
+
+class S3Provider(DAVProvider):
+    """
+    s3://{bucket}/{key prefix}
+
+    A collection is a common prefix of the keys, MKCOL creates an empty
+    object "{key}/" as its marker.
+    """
+
+    type = "s3"
+    feature = DAVProviderFeature(
+        content_range=True,
+        home_dir=True,
+    )
+
+    def __init__(self, *args: Any, s3: S3 | None = None, **kwargs: Any) -> None:
+        if httpx is None:
+            raise DAVExceptionProviderInitFailed(
+                "httpx is required for S3Provider, please check your installation"
+            )
+
+        super().__init__(*args, **kwargs)
+        bucket, _, key_prefix = self.uri.removeprefix(S3_PROVIDER_URI_PREFIX).partition(
+            "/"
+        )
+        if not bucket:
+            raise DAVExceptionProviderInitFailed(
+                f"Init S3Provider failed, bucket is required: {self.uri}"
+            )
+
+        self.bucket = bucket
+        self.key_prefix = key_prefix.strip("/")
+        self._root_key_parts_count = (
+            len(self._get_key(DAVPath("/"), "-").split("/"))
+            if self.key_prefix or self.home_dir
+            else 0
+        )
+
+        self.s3_config = S3() if s3 is None else s3
+        s3_config = self.s3_config
+        self.endpoint_url = s3_config.endpoint_url.rstrip("/")
+        self.host = httpx.URL(self.endpoint_url).netloc.decode()
+        self.region = s3_config.region
+        self.access_key_id = s3_config.access_key_id
+        self.secret_access_key = s3_config.secret_access_key
+        self.client = self._create_client()
+
+        self.multipart_part_size = max(
+            s3_config.multipart_part_size, S3_MULTIPART_MIN_PART_SIZE
+        )
+        self.multipart_concurrency = max(s3_config.multipart_concurrency, 1)
+        self.list_max_keys = s3_config.list_max_keys
+        self.copy_object_max_size = S3_COPY_OBJECT_MAX_SIZE
+        # CopyObject/DeleteObjects in flight, shared by all COPY/MOVE requests
+        self._copy_semaphore = asyncio.Semaphore(max(s3_config.copy_concurrency, 1))
+
+        # dict[key, (expire time, object status)]
+        #   object status is None, if the key does not exist
+        self.metadata_ttl = s3_config.metadata_ttl
+        self._object_status_cache: dict[str, tuple[float, S3ObjectStatus | None]] = (
+            dict()
+        )
+        # bumped by every invalidation, a result fetched before it is not cached
+        self._object_status_generation = 0
+
+    def _create_client(self) -> httpx.AsyncClient:
+        s3_config = self.s3_config
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=s3_config.max_connections,
+                max_keepalive_connections=s3_config.max_keepalive_connections,
+                keepalive_expiry=s3_config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=s3_config.connect_timeout,
+                read=s3_config.read_timeout,
+                write=s3_config.write_timeout,
+                pool=s3_config.pool_timeout,
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return self.uri
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def _get_key(self, path: DAVPath, username: str | None) -> str:
+        parts: list[str] = list()
+        if self.key_prefix:
+            parts.append(self.key_prefix)
+        if self.home_dir and username:
+            parts.append(username)
+
+        parts.extend(path.parts)
+        return "/".join(parts)
+
+    def _is_root_key(self, key: str) -> bool:
+        return (len(key.split("/")) if key else 0) == self._root_key_parts_count
+
+    def _get_url_and_headers(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[str, dict[str, str]]:
+        path = f"/{self.bucket}/{quote(key)}"
+        query = "&".join(
+            f"{quote(k, safe='')}={quote(v, safe='')}"
+            for k, v in sorted((params or dict()).items())
+        )
+
+        headers = dict() if headers is None else dict(headers)
+        headers["x-amz-date"] = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        headers["x-amz-content-sha256"] = _UNSIGNED_PAYLOAD
+        if self.access_key_id:
+            headers["authorization"] = sign_v4(
+                method=method,
+                host=self.host,
+                path=path,
+                query=query,
+                headers=headers,
+                payload_hash=_UNSIGNED_PAYLOAD,
+                amz_date=headers["x-amz-date"],
+                region=self.region,
+                access_key_id=self.access_key_id,
+                secret_access_key=self.secret_access_key,
+            )
+
+        url = f"{self.endpoint_url}{path}"
+        if query:
+            url = f"{url}?{query}"
+
+        return url, headers
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: Any = None,
+    ) -> httpx.Response:
+        url, headers = self._get_url_and_headers(method, key, params, headers)
+        response = await self.client.request(
+            method, url, headers=headers, content=content
+        )
+        response.raise_for_status()
+        return response
+
+    # metadata ---
+
+    def _set_object_status_cache(
+        self, key: str, status: S3ObjectStatus | None, generation: int
+    ) -> None:
+        if self.metadata_ttl <= 0 or generation != self._object_status_generation:
+            return
+
+        if len(self._object_status_cache) >= DEFAULT_S3_METADATA_MAX_ENTRIES:
+            now = monotonic()
+            for k in [k for k, v in self._object_status_cache.items() if v[0] <= now]:
+                self._object_status_cache.pop(k)
+            if len(self._object_status_cache) >= DEFAULT_S3_METADATA_MAX_ENTRIES:
+                self._object_status_cache.clear()
+
+        self._object_status_cache[key] = (monotonic() + self.metadata_ttl, status)
+
+    def _invalidate_object_status(self, *keys: str) -> None:
+        """the keys, their sub keys and their parents"""
+        self._object_status_generation += 1
+
+        for cached_key in list(self._object_status_cache):
+            for key in keys:
+                if (
+                    cached_key == key
+                    or cached_key.startswith(f"{key}/")
+                    or key.startswith(f"{cached_key}/")
+                ):
+                    self._object_status_cache.pop(cached_key)
+                    break
+
+    async def _get_object_status(self, key: str) -> S3ObjectStatus | None:
+        value = self._object_status_cache.get(key)
+        if value is not None and value[0] > monotonic():
+            return value[1]
+
+        generation = self._object_status_generation
+        status = await self._fetch_object_status(key)
+        self._set_object_status_cache(key, status, generation)
+        return status
+
+    async def _fetch_object_status(self, key: str) -> S3ObjectStatus | None:
+        if self._is_root_key(key):
+            # the bucket(or the key prefix, the user's home) is the root collection
+            return S3ObjectStatus(is_collection=True)
+
+        try:
+            response = await self._request("HEAD", key)
+            return S3ObjectStatus(
+                is_collection=False,
+                size=int(response.headers.get("content-length", 0)),
+                last_modified=parsedate_to_datetime(
+                    response.headers["last-modified"]
+                ).timestamp(),
+                etag=response.headers.get("etag", ""),
+            )
+
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code != 404:
+                raise
+
+        # a collection: any key under it, or its marker "{key}/"
+        async for data in self._list_objects_v2(f"{key}/", max_keys=1):
+            if data.get("KeyCount", "0") != "0":
+                return S3ObjectStatus(is_collection=True)
+
+        return None
+
+    async def _list_objects_v2(
+        self, prefix: str, delimiter: str | None = None, max_keys: int | None = None
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """ListObjectsV2, yield one page per round trip"""
+        params = {
+            "list-type": "2",
+            "prefix": prefix,
+            "max-keys": str(self.list_max_keys if max_keys is None else max_keys),
+        }
+        if delimiter is not None:
+            params["delimiter"] = delimiter
+
+        while True:
+            response = await self._request("GET", "", params=params)
+            data: dict[str, Any] = xmltodict.parse(
+                response.content,
+                force_list=("Contents", "CommonPrefixes"),
+            )["ListBucketResult"]
+            yield data
+
+            if max_keys is not None or data.get("IsTruncated") != "true":
+                return
+
+            params["continuation-token"] = data["NextContinuationToken"]
+
+    async def _list_keys(self, key: str) -> AsyncGenerator[str, None]:
+        """all keys under the collection, include the markers"""
+        async for sub_key, _ in self._list_objects(key):
+            yield sub_key
+
+    async def _list_objects(self, key: str) -> AsyncGenerator[tuple[str, int], None]:
+        """all keys and their sizes under the collection, include the markers"""
+        async for data in self._list_objects_v2(f"{key}/" if key else ""):
+            for item in data.get("Contents", list()):
+                yield item["Key"], int(item.get("Size", 0))
+
+    async def _list_children(
+        self, key: str, infinity: bool
+    ) -> AsyncGenerator[tuple[str, S3ObjectStatus], None]:
+        """-> name(relative to the key), object status"""
+        prefix = f"{key}/" if key else ""
+        generation = self._object_status_generation
+        seen_collections: set[str] = set()
+
+        def collections(name: str) -> list[str]:
+            # the parents of the name, and itself if it's a marker
+            result: list[str] = list()
+            parts = name.split("/")
+            for i in range(1, len(parts)):
+                collection = "/".join(parts[:i])
+                if collection not in seen_collections:
+                    seen_collections.add(collection)
+                    result.append(collection)
+
+            return result
+
+        async for data in self._list_objects_v2(
+            prefix, delimiter=None if infinity else "/"
+        ):
+            for item in data.get("Contents", list()):
+                name = item["Key"][len(prefix) :]
+                for collection in collections(name):
+                    yield collection, S3ObjectStatus(is_collection=True)
+
+                if name == "" or name.endswith("/"):
+                    # the marker of a collection
+                    continue
+
+                status = S3ObjectStatus(
+                    is_collection=False,
+                    size=int(item.get("Size", 0)),
+                    last_modified=datetime.fromisoformat(
+                        item["LastModified"].replace("Z", "+00:00")
+                    ).timestamp(),
+                    etag=item.get("ETag", ""),
+                )
+                self._set_object_status_cache(item["Key"], status, generation)
+                yield name, status
+
+            for item in data.get("CommonPrefixes", list()):
+                name = item["Prefix"][len(prefix) :].rstrip("/")
+                if name not in seen_collections:
+                    seen_collections.add(name)
+                    yield name, S3ObjectStatus(is_collection=True)
+
+    def _create_dav_property_obj(
+        self, request: DAVRequest, href_path: DAVPath, status: S3ObjectStatus
+    ) -> DAVProperty:
+        if status.is_collection:
+            basic_data = DAVPropertyBasicData(
+                is_collection=True,
+                display_name=href_path.name,
+                creation_date=DAVTime(status.last_modified),
+                last_modified=DAVTime(status.last_modified),
+            )
+
+        else:
+            content_type, content_encoding = guess_type(self.config, href_path.name)
+            basic_data = DAVPropertyBasicData(
+                is_collection=False,
+                display_name=href_path.name,
+                creation_date=DAVTime(status.last_modified),
+                last_modified=DAVTime(status.last_modified),
+                content_type=content_type or "",
+                content_length=status.size,
+                content_encoding=content_encoding,
+                etag=status.etag,
+            )
+
+        dav_property = DAVProperty(
+            href_path=href_path,
+            is_collection=status.is_collection,
+            basic_data=basic_data,
+        )
+        if not request.propfind_only_fetch_basic:
+            # the extra property is not stored
+            dav_property.extra_not_found = list(request.propfind_extra_keys)
+
+        return dav_property
+
+    async def _get_res_etag(self, request: DAVRequest) -> str:
+        return await self._get_res_etag_from_res_dist_path(
+            request.dist_src_path, request.user.username
+        )
+
+    async def _get_res_etag_from_res_dist_path(
+        self, res_dist_path: DAVPath, username: str | None = None
+    ) -> str:
+        status = await self._get_object_status(self._get_key(res_dist_path, username))
+        if status is None:
+            return ""
+
+        return status.etag
+
+    # method ---
+
+    async def _do_propfind(self, request: DAVRequest) -> dict[DAVPath, DAVProperty]:
+        dav_properties: dict[DAVPath, DAVProperty] = dict()
+
+        key = self._get_key(request.dist_src_path, request.user.username)
+        try:
+            status = await self._get_object_status(key)
+            if status is None:
+                return dav_properties
+
+            dav_properties[request.src_path] = self._create_dav_property_obj(
+                request, request.src_path, status
+            )
+            if request.depth == DAVDepth.ZERO or not status.is_collection:
+                return dav_properties
+
+            async for name, child_status in self._list_children(
+                key, infinity=request.depth == DAVDepth.INFINITY
+            ):
+                href_path = request.src_path.add_child(name)
+                dav_properties[href_path] = self._create_dav_property_obj(
+                    request, href_path, child_status
+                )
+
+        except httpx.HTTPStatusError:
+            logger.exception("Exception in S3 PROPFIND.")
+
+        return dav_properties
+
+    async def _do_proppatch(self, request: DAVRequest) -> int:
+        # the dead property is not supported, like WebHDFSProvider
+        key = self._get_key(request.dist_src_path, request.user.username)
+        try:
+            if await self._get_object_status(key) is None:
+                return 404
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        return 207
+
+    async def _do_mkcol(self, request: DAVRequest) -> int:
+        key = self._get_key(request.dist_src_path, request.user.username)
+        parent_key = self._get_key(request.dist_src_path.parent, request.user.username)
+        if self._is_root_key(key):
+            return 405
+
+        try:
+            parent_status, status = await asyncio.gather(
+                self._get_object_status(parent_key), self._get_object_status(key)
+            )
+            if parent_status is None or not parent_status.is_collection:
+                return 409
+            if status is not None:
+                return 405
+            if request.body_is_parsed_success and await request.receive():
+                return 415
+
+            await self._request("PUT", f"{key}/", content=b"")
+            return 201
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        finally:
+            self._invalidate_object_status(key)
+
+    async def _do_get(self, request: DAVRequest) -> tuple[
+        int,
+        DAVPropertyBasicData | None,
+        DAVResponseBodyGenerator | None,
+        DAVResponseContentRange | None,
+    ]:
+        key = self._get_key(request.dist_src_path, request.user.username)
+        try:
+            status = await self._get_object_status(key)
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code, None, None, None
+
+        if status is None:
+            return 404, None, None, None
+
+        basic_data = self._create_dav_property_obj(
+            request, request.src_path, status
+        ).basic_data
+        if status.is_collection:
+            return 200, basic_data, None, None
+
+        response_content_range = None
+        if request.ranges:
+            response_content_range = get_response_content_range(
+                request_ranges=request.ranges, file_size=status.size
+            )
+
+        if response_content_range is None:
+            return (
+                200,
+                basic_data,
+                self._dav_response_data_generator(key),
+                DAVResponseContentRange(
+                    DAVRangeType.RANGE, 0, status.size - 1, status.size
+                ),
+            )
+
+        return (
+            206,
+            basic_data,
+            self._dav_response_data_generator(
+                key,
+                response_content_range.content_start,
+                response_content_range.content_end,
+            ),
+            response_content_range,
+        )
+
+    async def _dav_response_data_generator(
+        self,
+        key: str,
+        content_range_start: int | None = None,
+        content_range_end: int | None = None,
+    ) -> DAVResponseBodyGenerator:
+        headers: dict[str, str] = dict()
+        if content_range_start is not None:
+            # ranged GET, only the requested bytes are sent by S3
+            headers["range"] = f"bytes={content_range_start}-{content_range_end}"
+
+        url, headers = self._get_url_and_headers("GET", key, headers=headers)
+        async with self.client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            previous_chunk = b""
+            async for chunk in response.aiter_bytes():
+                if not previous_chunk:
+                    previous_chunk = chunk
+                    continue
+                yield previous_chunk, True
+                previous_chunk = chunk
+
+            yield previous_chunk, False
+
+    async def _do_head(
+        self, request: DAVRequest
+    ) -> tuple[int, DAVPropertyBasicData | None]:
+        key = self._get_key(request.dist_src_path, request.user.username)
+        try:
+            status = await self._get_object_status(key)
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code, None
+
+        if status is None:
+            return 404, None
+
+        return (
+            200,
+            self._create_dav_property_obj(request, request.src_path, status).basic_data,
+        )
+
+    async def _do_delete(self, request: DAVRequest) -> int:
+        key = self._get_key(request.dist_src_path, request.user.username)
+        if self._is_root_key(key):
+            return 403
+
+        try:
+            status = await self._get_object_status(key)
+            if status is None:
+                return 404
+
+            await self._delete(key, status.is_collection)
+            return 204
+
+        except httpx.HTTPStatusError:
+            return 424
+
+        finally:
+            self._invalidate_object_status(key)
+
+    async def _delete(
+        self, key: str, is_collection: bool, keep: Container[str] = ()
+    ) -> None:
+        """keep: the keys which are written by COPY/MOVE, they replaced the old ones"""
+        if not is_collection:
+            if key not in keep:
+                await self._request("DELETE", key)
+            return
+
+        keys: list[str] = list()
+        async for sub_key in self._list_keys(key):
+            if sub_key in keep:
+                continue
+
+            keys.append(sub_key)
+            if len(keys) >= S3_DELETE_OBJECTS_MAX_KEYS:
+                await self._delete_objects(keys)
+                keys = list()
+
+        if keys:
+            await self._delete_objects(keys)
+
+    async def _delete_objects(self, keys: list[str]) -> None:
+        content = get_xml_from_dict(
+            {
+                "Delete": {
+                    "Quiet": "true",
+                    "Object": [{"Key": key} for key in keys],
+                }
+            }
+        )
+        # required by DeleteObjects
+        content_md5 = base64.b64encode(hashlib.md5(content).digest()).decode()
+        response = await self._request(
+            "POST",
+            "",
+            params={"delete": ""},
+            headers={"content-md5": content_md5},
+            content=content,
+        )
+        data = xmltodict.parse(response.content, force_list=("Error",))
+        errors = (data.get("DeleteResult") or dict()).get("Error", list())
+        if errors:
+            raise _create_s3_error(response, f"DeleteObjects failed: {errors}")
+
+    async def _do_put(self, request: DAVRequest) -> int:
+        key = self._get_key(request.dist_src_path, request.user.username)
+        parent_key = self._get_key(request.dist_src_path.parent, request.user.username)
+        if self._is_root_key(key):
+            return 405
+
+        try:
+            parent_status, status = await asyncio.gather(
+                self._get_object_status(parent_key), self._get_object_status(key)
+            )
+            if parent_status is None or not parent_status.is_collection:
+                return 409
+            if status is not None and status.is_collection:
+                return 405
+
+            content_type, _ = guess_type(self.config, key)
+            headers: dict[str, str] = dict()
+            if content_type:
+                headers["content-type"] = content_type
+
+            await self._put_object(request, key, headers)
+            if status is None:
+                return 201
+            return 204
+
+        except DAVExceptionUploadAborted as e:
+            logger.warning(f"PUT {request.src_path} aborted: {e}")
+            return 400
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        finally:
+            self._invalidate_object_status(key)
+
+    async def _put_object(
+        self, request: DAVRequest, key: str, headers: dict[str, str]
+    ) -> None:
+        parts = _iter_body_parts(request, self.multipart_part_size)
+        first_part = await anext(parts)
+        second_part = await anext(parts, None)
+        if second_part is None:
+            # a small file, one PutObject
+            await self._request("PUT", key, headers=headers, content=first_part)
+            return
+
+        async def all_parts() -> AsyncGenerator[bytes, None]:
+            yield first_part
+            yield second_part
+            async for part in parts:
+                yield part
+
+        upload_id = await self._create_multipart_upload(key, headers)
+        try:
+            etags = await self._upload_parts(key, upload_id, all_parts())
+            await self._complete_multipart_upload(key, upload_id, etags)
+
+        except BaseException:
+            await self._abort_multipart_upload(key, upload_id)
+            raise
+
+    async def _create_multipart_upload(self, key: str, headers: dict[str, str]) -> str:
+        """CreateMultipartUpload, -> upload id"""
+        response = await self._request(
+            "POST", key, params={"uploads": ""}, headers=headers
+        )
+        return str(
+            xmltodict.parse(response.content)["InitiateMultipartUploadResult"][
+                "UploadId"
+            ]
+        )
+
+    async def _complete_multipart_upload(
+        self, key: str, upload_id: str, etags: list[str]
+    ) -> None:
+        content = get_xml_from_dict(
+            {
+                "CompleteMultipartUpload": {
+                    "Part": [
+                        {"PartNumber": str(number), "ETag": etag}
+                        for number, etag in enumerate(etags, start=1)
+                    ]
+                }
+            }
+        )
+        response = await self._request(
+            "POST", key, params={"uploadId": upload_id}, content=content
+        )
+        # the error may come after 200 OK, the body is sent slowly
+        if b"<Error>" in response.content:
+            raise _create_s3_error(response, "CompleteMultipartUpload failed")
+
+    async def _abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        try:
+            await self._request("DELETE", key, params={"uploadId": upload_id})
+        except httpx.HTTPError:
+            logger.warning(f"AbortMultipartUpload failed: {key}, {upload_id}")
+
+    async def _upload_parts(
+        self, key: str, upload_id: str, parts: AsyncGenerator[bytes, None]
+    ) -> list[str]:
+        """the parts are uploaded concurrently, while the body is received
+
+        The next part is received after a slot is released, at most
+        multipart_concurrency parts are buffered.
+        """
+        semaphore = asyncio.Semaphore(self.multipart_concurrency)
+        tasks: list[asyncio.Task[str]] = list()
+
+        async def upload_part(number: int, data: bytes) -> str:
+            try:
+                response = await self._request(
+                    "PUT",
+                    key,
+                    params={"partNumber": str(number), "uploadId": upload_id},
+                    content=data,
+                )
+                return response.headers["etag"]
+
+            finally:
+                semaphore.release()
+
+        try:
+            async for data in parts:
+                await semaphore.acquire()
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        await task  # raise it
+
+                tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, data)))
+
+            return list(await asyncio.gather(*tasks))
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _precheck_copy_move(
+        self, request: DAVRequest
+    ) -> tuple[int, S3ObjectStatus | None, S3ObjectStatus | None]:
+        """-> error status(0: passed), source status, destination status"""
+        if request.dist_dst_path == request.dist_src_path:
+            return 403, None, None
+
+        username = request.user.username
+        src_key = self._get_key(request.dist_src_path, username)
+        dst_key = self._get_key(request.dist_dst_path, username)
+        if (
+            self._is_root_key(src_key)
+            or self._is_root_key(dst_key)
+            or dst_key.startswith(f"{src_key}/")
+            or src_key.startswith(f"{dst_key}/")
+        ):
+            return 403, None, None
+
+        src_status, dst_parent_status, dst_status = await asyncio.gather(
+            self._get_object_status(src_key),
+            self._get_object_status(
+                self._get_key(request.dist_dst_path.parent, username)
+            ),
+            self._get_object_status(dst_key),
+        )
+        if src_status is None:
+            return 404, None, None
+        if dst_parent_status is None or not dst_parent_status.is_collection:
+            return 409, None, None
+        if dst_status is not None and not request.overwrite:
+            return 412, None, None
+
+        return 0, src_status, dst_status
+
+    async def _copy(
+        self, src_key: str, dst_key: str, src_status: S3ObjectStatus, infinity: bool
+    ) -> set[str]:
+        """-> the written keys"""
+        if not src_status.is_collection:
+            await self._copy_object(src_key, dst_key, src_status.size)
+            return {dst_key}
+
+        await self._request("PUT", f"{dst_key}/", content=b"")
+        written_keys = {f"{dst_key}/"}
+        if not infinity:
+            return written_keys
+
+        tasks: list[Coroutine[Any, Any, None]] = list()
+        async for sub_key, size in self._list_objects(src_key):
+            if sub_key == f"{src_key}/":
+                continue
+
+            sub_dst_key = dst_key + sub_key.removeprefix(src_key)
+            tasks.append(self._copy_object(sub_key, sub_dst_key, size))
+            written_keys.add(sub_dst_key)
+
+        await asyncio.gather(*tasks)
+        return written_keys
+
+    async def _copy_object(self, src_key: str, dst_key: str, size: int) -> None:
+        """server side copy, the data does not go through the WebDAV server
+
+        CopyObject supports 5 GiB at most, the larger one is copied by parts.
+        """
+        copy_source = quote(f"/{self.bucket}/{src_key}")
+        if size > self.copy_object_max_size:
+            await self._copy_object_by_parts(copy_source, dst_key, size)
+            return
+
+        async with self._copy_semaphore:
+            response = await self._request(
+                "PUT", dst_key, headers={"x-amz-copy-source": copy_source}
+            )
+            # the error may come after 200 OK, the body is sent slowly
+            if b"<Error>" in response.content:
+                raise _create_s3_error(response, f"CopyObject failed: {src_key}")
+
+    async def _copy_object_by_parts(
+        self, copy_source: str, dst_key: str, size: int
+    ) -> None:
+        """UploadPartCopy, the parts are copied concurrently"""
+        part_size = max(self.multipart_part_size, -(-size // S3_MULTIPART_MAX_PARTS))
+
+        async def upload_part_copy(number: int, start: int) -> str:
+            end = min(start + part_size, size) - 1
+            async with self._copy_semaphore:
+                response = await self._request(
+                    "PUT",
+                    dst_key,
+                    params={"partNumber": str(number), "uploadId": upload_id},
+                    headers={
+                        "x-amz-copy-source": copy_source,
+                        "x-amz-copy-source-range": f"bytes={start}-{end}",
+                    },
+                )
+
+            # the error may come after 200 OK, the body is sent slowly
+            if b"<Error>" in response.content:
+                raise _create_s3_error(response, f"UploadPartCopy failed: {dst_key}")
+
+            return str(xmltodict.parse(response.content)["CopyPartResult"]["ETag"])
+
+        headers: dict[str, str] = dict()
+        content_type, _ = guess_type(self.config, dst_key)
+        if content_type:
+            headers["content-type"] = content_type
+
+        upload_id = await self._create_multipart_upload(dst_key, headers)
+        try:
+            etags = await asyncio.gather(
+                *[
+                    upload_part_copy(number, start)
+                    for number, start in enumerate(range(0, size, part_size), start=1)
+                ]
+            )
+            await self._complete_multipart_upload(dst_key, upload_id, list(etags))
+
+        except BaseException:
+            await self._abort_multipart_upload(dst_key, upload_id)
+            raise
+
+    async def _do_copy(self, request: DAVRequest) -> int:
+        src_key = self._get_key(request.dist_src_path, request.user.username)
+        dst_key = self._get_key(request.dist_dst_path, request.user.username)
+        try:
+            status_code, src_status, dst_status = await self._precheck_copy_move(
+                request
+            )
+            if src_status is None:
+                return status_code
+
+            written_keys = await self._copy(
+                src_key, dst_key, src_status, infinity=request.depth != DAVDepth.ZERO
+            )
+            if dst_status is not None:
+                # https://tools.ietf.org/html/rfc4918#section-9.8.4
+                #   the destination is replaced, after the copy is done
+                await self._delete(dst_key, dst_status.is_collection, written_keys)
+                return 204
+            return 201
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        finally:
+            self._invalidate_object_status(dst_key)
+
+    async def _do_move(self, request: DAVRequest) -> int:
+        # S3 has no rename, copy then delete
+        src_key = self._get_key(request.dist_src_path, request.user.username)
+        dst_key = self._get_key(request.dist_dst_path, request.user.username)
+        try:
+            status_code, src_status, dst_status = await self._precheck_copy_move(
+                request
+            )
+            if src_status is None:
+                return status_code
+
+            written_keys = await self._copy(src_key, dst_key, src_status, infinity=True)
+            if dst_status is not None:
+                await self._delete(dst_key, dst_status.is_collection, written_keys)
+            await self._delete(src_key, src_status.is_collection)
+            if dst_status is not None:
+                return 204
+            return 201
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        finally:
+            self._invalidate_object_status(src_key, dst_key)
+
+
+def _create_s3_error(response: httpx.Response, message: str) -> httpx.HTTPStatusError:
+    """S3 may report an error in the body of 200 OK"""
+    return httpx.HTTPStatusError(
+        message,
+        request=response.request,
+        response=httpx.Response(502, request=response.request),
+    )
+
+
+async def _iter_body_parts(
+    request: DAVRequest, part_size: int
+) -> AsyncGenerator[bytes, None]:
+    """yield the request body in parts of part_size, except the last one;
+    an empty body is one empty part
+    """
+    buffer = bytearray()
+    more_body = True
+    while more_body:
+        request_event = await request.receive()
+        if request_event.get("type") == "http.disconnect":
+            raise DAVExceptionUploadAborted("client disconnected")
+
+        request_data: HTTPRequestEvent = request_event  # type: ignore
+        more_body = request_data.get("more_body", False)
+        buffer += request_data.get("body", b"")
+        # keep the last bytes, the last part is never empty
+        while len(buffer) > part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+
+    yield bytes(buffer)
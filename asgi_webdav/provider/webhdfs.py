@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-import hashlib
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator
 from logging import getLogger
-from typing import TypedDict
+from time import monotonic
+from typing import Any, TypedDict
 from urllib.parse import quote, urlencode
 
 try:
@@ -14,7 +17,9 @@ except ImportError:
     httpx = None
     HTTPKerberosAuth = None
 
+from asgi_webdav.config import WebHDFS
 from asgi_webdav.constants import (
+    DEFAULT_WEBHDFS_METADATA_MAX_ENTRIES,
     DAVDepth,
     DAVPath,
     DAVPropertyIdentity,
@@ -24,7 +29,7 @@ from asgi_webdav.constants import (
     DAVTime,
 )
 from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
-from asgi_webdav.helpers import guess_type
+from asgi_webdav.helpers import generate_etag, guess_type
 from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
 from asgi_webdav.provider.common import (
     DAVProvider,
@@ -35,6 +40,10 @@ from asgi_webdav.request import DAVRequest
 
 logger = getLogger(__name__)
 
+DAV_COPY_TEMP_FILE_EXTENSION = "WebDAV-copy"
+# chunks buffered per segment of a parallel read, the rest waits on the datanode
+DAV_PARALLEL_READ_QUEUE_SIZE = 16
+
 
 class FileStatus(TypedDict):
     fileId: int
@@ -43,6 +52,45 @@ class FileStatus(TypedDict):
     type: str
 
 
+class _DelegationTokenRetryTransport:
+    """httpx transport, a request with a rejected delegation token is sent again
+    once, with a new token; eg: the token was cancelled, the namenode restarted
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, provider: WebHDFSProvider):
+        self.transport = transport
+        self.provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        if response.status_code not in (401, 403) or not isinstance(
+            request.stream, httpx.ByteStream
+        ):
+            # a streaming body can't be sent again
+            return response
+
+        token = request.url.params.get("delegation")
+        if token is None:
+            return response
+
+        new_token = await self.provider._renew_delegation_token(token)
+        if new_token is None:
+            return response
+
+        await response.aclose()
+        retry_request = httpx.Request(
+            request.method,
+            request.url.copy_set_param("delegation", new_token),
+            headers=request.headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+        return await self.transport.handle_async_request(retry_request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
 class WebHDFSProvider(DAVProvider):
     type = "webhdfs"
     feature = DAVProviderFeature(
@@ -50,7 +98,7 @@ class WebHDFSProvider(DAVProvider):
         home_dir=True,
     )
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, webhdfs: WebHDFS | None = None, **kwargs):
         if httpx is None or HTTPKerberosAuth is None:
             raise DAVExceptionProviderInitFailed(
                 "httpx and httpx_kerberos are required for WebHDFSProvider, please check your installation"
@@ -58,11 +106,91 @@ class WebHDFSProvider(DAVProvider):
 
         super().__init__(*args, **kwargs)
         self.uri = self.uri.rstrip("/")
-        self.client = httpx.AsyncClient(auth=HTTPKerberosAuth())
+        # per provider, see Provider.webhdfs
+        self.webhdfs_config = WebHDFS() if webhdfs is None else webhdfs
+
+        webhdfs_config = self.webhdfs_config
+        self.enable_delegation_token = webhdfs_config.enable_delegation_token
+        self.delegation_token_ttl = webhdfs_config.delegation_token_ttl
+        # dict[username, (expire time, token)]
+        self._delegation_tokens: dict[str, tuple[float, str]] = dict()
+        # dict[username, token], the replaced one may be still in use
+        self._previous_delegation_tokens: dict[str, str] = dict()
+        self._delegation_token_locks: dict[str, asyncio.Lock] = dict()
+        self.client = self._create_client()
+
+        # GETFILESTATUS: dict[(username, url_path), (expire time, file status)]
+        #   file status is None, if the path does not exist
+        self.metadata_ttl = webhdfs_config.metadata_ttl
+        self._file_status_cache: dict[
+            tuple[str, DAVPath], tuple[float, FileStatus | None]
+        ] = dict()
+        # the same requests in flight share one round trip
+        self._file_status_tasks: dict[
+            tuple[str, DAVPath], asyncio.Task[tuple[int, FileStatus]]
+        ] = dict()
+        # bumped by every invalidation, a result fetched before it is not cached
+        self._file_status_generation = 0
+
+        # LISTSTATUS(_BATCH) requests in flight, shared by all PROPFIND requests
+        self._list_status_semaphore = asyncio.Semaphore(
+            webhdfs_config.list_status_concurrency
+        )
+        self._list_status_batch_supported = True
+
+        # COPY: OPEN -> CREATE pipes in flight, shared by all COPY requests
+        self._copy_semaphore = asyncio.Semaphore(webhdfs_config.copy_concurrency)
+        self.copy_segment_size = webhdfs_config.copy_segment_size
+
+        # GET: a large range is read by concurrent OPEN requests
+        self.enable_parallel_read = webhdfs_config.enable_parallel_read
+        self.parallel_read_concurrency = max(
+            webhdfs_config.parallel_read_concurrency, 1
+        )
+        self.parallel_read_segment_size = webhdfs_config.parallel_read_segment_size
+
+    def _create_client(self) -> httpx.AsyncClient:
+        webhdfs_config = self.webhdfs_config
+        limits = httpx.Limits(
+            max_connections=webhdfs_config.max_connections,
+            max_keepalive_connections=webhdfs_config.max_keepalive_connections,
+            keepalive_expiry=webhdfs_config.keepalive_expiry,
+        )
+        transport = None
+        if self.enable_delegation_token:
+            transport = _DelegationTokenRetryTransport(
+                httpx.AsyncHTTPTransport(
+                    limits=limits, http2=webhdfs_config.enable_http2
+                ),
+                self,
+            )
+
+        try:
+            return httpx.AsyncClient(
+                auth=HTTPKerberosAuth(),
+                limits=limits,
+                timeout=httpx.Timeout(
+                    connect=webhdfs_config.connect_timeout,
+                    read=webhdfs_config.read_timeout,
+                    write=webhdfs_config.write_timeout,
+                    pool=webhdfs_config.pool_timeout,
+                ),
+                http2=webhdfs_config.enable_http2,
+                transport=transport,
+            )
+
+        except ImportError as e:
+            # http2 require package: h2
+            raise DAVExceptionProviderInitFailed(
+                f"Init WebHDFSProvider failed, {e}"
+            ) from e
 
     def __repr__(self):
         return self.uri
 
+    async def close(self) -> None:
+        await self.client.aclose()
+
     def _get_url_path(self, path: DAVPath, user_name: str | None) -> DAVPath:
         """Prepend the requested path with the home directory (if needed)."""
         if self.home_dir and user_name:
@@ -71,6 +199,114 @@ class WebHDFSProvider(DAVProvider):
             )
         return DAVPath(quote(str(path), safe="/"))
 
+    async def _get_delegation_token(self, username: str) -> str:
+        value = self._delegation_tokens.get(username)
+        if value is not None and value[0] > monotonic():
+            return value[1]
+
+        lock = self._delegation_token_locks.setdefault(username, asyncio.Lock())
+        async with lock:
+            value = self._delegation_tokens.get(username)
+            if value is not None and value[0] > monotonic():
+                # fetched by another request
+                return value[1]
+
+            # authenticated by Kerberos, once
+            response = await self.client.get(
+                self.uri
+                + "/?"
+                + urlencode({"op": "GETDELEGATIONTOKEN", "doAs": username})
+            )
+            response.raise_for_status()
+            token = response.json()["Token"]["urlString"]
+
+            if value is not None:
+                self._previous_delegation_tokens[username] = value[1]
+            self._delegation_tokens[username] = (
+                monotonic() + self.delegation_token_ttl,
+                token,
+            )
+            return token
+
+    async def _renew_delegation_token(self, token: str) -> str | None:
+        """the token is rejected by the namenode, -> a new token of its user;
+        None if the token is unknown"""
+        for username, value in list(self._delegation_tokens.items()):
+            if token not in (value[1], self._previous_delegation_tokens.get(username)):
+                continue
+
+            lock = self._delegation_token_locks.setdefault(username, asyncio.Lock())
+            async with lock:
+                value = self._delegation_tokens.get(username)
+                if value is not None and value[1] == token:
+                    # expire it, a new one is fetched below
+                    self._delegation_tokens[username] = (0, token)
+
+            # or renewed by another request already
+            return await self._get_delegation_token(username)
+
+        return None
+
+    async def _get_url(
+        self, request: DAVRequest, url_path: DAVPath, op: str, **params: Any
+    ) -> str:
+        """url_path is quoted, see _get_url_path()"""
+        query = {"op": op}
+        query.update(params)
+        if self.enable_delegation_token:
+            query["delegation"] = await self._get_delegation_token(
+                request.user.username
+            )
+        else:
+            query["doAs"] = request.user.username
+
+        return self.uri + f"{url_path}?" + urlencode(query)
+
+    async def _list_status(self, request: DAVRequest, url_path: DAVPath):
+        """Yield the file status of the children, one page per round trip.
+
+        LISTSTATUS_BATCH returns at most dfs.ls.limit entries, the next page
+        starts after the last pathSuffix until remainingEntries is 0.
+        """
+        start_after = None
+        while True:
+            if not self._list_status_batch_supported:
+                actual_url = await self._get_url(request, url_path, "LISTSTATUS")
+                async with self._list_status_semaphore:
+                    response = await self.client.get(actual_url)
+                response.raise_for_status()
+                yield response.json()["FileStatuses"]["FileStatus"]
+                return
+
+            if start_after is None:
+                actual_url = await self._get_url(request, url_path, "LISTSTATUS_BATCH")
+            else:
+                actual_url = await self._get_url(
+                    request, url_path, "LISTSTATUS_BATCH", startAfter=start_after
+                )
+            async with self._list_status_semaphore:
+                response = await self.client.get(actual_url)
+
+            if response.status_code == 400 and start_after is None:
+                # namenode(< 2.8) or httpfs(< 3.0): unsupported op
+                logger.warning(
+                    f"LISTSTATUS_BATCH is not supported by {self.uri}, fallback to LISTSTATUS"
+                )
+                self._list_status_batch_supported = False
+                continue
+
+            response.raise_for_status()
+            directory_listing = response.json()["DirectoryListing"]
+            file_statuses = directory_listing["partialListing"]["FileStatuses"][
+                "FileStatus"
+            ]
+            yield file_statuses
+
+            if directory_listing.get("remainingEntries", 0) <= 0 or not file_statuses:
+                return
+
+            start_after = file_statuses[-1]["pathSuffix"]
+
     async def _get_dav_property_d1_infinity(
         self,
         dav_properties: dict[DAVPath, DAVProperty],
@@ -79,29 +315,45 @@ class WebHDFSProvider(DAVProvider):
         infinity: bool,
         depth_limit: int = 99,
     ):
-        # TODO: Add support for infinity depth
-        if infinity:
-            raise NotImplementedError
+        sub_paths: list[DAVPath] = list()
+        try:
+            async for file_statuses in self._list_status(request, url_path):
+                for file_status in file_statuses:
+                    if file_status.get("pathSuffix", "").endswith(
+                        DAV_COPY_TEMP_FILE_EXTENSION
+                    ):
+                        # Found a segment of a copying file
+                        continue
 
-        actual_url = self.uri + f"{url_path}?op=LISTSTATUS&doAs={request.user.username}"
+                    sub_path = url_path.add_child(file_status.get("pathSuffix"))
 
-        try:
-            response = await self.client.get(actual_url)
-            response.raise_for_status()
-            data = response.json()
+                    dav_properties[sub_path] = await self._create_dav_property_obj(
+                        request, sub_path, file_status
+                    )
+
+                    if infinity and file_status.get("type") == "DIRECTORY":
+                        sub_paths.append(sub_path)
 
         except httpx.HTTPStatusError:
             logger.exception("Exception in get dav property d1 infinity.")
             return
 
-        for file_status in data["FileStatuses"]["FileStatus"]:
-            sub_path = url_path.add_child(file_status.get("pathSuffix"))
-
-            dav_properties[sub_path] = await self._create_dav_property_obj(
-                request, sub_path, file_status
-            )
+        if depth_limit <= 0:
+            return
 
-        return
+        # the sub dirs are listed concurrently, bounded by _list_status_semaphore
+        await asyncio.gather(
+            *[
+                self._get_dav_property_d1_infinity(
+                    dav_properties=dav_properties,
+                    request=request,
+                    url_path=sub_path,
+                    infinity=infinity,
+                    depth_limit=depth_limit - 1,
+                )
+                for sub_path in sub_paths
+            ]
+        )
 
     async def _get_dav_property_d0(
         self,
@@ -116,12 +368,89 @@ class WebHDFSProvider(DAVProvider):
     async def _do_filestatus(
         self, request: DAVRequest, url_path: DAVPath
     ) -> tuple[int, FileStatus]:
-        actual_url = (
-            self.uri + f"{url_path}?op=GETFILESTATUS&doAs={request.user.username}"
-        )
+        key = (request.user.username, url_path)
+        value = self._file_status_cache.get(key)
+        if value is not None and value[0] > monotonic():
+            if value[1] is None:
+                raise _create_not_found_error(url_path)
+
+            return 200, value[1]
+
+        task = self._file_status_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_filestatus(request, url_path))
+            self._file_status_tasks[key] = task
+
+            def done_callback(_: asyncio.Task[tuple[int, FileStatus]]) -> None:
+                if self._file_status_tasks.get(key) is task:
+                    self._file_status_tasks.pop(key)
+
+            task.add_done_callback(done_callback)
+
+        # a cancelled waiter does not cancel the others
+        return await asyncio.shield(task)
+
+    async def _fetch_filestatus(
+        self, request: DAVRequest, url_path: DAVPath
+    ) -> tuple[int, FileStatus]:
+        generation = self._file_status_generation
+        actual_url = await self._get_url(request, url_path, "GETFILESTATUS")
         response = await self.client.get(actual_url)
-        response.raise_for_status()
-        return response.status_code, response.json()["FileStatus"]
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code == 404:
+                self._set_file_status_cache(request, url_path, None, generation)
+            raise
+
+        file_status = response.json()["FileStatus"]
+        self._set_file_status_cache(request, url_path, file_status, generation)
+        return response.status_code, file_status
+
+    def _set_file_status_cache(
+        self,
+        request: DAVRequest,
+        url_path: DAVPath,
+        file_status: FileStatus | None,
+        generation: int,
+    ) -> None:
+        if self.metadata_ttl <= 0 or generation != self._file_status_generation:
+            return
+
+        if len(self._file_status_cache) >= DEFAULT_WEBHDFS_METADATA_MAX_ENTRIES:
+            now = monotonic()
+            for key in [k for k, v in self._file_status_cache.items() if v[0] <= now]:
+                self._file_status_cache.pop(key)
+            if len(self._file_status_cache) >= DEFAULT_WEBHDFS_METADATA_MAX_ENTRIES:
+                self._file_status_cache.clear()
+
+        self._file_status_cache[(request.user.username, url_path)] = (
+            monotonic() + self.metadata_ttl,
+            file_status,
+        )
+
+    def _invalidate_file_status(self, *url_paths: DAVPath) -> None:
+        """the paths, their sub paths and their parents, of all users"""
+        self._file_status_generation += 1
+        self._file_status_tasks.clear()
+
+        parents = {url_path.parent for url_path in url_paths}
+        for key in list(self._file_status_cache):
+            path = key[1]
+            if path in parents or any(
+                url_path.is_parent_of_or_is_self(path) for url_path in url_paths
+            ):
+                self._file_status_cache.pop(key)
+
+    async def _get_file_status_or_none(
+        self, request: DAVRequest, url_path: DAVPath
+    ) -> FileStatus | None:
+        try:
+            _, file_status = await self._do_filestatus(request, url_path)
+            return file_status
+
+        except httpx.HTTPStatusError:
+            return None
 
     async def _create_dav_property_obj(
         self,
@@ -130,6 +459,7 @@ class WebHDFSProvider(DAVProvider):
         file_status: FileStatus,
     ) -> DAVProperty:
         is_collection = file_status.get("type") == "DIRECTORY"
+        etag = self._get_etag_from_file_status(file_status)
 
         if is_collection:
             basic_data = DAVPropertyBasicData(
@@ -141,6 +471,7 @@ class WebHDFSProvider(DAVProvider):
                 last_modified=DAVTime.from_milliseconds(
                     float(file_status.get("modificationTime", 0.0))
                 ),
+                etag=etag,
             )
 
         else:
@@ -160,6 +491,7 @@ class WebHDFSProvider(DAVProvider):
                 content_charset=charset,
                 content_length=file_status.get("length", 0),
                 content_encoding=content_encoding,
+                etag=etag,
             )
 
         dav_property = DAVProperty(
@@ -229,8 +561,6 @@ class WebHDFSProvider(DAVProvider):
 
     async def _do_mkcol(self, request: DAVRequest) -> int:
         parent_exists, dir_exists, _ = await self._precheck_source(request)
-        url_path = self._get_url_path(request.dist_src_path, request.user.username)
-        actual_url = self.uri + f"{url_path}?op=MKDIRS&doAs={request.user.username}"
         if not parent_exists:
             return 409
         if dir_exists:
@@ -238,9 +568,12 @@ class WebHDFSProvider(DAVProvider):
         if request.body_is_parsed_success and await request.receive():
             return 415
 
+        url_path = self._get_url_path(request.dist_src_path, request.user.username)
         try:
+            actual_url = await self._get_url(request, url_path, "MKDIRS")
             response = await self.client.put(actual_url)
             response.raise_for_status()
+            self._invalidate_file_status(url_path)
             return 201
 
         except httpx.HTTPStatusError as error:
@@ -302,28 +635,115 @@ class WebHDFSProvider(DAVProvider):
         content_range_start: int | None = None,
         content_range_end: int | None = None,
     ) -> DAVResponseBodyGenerator:
-        actual_url = self.uri + f"{url_path}?op=OPEN&doAs={request.user.username}"
+        if (
+            self.enable_parallel_read
+            and content_range_end is not None
+            and content_range_end - (content_range_start or 0) + 1
+            > self.parallel_read_segment_size
+        ):
+            chunks = self._iter_content_parallel(
+                request, url_path, content_range_start or 0, content_range_end
+            )
+        else:
+            chunks = self._iter_content(
+                request, url_path, content_range_start, content_range_end
+            )
 
+        previous_chunk = None
+        async for chunk in chunks:
+            if not previous_chunk:
+                previous_chunk = chunk
+                continue
+            yield previous_chunk, True
+            previous_chunk = chunk
+
+        yield previous_chunk, False
+
+    async def _iter_content(
+        self,
+        request: DAVRequest,
+        url_path: DAVPath,
+        content_range_start: int | None = None,
+        content_range_end: int | None = None,
+    ) -> AsyncGenerator[bytes, None]:
+        params = dict()
         if content_range_start:
-            actual_url += f"&offset={content_range_start}"
+            params["offset"] = content_range_start
             if content_range_end:
-                actual_url += f"&length={content_range_end - content_range_start + 1}"
+                params["length"] = content_range_end - content_range_start + 1
         elif content_range_end:
-            actual_url += f"&length={content_range_end + 1}"
+            params["length"] = content_range_end + 1
+
+        actual_url = await self._get_url(request, url_path, "OPEN", **params)
 
         async with self.client.stream(
             "GET", actual_url, follow_redirects=True
         ) as response:
             response.raise_for_status()
-            previous_chunk = None
             async for chunk in response.aiter_bytes():
-                if not previous_chunk:
-                    previous_chunk = chunk
-                    continue
-                yield previous_chunk, True
-                previous_chunk = chunk
+                yield chunk
+
+    async def _iter_content_parallel(
+        self,
+        request: DAVRequest,
+        url_path: DAVPath,
+        content_range_start: int,
+        content_range_end: int,
+    ) -> AsyncGenerator[bytes, None]:
+        """Split the range into segments, read by concurrent OPEN requests.
+
+        The segments are usually served by different datanodes. Each one is
+        buffered in its own bounded queue, the chunks are yielded in order.
+        """
+
+        async def fetch_segment(offset: int, length: int, queue: asyncio.Queue):
+            try:
+                async for chunk in self._iter_content(
+                    request, url_path, offset, offset + length - 1
+                ):
+                    await queue.put(chunk)
+
+                await queue.put(None)
+
+            except Exception as e:
+                await queue.put(e)
 
-            yield previous_chunk, False
+        segment_size = self.parallel_read_segment_size
+        segments = [
+            (offset, min(segment_size, content_range_end - offset + 1))
+            for offset in range(
+                content_range_start, content_range_end + 1, segment_size
+            )
+        ]
+        in_flight: deque[tuple[asyncio.Task, asyncio.Queue]] = deque()
+
+        def start_segment(index: int) -> None:
+            queue = asyncio.Queue(maxsize=DAV_PARALLEL_READ_QUEUE_SIZE)
+            task = asyncio.create_task(fetch_segment(*segments[index], queue))
+            in_flight.append((task, queue))
+
+        try:
+            for index in range(min(self.parallel_read_concurrency, len(segments))):
+                start_segment(index)
+
+            next_index = len(in_flight)
+            while in_flight:
+                _, queue = in_flight[0]
+                while (chunk := await queue.get()) is not None:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+
+                    yield chunk
+
+                # the reader of the first segment is done, start the next one
+                in_flight.popleft()
+                if next_index < len(segments):
+                    start_segment(next_index)
+                    next_index += 1
+
+        finally:
+            for task, _ in in_flight:
+                task.cancel()
 
     async def _do_head(
         self, request: DAVRequest
@@ -344,35 +764,38 @@ class WebHDFSProvider(DAVProvider):
             return 404
 
         url_path = self._get_url_path(request.dist_src_path, request.user.username)
-        actual_url = (
-            self.uri
-            + f"{url_path}?op=DELETE&recursive=true&doAs={request.user.username}"
-        )
         try:
+            actual_url = await self._get_url(
+                request, url_path, "DELETE", recursive="true"
+            )
             response = await self.client.delete(actual_url)
             response.raise_for_status()
+            self._invalidate_file_status(url_path)
             return 204
 
         except httpx.HTTPStatusError:
             return 424
 
-    async def _do_put(self, request: DAVRequest) -> int:
-        parent_exists, file_exists, _ = await self._precheck_source(request)
-        if not parent_exists:
-            return 409
+    async def _get_create_location(self, request: DAVRequest, url_path: DAVPath) -> str:
+        # PUT requests are always overwriting.
+        actual_url = await self._get_url(request, url_path, "CREATE", overwrite="true")
+        # WebHDFS redirects on PUT, nothing is created before the data is sent
+        response = await self.client.put(actual_url)
+        if response.status_code != 307:
+            response.raise_for_status()
+
+        return response.headers["location"]
 
+    async def _do_put(self, request: DAVRequest) -> int:
         url_path = self._get_url_path(request.dist_src_path, request.user.username)
-        actual_url = (
-            self.uri
-            + f"{url_path}?op=CREATE&overwrite=true&doAs={request.user.username}"
-        )  # PUT requests are always overwriting.
         try:
-            # WebHDFS redirects on PUT
-            response = await self.client.put(actual_url)
-            if response.status_code != 307:
-                response.raise_for_status()
-
-            location = response.headers["location"]
+            # one round trip to namenode, instead of three
+            (parent_exists, file_exists, _), location = await asyncio.gather(
+                self._precheck_source(request),
+                self._get_create_location(request, url_path),
+            )
+            if not parent_exists:
+                return 409
 
             # The data should be sent in the second request
             # Location path already includes the required parameters
@@ -385,25 +808,211 @@ class WebHDFSProvider(DAVProvider):
         except httpx.HTTPStatusError as error:
             return error.response.status_code
 
+        finally:
+            self._invalidate_file_status(url_path)
+
     async def _get_res_etag(self, request: DAVRequest) -> str:
         url_path = self._get_url_path(request.dist_src_path, request.user.username)
 
         status_code, file_status = await self._do_filestatus(request, url_path)
-        return 'W/"{}"'.format(
-            hashlib.md5(
-                f"{file_status['fileId']}{file_status['modificationTime']}".encode()
-            ).hexdigest()
+        return self._get_etag_from_file_status(file_status)
+
+    @staticmethod
+    def _get_etag_from_file_status(file_status: FileStatus) -> str:
+        return generate_etag(
+            file_status.get("length", 0),
+            file_status.get("modificationTime", 0) * 1_000_000,
+            file_status.get("fileId", 0),
         )
 
     async def _do_copy(self, request: DAVRequest) -> int:
-        # TODO: Should not overwrite if header "Overwrite: F" is specified.
-        raise NotImplementedError
+        (_, src_exists, src_is_dir), (
+            parent_exists,
+            overlapping_paths,
+            dst_exists,
+        ) = await asyncio.gather(
+            self._precheck_source(request), self._precheck_destination(request)
+        )
+        if not src_exists:
+            return 404
+        if overlapping_paths:
+            return 403
+        if not parent_exists:
+            return 409
+        if dst_exists and not request.overwrite:
+            return 412
+
+        src_path = self._get_url_path(request.dist_src_path, request.user.username)
+        dst_path = self._get_url_path(request.dist_dst_path, request.user.username)
+        try:
+            if dst_exists:
+                # https://tools.ietf.org/html/rfc4918#section-9.8.4
+                # the destination is deleted before the copy, like a MOVE
+                actual_url = await self._get_url(
+                    request, dst_path, "DELETE", recursive="true"
+                )
+                response = await self.client.delete(actual_url)
+                response.raise_for_status()
+
+            if src_is_dir:
+                await self._copy_dir(
+                    request,
+                    src_path,
+                    dst_path,
+                    infinity=request.depth != DAVDepth.ZERO,
+                )
+            else:
+                file_status = await self._get_file_status_or_none(request, src_path)
+                await self._copy_file(
+                    request, src_path, dst_path, file_status.get("length", 0)
+                )
+
+            if dst_exists:
+                return 204
+            return 201
+
+        except httpx.HTTPStatusError as error:
+            return error.response.status_code
+
+        finally:
+            self._invalidate_file_status(dst_path)
+
+    async def _copy_dir(
+        self,
+        request: DAVRequest,
+        src_path: DAVPath,
+        dst_path: DAVPath,
+        infinity: bool,
+    ) -> None:
+        actual_url = await self._get_url(request, dst_path, "MKDIRS")
+        response = await self.client.put(actual_url)
+        response.raise_for_status()
+        if not infinity:
+            return
+
+        async for file_statuses in self._list_status(request, src_path):
+            tasks = list()
+            for file_status in file_statuses:
+                name = file_status.get("pathSuffix")
+                if file_status.get("type") == "DIRECTORY":
+                    tasks.append(
+                        self._copy_dir(
+                            request,
+                            src_path.add_child(name),
+                            dst_path.add_child(name),
+                            infinity=True,
+                        )
+                    )
+                else:
+                    tasks.append(
+                        self._copy_file(
+                            request,
+                            src_path.add_child(name),
+                            dst_path.add_child(name),
+                            file_status.get("length", 0),
+                        )
+                    )
+
+            await asyncio.gather(*tasks)
+
+    async def _copy_file(
+        self, request: DAVRequest, src_path: DAVPath, dst_path: DAVPath, length: int
+    ) -> None:
+        segment_size = self.copy_segment_size
+        if segment_size <= 0 or length <= segment_size:
+            await self._copy_file_segment(request, src_path, dst_path)
+            return
+
+        # the segments are copied in parallel, then assembled by CONCAT;
+        #   the first segment is the target, the others are in the same dir
+        segment_paths = [dst_path] + [
+            dst_path.parent.add_child(
+                f"{dst_path.name}.{i}.{DAV_COPY_TEMP_FILE_EXTENSION}"
+            )
+            for i in range(1, (length + segment_size - 1) // segment_size)
+        ]
+        try:
+            # wait all segments, before cleaning up the failed copy
+            results = await asyncio.gather(
+                *[
+                    self._copy_file_segment(
+                        request,
+                        src_path,
+                        segment_path,
+                        offset=i * segment_size,
+                        length=segment_size,
+                    )
+                    for i, segment_path in enumerate(segment_paths)
+                ],
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            actual_url = await self._get_url(
+                request,
+                dst_path,
+                "CONCAT",
+                sources=",".join(str(path) for path in segment_paths[1:]),
+            )
+            response = await self.client.post(actual_url)
+            response.raise_for_status()
+
+        except BaseException:
+            # CONCAT moves the sources into the target, nothing left on success;
+            #   on failure, the target is a truncated file, remove it with the others
+            await self._remove_copy_segments(request, segment_paths)
+            raise
+
+    async def _remove_copy_segments(
+        self, request: DAVRequest, segment_paths: list[DAVPath]
+    ) -> None:
+        try:
+            for segment_path in segment_paths:
+                actual_url = await self._get_url(request, segment_path, "DELETE")
+                await self.client.delete(actual_url)
+
+        except httpx.HTTPError as e:
+            logger.warning(f"remove copy segments failed: {segment_paths[0]}, {e}")
+
+        finally:
+            self._invalidate_file_status(*segment_paths)
+
+    async def _copy_file_segment(
+        self,
+        request: DAVRequest,
+        src_path: DAVPath,
+        dst_path: DAVPath,
+        offset: int | None = None,
+        length: int | None = None,
+    ) -> None:
+        params = dict()
+        if offset is not None:
+            params["offset"] = offset
+            params["length"] = length
+
+        # the datanode's OPEN response is piped into the CREATE request,
+        #   httpx reads the next chunk only after the previous one is sent
+        async with self._copy_semaphore:
+            location = await self._get_create_location(request, dst_path)
+            actual_url = await self._get_url(request, src_path, "OPEN", **params)
+            async with self.client.stream(
+                "GET", actual_url, follow_redirects=True
+            ) as open_response:
+                open_response.raise_for_status()
+                response = await self.client.put(
+                    location, content=open_response.aiter_bytes()
+                )
+                response.raise_for_status()
 
     async def _do_move(self, request: DAVRequest) -> int:
-        parent_exists, equal_paths, file_exists = await self._precheck_destination(
-            request
-        )
-        if equal_paths:
+        (
+            parent_exists,
+            overlapping_paths,
+            file_exists,
+        ) = await self._precheck_destination(request)
+        if overlapping_paths:
             return 403
         if not parent_exists:
             return 409
@@ -413,22 +1022,24 @@ class WebHDFSProvider(DAVProvider):
         if file_exists:
             # Delete existing file, we will overwrite
             url_path = self._get_url_path(request.dist_dst_path, request.user.username)
-            actual_url = self.uri + f"{url_path}?op=DELETE&recursive=true"
             try:
+                actual_url = await self._get_url(
+                    request, url_path, "DELETE", recursive="true"
+                )
                 response = await self.client.delete(actual_url)
                 response.raise_for_status()
             except httpx.HTTPStatusError:
                 # Not able to overwrite
                 return 403
+            finally:
+                self._invalidate_file_status(url_path)
 
         src_path = self._get_url_path(request.dist_src_path, request.user.username)
         dst_path = self._get_url_path(request.dist_dst_path, request.user.username)
-        actual_url = (
-            self.uri
-            + f"{src_path}?op=RENAME&doAs={request.user.username}&"
-            + urlencode({"destination": dst_path})
-        )
         try:
+            actual_url = await self._get_url(
+                request, src_path, "RENAME", destination=dst_path
+            )
             # Rename method in WebHDFS does not overwrite the existing file.
             resp = await self.client.put(actual_url)
             resp.raise_for_status()
@@ -439,52 +1050,64 @@ class WebHDFSProvider(DAVProvider):
         except httpx.HTTPStatusError as error:
             return error.response.status_code
 
+        finally:
+            self._invalidate_file_status(src_path, dst_path)
+
     async def _precheck_source(self, request: DAVRequest) -> tuple[bool, bool, bool]:
-        parent_exists = True
-        file_exists = True
-        try:
-            parent_state, _ = await self._do_filestatus(
+        parent_status, file_status = await asyncio.gather(
+            self._get_file_status_or_none(
                 request,
                 self._get_url_path(request.dist_src_path.parent, request.user.username),
-            )
-        except httpx.HTTPStatusError:
-            parent_exists = False
-        try:
-            status_state, file_status = await self._do_filestatus(
+            ),
+            self._get_file_status_or_none(
                 request,
                 self._get_url_path(request.dist_src_path, request.user.username),
-            )
-            is_collection = file_status.get("type") == "DIRECTORY"
-        except httpx.HTTPStatusError:
-            is_collection = False
-            file_exists = False
-        return parent_exists, file_exists, is_collection
+            ),
+        )
+        if file_status is None:
+            return parent_status is not None, False, False
+
+        return True, True, file_status.get("type") == "DIRECTORY"
 
     async def _precheck_destination(
         self, request: DAVRequest
     ) -> tuple[bool, bool, bool]:
-        parent_exists = True
-        file_exists = True
-        try:
-            parent_state, _ = await self._do_filestatus(
+        # the same path, or one inside the other:
+        #   deleting the destination would delete the source,
+        #   or copying into the source would never end
+        src_path, dst_path = request.dist_src_path, request.dist_dst_path
+        overlapping_paths: bool = dst_path is not None and (
+            dst_path == src_path
+            or src_path.is_parent_of(dst_path)
+            or dst_path.is_parent_of(src_path)
+        )
+        if overlapping_paths:
+            return True, True, False
+
+        parent_status, file_status = await asyncio.gather(
+            self._get_file_status_or_none(
                 request,
                 self._get_url_path(request.dist_dst_path.parent, request.user.username),
-            )
-        except httpx.HTTPStatusError:
-            parent_exists = False
-        if not parent_exists:
-            return False, False, False
-        equal_paths: bool = (
-            request.dist_dst_path and request.dist_dst_path == request.dist_src_path
-        )
-        try:
-            status_state, _ = await self._do_filestatus(
+            ),
+            self._get_file_status_or_none(
                 request,
                 self._get_url_path(request.dist_dst_path, request.user.username),
-            )
-        except httpx.HTTPStatusError:
-            file_exists = False
-        return parent_exists, equal_paths, file_exists
+            ),
+        )
+        if parent_status is None:
+            return False, False, False
+
+        return True, False, file_status is not None
+
+
+def _create_not_found_error(url_path: DAVPath) -> httpx.HTTPStatusError:
+    """same as the namenode's response, for the cached not found path"""
+    request = httpx.Request("GET", str(url_path))
+    return httpx.HTTPStatusError(
+        f"File does not exist: {url_path}",
+        request=request,
+        response=httpx.Response(404, request=request),
+    )
 
 
 def _get_extra_property(file_status: FileStatus) -> dict[DAVPropertyIdentity, str]:
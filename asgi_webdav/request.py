@@ -4,6 +4,8 @@ import pprint
 import re
 import urllib.parse
 from dataclasses import dataclass, field
+from datetime import timezone
+from email.utils import parsedate_to_datetime
 from functools import cached_property
 from logging import getLogger
 from urllib.parse import urlparse
@@ -23,6 +25,7 @@ from asgi_webdav.constants import (
     DAVPropertyPatchEntry,
     DAVRangeType,
     DAVRequestBodyLock,
+    DAVRequestContentRange,
     DAVRequestIf,
     DAVRequestIfCondition,
     DAVRequestIfConditionType,
@@ -68,6 +71,85 @@ class DAVRequestIfRange:
             return self.last_modified == last_modified
 
 
+# https://www.rfc-editor.org/rfc/rfc9110#section-13.1.2
+# If-None-Match: "bfc13a64729c4290ef5b2c2730249c88ca92d82d"
+# If-None-Match: W/"67ab43", "54ed21", "7892dd"
+# If-None-Match: *
+_IF_NONE_MATCH_REGEX = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+
+def _parse_header_if_none_match(header_if_none_match: bytes | None) -> list[str] | None:
+    if header_if_none_match is None:
+        return None
+
+    return _IF_NONE_MATCH_REGEX.findall(header_if_none_match.decode("latin-1"))
+
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-13.1.3
+# If-Modified-Since: Wed, 21 Oct 2015 07:28:00 GMT
+def _parse_header_if_modified_since(
+    header_if_modified_since: bytes | None,
+) -> float | None:
+    """return timestamp; a recipient MUST ignore invalid value"""
+    if header_if_modified_since is None:
+        return None
+
+    try:
+        dt = parsedate_to_datetime(header_if_modified_since.decode("latin-1"))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return dt.timestamp()
+
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-8.6
+# Content-Length: 3495
+def _parse_header_content_length(header_content_length: bytes | None) -> int | None:
+    if header_content_length is None:
+        return None
+
+    try:
+        content_length = int(header_content_length)
+    except ValueError:
+        return None
+
+    if content_length < 0:
+        return None
+
+    return content_length
+
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-14.4
+# Content-Range: bytes 0-1023/4096
+# Content-Range: bytes */4096
+_CONTENT_RANGE_REGEX = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+)")
+
+
+def _parse_header_content_range(
+    header_content_range: bytes | None,
+) -> DAVRequestContentRange | None:
+    """return None if missing or invalid; the total length must be known"""
+    if header_content_range is None:
+        return None
+
+    m = _CONTENT_RANGE_REGEX.fullmatch(header_content_range.decode("latin-1").strip())
+    if m is None:
+        return None
+
+    total_length = int(m.group(3))
+    if m.group(1) is None:
+        return DAVRequestContentRange(None, None, total_length)
+
+    content_start, content_end = int(m.group(1)), int(m.group(2))
+    if content_start > content_end or content_end >= total_length:
+        return None
+
+    return DAVRequestContentRange(content_start, content_end, total_length)
+
+
 # https://developer.mozilla.org/zh-CN/docs/Web/HTTP/Reference/Headers/Range
 # Range: <unit>=<range-start>-
 # Range: <unit>=<range-start>-<range-end>
@@ -459,6 +541,16 @@ class DAVRequest:
     def overwrite(self) -> bool:
         return _parse_header_overwrite(self.headers.get(b"overwrite"))
 
+    @cached_property
+    def content_length(self) -> int | None:
+        """request body's length, None: unknown"""
+        return _parse_header_content_length(self.headers.get(b"content-length"))
+
+    @cached_property
+    def content_range(self) -> DAVRequestContentRange | None:
+        """PUT with Content-Range"""
+        return _parse_header_content_range(self.headers.get(b"content-range"))
+
     # Range Info ---
     @cached_property
     def ranges(self) -> list[DAVRequestRange]:
@@ -475,6 +567,15 @@ class DAVRequest:
 
         return DAVRequestIfRange(data)
 
+    # Conditional Info ---
+    @cached_property
+    def if_none_match(self) -> list[str] | None:
+        return _parse_header_if_none_match(self.headers.get(b"if-none-match"))
+
+    @cached_property
+    def if_modified_since(self) -> float | None:
+        return _parse_header_if_modified_since(self.headers.get(b"if-modified-since"))
+
     # propfind info ---
     propfind_only_fetch_property_name: bool = False  # TODO!!!
 
@@ -518,6 +619,7 @@ class DAVRequest:
     user: DAVUser = field(init=False)
     authorization_info: bytes = b""
     authorization_method: str = ""
+    authorization_stale: bool = False  # Digest nonce expired, re-challenge
 
     # response relate
     @cached_property
@@ -743,7 +845,15 @@ class DAVRequest:
                 rich_fields += ["lock_ifs", "proppatch_entries"]
 
             case DAVMethod.GET:
-                rich_fields += ["ranges", "if_range"]
+                rich_fields += [
+                    "ranges",
+                    "if_range",
+                    "if_none_match",
+                    "if_modified_since",
+                ]
+
+            case DAVMethod.HEAD:
+                rich_fields += ["if_none_match", "if_modified_since"]
 
             case DAVMethod.PUT:
                 rich_fields += ["lock_ifs"]
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-import gzip
+import hashlib
+import math
 import pprint
 import re
 import sys
 import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from io import BytesIO
+from functools import lru_cache
 from logging import getLogger
 
 from asgiref.typing import ASGISendCallable
@@ -17,10 +20,14 @@ if sys.version_info >= (3, 14):
 else:
     from backports import zstd  # type: ignore # pragma: no cover
 
-from asgi_webdav.config import Config
+from asgi_webdav.config import CompressionEncodingRule, Config
 from asgi_webdav.constants import (
+    DEFAULT_COMPRESSION_ACCEPT_ENCODING_CACHE_SIZE,
     DEFAULT_COMPRESSION_CONTENT_MINIMUM_LENGTH,
     DEFAULT_COMPRESSION_CONTENT_TYPE_RULE,
+    DEFAULT_COMPRESSION_ENTROPY_PROBE_SIZE,
+    DEFAULT_COMPRESSION_ENTROPY_THRESHOLD,
+    DEFAULT_COMPRESSION_EXECUTOR_CONTENT_MINIMUM_LENGTH,
     DEFAULT_HIDE_FILE_IN_DIR_RULES,
     RESPONSE_DATA_BLOCK_SIZE,
     DAVCompressLevel,
@@ -72,6 +79,90 @@ async def get_response_body_generator(
         yield body, more_body
 
 
+async def _prepend_response_body(
+    first_item: tuple[bytes, bool], body_generator: DAVResponseBodyGenerator
+) -> DAVResponseBodyGenerator:
+    yield first_item
+    async for item in body_generator:
+        yield item
+
+
+def get_shannon_entropy(data: bytes) -> float:
+    """bits per byte, 0.0 - 8.0"""
+    length = len(data)
+    if length == 0:
+        return 0.0
+
+    return -sum(
+        count / length * math.log2(count / length) for count in Counter(data).values()
+    )
+
+
+def is_incompressible(data: bytes) -> bool:
+    """eg: mislabeled archive, media"""
+    return (
+        get_shannon_entropy(data[:DEFAULT_COMPRESSION_ENTROPY_PROBE_SIZE])
+        >= DEFAULT_COMPRESSION_ENTROPY_THRESHOLD
+    )
+
+
+_ENCODING_TO_SENDER_NAME = {
+    sender_name.name.lower(): sender_name
+    for sender_name in (DAVSenderName.ZSTD, DAVSenderName.DEFLATE, DAVSenderName.GZIP)
+}
+
+
+@lru_cache(maxsize=DEFAULT_COMPRESSION_ACCEPT_ENCODING_CACHE_SIZE)
+def parse_accept_encoding(accept_encoding: str) -> tuple[tuple[str, float], ...]:
+    """
+    https://www.rfc-editor.org/rfc/rfc9110#section-12.5.3
+
+    "gzip, deflate;q=0.5, *;q=0" => (("gzip", 1.0), ("deflate", 0.5), ("*", 0.0))
+    """
+    result = list()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding == "":
+            continue
+
+        q_value = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() != "q":
+                continue
+
+            try:
+                q_value = min(max(float(value), 0.0), 1.0)
+            except ValueError:
+                q_value = 0.0  # invalid qvalue, don't use it
+
+        result.append((coding, q_value))
+
+    return tuple(result)
+
+
+@lru_cache(maxsize=DEFAULT_COMPRESSION_ACCEPT_ENCODING_CACHE_SIZE)
+def negotiate_content_encoding(
+    accept_encoding: str, encodings: tuple[DAVSenderName, ...]
+) -> DAVSenderName:
+    """pick the encoding with the highest q-value,
+    the earlier one in server's preference wins on a tie
+    """
+    q_values = dict(parse_accept_encoding(accept_encoding))
+    q_value_default = q_values.get("*", 0.0)
+
+    matched_encoding = DAVSenderName.RAW
+    matched_q_value = 0.0
+    for encoding in encodings:
+        q_value = q_values.get(encoding.name.lower(), q_value_default)
+        if q_value > matched_q_value:
+            matched_encoding = encoding
+            matched_q_value = q_value
+
+    return matched_encoding
+
+
 @dataclass(slots=True)
 class DAVResponse:
     """provider.implement => provider.DavProvider => WebDAV
@@ -89,6 +180,12 @@ class DAVResponse:
 
     response_type: DAVResponseContentType = DAVResponseContentType.HTML
     matched_sender_name: DAVSenderName = field(init=False)
+    # key of compressed body cache, ETag or content digest; None: don't cache
+    compression_cache_key: bytes | None = field(init=False, default=None)
+    # from matched CompressionEncodingRule; None: config.compression.level
+    compression_level: DAVCompressLevel | None = field(init=False, default=None)
+    # check the first block, send it as is if it is incompressible
+    compression_probe: bool = field(init=False, default=False)
 
     def __post_init__(self) -> None:
         # content_body_generator
@@ -124,6 +221,32 @@ class DAVResponse:
                 b"Content-Type", b""
             ).decode(),
         )
+        if self.matched_sender_name != DAVSenderName.RAW:
+            self.compression_cache_key = self._get_compression_cache_key(
+                config, request
+            )
+            self.compression_probe = config.compression.enable_entropy_probe
+
+    def _get_compression_cache_key(
+        self, config: Config, request: DAVRequest
+    ) -> bytes | None:
+        if config.compression.cache_size <= 0:
+            # disabled, don't hash the body for nothing
+            return None
+
+        if isinstance(self.content, bytes):
+            # eg: PROPFIND/dir browser, the body is generated on each request
+            return b"#" + hashlib.blake2b(self.content, digest_size=16).digest()
+
+        if self.status != 200:
+            return None
+
+        etag = self.headers.get(b"ETag")
+        if etag is None:
+            return None
+
+        # weak ETag is only unique within one resource
+        return request.src_path.raw.encode() + b"|" + etag
 
     @staticmethod
     def _can_be_compressed(
@@ -149,6 +272,10 @@ class DAVResponse:
         if not config.compression.enable or self.content_range:
             return DAVSenderName.RAW
 
+        if b"Content-Encoding" in self.headers:
+            # already encoded, eg: precompressed file
+            return DAVSenderName.RAW
+
         if (
             isinstance(self.content_length, int)
             and self.content_length < DEFAULT_COMPRESSION_CONTENT_MINIMUM_LENGTH
@@ -156,36 +283,67 @@ class DAVResponse:
             # small file
             return DAVSenderName.RAW
 
-        if not self._can_be_compressed(
+        matched_rule = self._match_encoding_rule(
+            config, response_content_type_from_header
+        )
+        if matched_rule is None:
+            return DAVSenderName.RAW
+
+        if matched_rule.content_type_rule == "" and not self._can_be_compressed(
             response_content_type_from_header,
             config.compression.content_type_user_rule,
         ):
             return DAVSenderName.RAW
 
-        # check accept_encoding from request
-        request_accept_encoding_set = {
-            item.strip(" ") for item in request_accept_encoding.split(",")
-        }
+        self.compression_level = matched_rule.level
+        return negotiate_content_encoding(
+            request_accept_encoding,
+            self._get_encoding_preference(config, matched_rule),
+        )
 
-        if (
-            config.compression.enable_zstd
-            and DAVSenderName.ZSTD.value in request_accept_encoding_set  # type: ignore # py3.11+ EnumStr
-        ):
-            return DAVSenderName.ZSTD
+    def _match_encoding_rule(
+        self, config: Config, content_type_from_header: str
+    ) -> CompressionEncodingRule | None:
+        """the rule with content_type_rule first, then the bigger content_length_minimum"""
+        matched_rule: CompressionEncodingRule | None = None
+        matched_rule_key = (False, -1)
+        for rule in config.compression.encoding_rules:
+            if (
+                isinstance(self.content_length, int)
+                and self.content_length < rule.content_length_minimum
+            ):
+                continue
+
+            if rule.content_type_rule != "" and not re.match(
+                rule.content_type_rule, content_type_from_header
+            ):
+                continue
+
+            rule_key = (rule.content_type_rule != "", rule.content_length_minimum)
+            if rule_key > matched_rule_key:
+                matched_rule = rule
+                matched_rule_key = rule_key
+
+        return matched_rule
 
-        if (
-            config.compression.enable_deflate
-            and DAVSenderName.DEFLATE.value in request_accept_encoding_set  # type: ignore # py3.11+ EnumStr
-        ):
-            return DAVSenderName.DEFLATE
+    @staticmethod
+    def _get_encoding_preference(
+        config: Config, matched_rule: CompressionEncodingRule
+    ) -> tuple[DAVSenderName, ...]:
+        enabled_encodings = {
+            DAVSenderName.ZSTD: config.compression.enable_zstd,
+            DAVSenderName.DEFLATE: config.compression.enable_deflate,
+            DAVSenderName.GZIP: config.compression.enable_gzip,
+        }
+        encodings = list()
+        for name in matched_rule.encodings:
+            encoding = _ENCODING_TO_SENDER_NAME.get(name.lower())
+            if encoding is None or not enabled_encodings[encoding]:
+                continue
 
-        if (
-            config.compression.enable_gzip
-            and DAVSenderName.GZIP.value in request_accept_encoding_set  # type: ignore # py3.11+ EnumStr
-        ):
-            return DAVSenderName.GZIP
+            encodings.append(encoding)
 
-        return DAVSenderName.RAW
+        return tuple(encodings)
 
     def __repr__(self) -> str:
         fields = [
@@ -216,11 +374,103 @@ class DAVResponseMethodNotAllowed(DAVResponse):
         super().__init__(status=405, content=content, content_length=len(content))
 
 
+DAVCompressionCacheKey = tuple[bytes, bytes, int]  # (key, encoding, level)
+
+
+class DAVCompressionCache:
+    """LRU cache of compressed response bodies, bounded by total bytes"""
+
+    size: int
+    entry_max_size: int
+
+    current_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, size: int, entry_max_size: int):
+        self.size = max(size, 0)
+        self.entry_max_size = min(entry_max_size, self.size)
+
+        self._data: OrderedDict[DAVCompressionCacheKey, bytes] = OrderedDict()
+        self.current_size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enable(self) -> bool:
+        return self.size > 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+
+        return self.hits / total
+
+    def get(self, key: DAVCompressionCacheKey) -> bytes | None:
+        data = self._data.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def set(self, key: DAVCompressionCacheKey, data: bytes) -> None:
+        if len(data) > self.entry_max_size:
+            return
+
+        old_data = self._data.pop(key, None)
+        if old_data is not None:
+            self.current_size -= len(old_data)
+
+        self._data[key] = data
+        self.current_size += len(data)
+
+        while self.current_size > self.size:
+            _, evicted_data = self._data.popitem(last=False)
+            self.current_size -= len(evicted_data)
+            self.evictions += 1
+
+    def purge(self) -> None:
+        self._data.clear()
+        self.current_size = 0
+
+    def get_info(self) -> dict[str, int | float]:
+        return {
+            "size": self.size,
+            "current_size": self.current_size,
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+        }
+
+
+def create_compression_executor(config: Config) -> Executor | None:
+    """zlib and zstd release the GIL, a thread pool is enough"""
+    if config.compression.executor_max_workers <= 0:
+        return None
+
+    return ThreadPoolExecutor(
+        max_workers=config.compression.executor_max_workers,
+        thread_name_prefix="dav-compression",
+    )
+
+
 class DAVSenderAbc:
     name: bytes = b"DAVSenderAbc"
+    config: Config
     response: DAVResponse
 
     def __init__(self, config: Config, response: DAVResponse):
+        self.config = config
         self.response = response
 
     async def send_it(self, send: ASGISendCallable) -> None:
@@ -281,9 +531,31 @@ class DAVSenderCompressionAbc(DAVSenderAbc):
     name: bytes = b"SenderCompressionAbc"
 
     compress_level: int
+    compression_cache: DAVCompressionCache | None
+    compression_executor: Executor | None
 
-    def __init__(self, config: Config, response: DAVResponse):
+    def __init__(
+        self,
+        config: Config,
+        response: DAVResponse,
+        compression_cache: DAVCompressionCache | None = None,
+        compression_executor: Executor | None = None,
+    ):
         super().__init__(config=config, response=response)
+        if compression_cache is not None and compression_cache.enable:
+            self.compression_cache = compression_cache
+        else:
+            self.compression_cache = None
+
+        if compression_executor is not None and (
+            response.content_length is None
+            or response.content_length
+            >= DEFAULT_COMPRESSION_EXECUTOR_CONTENT_MINIMUM_LENGTH
+        ):
+            self.compression_executor = compression_executor
+        else:
+            # the thread switching costs more than compressing a small body
+            self.compression_executor = None
 
         """
         Content-Length rule:
@@ -311,7 +583,125 @@ class DAVSenderCompressionAbc(DAVSenderAbc):
     def _flush(self) -> bytes:
         raise NotImplementedError  # pragma: no cover
 
+    def _get_compress_level_type(self) -> DAVCompressLevel:
+        if self.response.compression_level is None:
+            return self.config.compression.level
+
+        return self.response.compression_level
+
+    async def _probe_content_body(self) -> bool:
+        """return False if the first block is incompressible"""
+        try:
+            first_item = await anext(self.response.content_body_generator)
+        except StopAsyncIteration:  # pragma: no cover
+            return True
+
+        self.response.content_body_generator = _prepend_response_body(
+            first_item, self.response.content_body_generator
+        )
+        return not is_incompressible(first_item[0])
+
+    async def _send_raw(self, send: ASGISendCallable) -> None:
+        logger.debug("incompressible content, send it as is")
+        for key in (
+            b"Content-Encoding",
+            b"Transfer-Encoding",
+            b"X-Uncompressed-Content-Length",
+        ):
+            self.response.headers.pop(key, None)
+
+        self.response.matched_sender_name = DAVSenderName.RAW
+        await DAVSenderRaw(config=self.config, response=self.response).send_it(send)
+
+    def _compress_block(self, body: bytes, more_body: bool) -> bytes:
+        data = self._compress(body)
+        if not more_body:
+            data += self._flush()
+
+        return data
+
+    async def _get_compressed_body_generator(self) -> DAVResponseBodyGenerator:
+        if self.compression_executor is None:
+            async for body, more_body in self.response.content_body_generator:
+                yield self._compress_block(body, more_body), more_body
+
+            return
+
+        # compress block N in executor, and read block N+1 at the same time
+        loop = asyncio.get_running_loop()
+        body_generator = self.response.content_body_generator
+        read_ahead: asyncio.Future[tuple[bytes, bool]] | None = None
+        try:
+            body, more_body = await anext(body_generator)
+            while True:
+                compress_job = loop.run_in_executor(
+                    self.compression_executor, self._compress_block, body, more_body
+                )
+                if more_body:
+                    read_ahead = asyncio.ensure_future(anext(body_generator))
+
+                yield await compress_job, more_body
+
+                if read_ahead is None:
+                    break
+
+                body, more_body = await read_ahead
+                read_ahead = None
+
+        except StopAsyncIteration:  # pragma: no cover
+            return
+
+        finally:
+            if read_ahead is not None:
+                read_ahead.cancel()
+
+    def _get_cache_key(self) -> DAVCompressionCacheKey | None:
+        if (
+            self.compression_cache is None
+            or self.response.compression_cache_key is None
+        ):
+            return None
+
+        return self.response.compression_cache_key, self.name, self.compress_level
+
+    async def _send_cached(self, send: ASGISendCallable, data: bytes) -> None:
+        # don't touch the resource
+        await self.response.content_body_generator.aclose()
+
+        self.response.headers.pop(b"Transfer-Encoding", None)
+        self.response.headers[b"Content-Length"] = str(len(data)).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.response.status,
+                "headers": list(self.response.headers.items()),
+                "trailers": True,
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": data,
+                "more_body": False,
+            }
+        )
+
     async def send_it(self, send: ASGISendCallable) -> None:
+        cache_key = self._get_cache_key()
+        cache_buffer: list[bytes] | None = None
+        cache_buffer_size = 0
+        if cache_key is not None and self.compression_cache is not None:
+            cached_data = self.compression_cache.get(cache_key)
+            if cached_data is not None:
+                await self._send_cached(send, cached_data)
+                return
+
+            cache_buffer = list()
+
+        if self.response.compression_probe and not await self._probe_content_body():
+            await self._send_raw(send)
+            return
+
         # send headers
         await send(
             {
@@ -323,10 +713,13 @@ class DAVSenderCompressionAbc(DAVSenderAbc):
         )
 
         # send body
-        async for body, more_body in self.response.content_body_generator:
-            data = self._compress(body)
-            if not more_body:
-                data += self._flush()
+        async for data, more_body in self._get_compressed_body_generator():
+            if cache_buffer is not None and self.compression_cache is not None:
+                cache_buffer_size += len(data)
+                if cache_buffer_size > self.compression_cache.entry_max_size:
+                    cache_buffer = None  # too big, give up
+                else:
+                    cache_buffer.append(data)
 
             if not data:
                 continue  # pragma: no cover
@@ -339,6 +732,13 @@ class DAVSenderCompressionAbc(DAVSenderAbc):
                 }
             )
 
+        if (
+            cache_key is not None
+            and cache_buffer is not None
+            and self.compression_cache is not None
+        ):
+            self.compression_cache.set(cache_key, b"".join(cache_buffer))
+
 
 class DAVSenderZstd(DAVSenderCompressionAbc):
     """
@@ -351,12 +751,24 @@ class DAVSenderZstd(DAVSenderCompressionAbc):
     name: bytes = b"zstd"
     compressor: zstd.ZstdCompressor
 
-    def __init__(self, config: Config, response: DAVResponse):
-        super().__init__(config=config, response=response)
+    def __init__(
+        self,
+        config: Config,
+        response: DAVResponse,
+        compression_cache: DAVCompressionCache | None = None,
+        compression_executor: Executor | None = None,
+    ):
+        super().__init__(
+            config=config,
+            response=response,
+            compression_cache=compression_cache,
+            compression_executor=compression_executor,
+        )
 
-        if config.compression.level == DAVCompressLevel.FAST:
+        level_type = self._get_compress_level_type()
+        if level_type == DAVCompressLevel.FAST:
             level = 1
-        elif config.compression.level == DAVCompressLevel.BEST:
+        elif level_type == DAVCompressLevel.BEST:
             level = 19
         else:
             level = zstd.COMPRESSION_LEVEL_DEFAULT
@@ -380,12 +792,24 @@ class DAVSenderDeflate(DAVSenderCompressionAbc):
 
     name: bytes = b"deflate"
 
-    def __init__(self, config: Config, response: DAVResponse):
-        super().__init__(config=config, response=response)
+    def __init__(
+        self,
+        config: Config,
+        response: DAVResponse,
+        compression_cache: DAVCompressionCache | None = None,
+        compression_executor: Executor | None = None,
+    ):
+        super().__init__(
+            config=config,
+            response=response,
+            compression_cache=compression_cache,
+            compression_executor=compression_executor,
+        )
 
-        if config.compression.level == DAVCompressLevel.FAST:
+        level_type = self._get_compress_level_type()
+        if level_type == DAVCompressLevel.FAST:
             level = zlib.Z_BEST_SPEED
-        elif config.compression.level == DAVCompressLevel.BEST:
+        elif level_type == DAVCompressLevel.BEST:
             level = zlib.Z_BEST_COMPRESSION
         else:
             level = zlib.Z_DEFAULT_COMPRESSION
@@ -404,54 +828,74 @@ class DAVSenderGzip(DAVSenderCompressionAbc):
     """
     https://en.wikipedia.org/wiki/Gzip
     https://developer.mozilla.org/en-US/docs/Glossary/GZip_compression
-    https://docs.python.org/3.14/library/gzip.html
+    https://docs.python.org/3.14/library/zlib.html#zlib.compressobj
     """
 
     name: bytes = b"gzip"
-    buffer: BytesIO
 
-    def __init__(self, config: Config, response: DAVResponse):
-        super().__init__(config=config, response=response)
+    def __init__(
+        self,
+        config: Config,
+        response: DAVResponse,
+        compression_cache: DAVCompressionCache | None = None,
+        compression_executor: Executor | None = None,
+    ):
+        super().__init__(
+            config=config,
+            response=response,
+            compression_cache=compression_cache,
+            compression_executor=compression_executor,
+        )
 
-        if config.compression.level == DAVCompressLevel.FAST:
+        level_type = self._get_compress_level_type()
+        if level_type == DAVCompressLevel.FAST:
             level = 1
-        elif config.compression.level == DAVCompressLevel.BEST:
+        elif level_type == DAVCompressLevel.BEST:
             level = 9
         else:
             level = 4
 
-        self.buffer = BytesIO()
-
         self.compress_level = level
-        self.compressor = gzip.GzipFile(
-            mode="wb", compresslevel=level, fileobj=self.buffer
-        )
+        # wbits=31: gzip header and trailer, output every block as it comes
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
 
     def _compress(self, body: bytes) -> bytes:
-        self.compressor.write(body)
-        return b""
+        return self.compressor.compress(body)
 
     def _flush(self) -> bytes:
-        self.compressor.flush()
-        self.compressor.close()
-        data = self.buffer.getvalue()
-
-        self.buffer.seek(0)
-        self.buffer.truncate()
-
-        return data
+        return self.compressor.flush()
 
 
-def get_dav_sender(config: Config, response: DAVResponse) -> DAVSenderAbc:
+def get_dav_sender(
+    config: Config,
+    response: DAVResponse,
+    compression_cache: DAVCompressionCache | None = None,
+    compression_executor: Executor | None = None,
+) -> DAVSenderAbc:
     match response.matched_sender_name:
         case DAVSenderName.ZSTD:
-            return DAVSenderZstd(config=config, response=response)
+            return DAVSenderZstd(
+                config=config,
+                response=response,
+                compression_cache=compression_cache,
+                compression_executor=compression_executor,
+            )
 
         case DAVSenderName.DEFLATE:
-            return DAVSenderDeflate(config=config, response=response)
+            return DAVSenderDeflate(
+                config=config,
+                response=response,
+                compression_cache=compression_cache,
+                compression_executor=compression_executor,
+            )
 
         case DAVSenderName.GZIP:
-            return DAVSenderGzip(config=config, response=response)
+            return DAVSenderGzip(
+                config=config,
+                response=response,
+                compression_cache=compression_cache,
+                compression_executor=compression_executor,
+            )
 
     return DAVSenderRaw(config=config, response=response)
 
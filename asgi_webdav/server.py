@@ -7,7 +7,12 @@ from logging import getLogger
 from typing import Any
 
 from asgi_middleware_static_file import ASGIMiddlewareStaticFile
-from asgiref.typing import ASGIReceiveCallable, ASGISendCallable, HTTPScope
+from asgiref.typing import (
+    ASGIReceiveCallable,
+    ASGISendCallable,
+    HTTPScope,
+    LifespanScope,
+)
 
 from asgi_webdav import __name__ as app_name
 from asgi_webdav import __version__
@@ -25,7 +30,12 @@ from asgi_webdav.helpers import is_browser_user_agent
 from asgi_webdav.log import get_dav_logging_config
 from asgi_webdav.middleware.cors import ASGIMiddlewareCORS
 from asgi_webdav.request import DAVRequest
-from asgi_webdav.response import DAVResponse, get_dav_sender
+from asgi_webdav.response import (
+    DAVCompressionCache,
+    DAVResponse,
+    create_compression_executor,
+    get_dav_sender,
+)
 from asgi_webdav.web_dav import WebDAV
 from asgi_webdav.web_page import WebPage
 
@@ -47,16 +57,33 @@ class DAVApp:
             logger.info(_service_abnormal_exit_message)
             sys.exit(1)
 
-        self.web_page = WebPage()
+        self.compression_cache = DAVCompressionCache(
+            size=config.compression.cache_size,
+            entry_max_size=config.compression.cache_entry_max_size,
+        )
+        self.compression_executor = create_compression_executor(config)
+        self.web_page = WebPage(compression_cache=self.compression_cache)
         self.config = config
 
     async def __call__(
-        self, scope: HTTPScope, receive: ASGIReceiveCallable, send: ASGISendCallable
+        self,
+        scope: HTTPScope | LifespanScope,
+        receive: ASGIReceiveCallable,
+        send: ASGISendCallable,
     ) -> None:
+        if scope["type"] == "lifespan":
+            await self.handle_lifespan(receive, send)
+            return
+
         request, response = await self.handle(scope, receive, send)
 
         response.process(config=self.config, request=request)
-        sender = get_dav_sender(config=self.config, response=response)
+        sender = get_dav_sender(
+            config=self.config,
+            response=response,
+            compression_cache=self.compression_cache,
+            compression_executor=self.compression_executor,
+        )
         if request.method in {DAVMethod.COPY, DAVMethod.MOVE}:
             logger.info(
                 "%s - %s %s %s - %s - %d - %s - %s",
@@ -84,6 +111,20 @@ class DAVApp:
         logger.debug(f"response header:{response.headers}")
         await sender.send_it(request.send)
 
+    async def handle_lifespan(
+        self, receive: ASGIReceiveCallable, send: ASGISendCallable
+    ) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+
+            elif message["type"] == "lifespan.shutdown":
+                # eg: close the SQLite property store
+                await self.web_dav.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
     async def handle(
         self, scope: HTTPScope, receive: ASGIReceiveCallable, send: ASGISendCallable
     ) -> tuple[DAVRequest, DAVResponse]:
@@ -208,7 +249,7 @@ def convert_aep_to_uvicorn_kwargs(aep: AppEntryParameters) -> dict[str, Any]:
         "host": aep.bind_host,
         "port": aep.bind_port,
         "use_colors": aep.logging_use_colors,
-        "lifespan": "off",
+        "lifespan": "auto",
         "log_level": "warning",
         "access_log": False,
         "forwarded_allow_ips": "*",
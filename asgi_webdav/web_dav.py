@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from copy import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from logging import getLogger
+from typing import Any
 from zoneinfo import ZoneInfo
 
 from asgi_webdav import __version__
@@ -17,9 +18,11 @@ from asgi_webdav.constants import (
 from asgi_webdav.exceptions import DAVException, DAVExceptionProviderInitFailed
 from asgi_webdav.helpers import get_timezone, is_browser_user_agent
 from asgi_webdav.property import DAVProperty
+from asgi_webdav.provider.caching import CACHING_PROVIDER_URI_PREFIX, CachingProvider
 from asgi_webdav.provider.common import DAVProvider
 from asgi_webdav.provider.file_system import FileSystemProvider
 from asgi_webdav.provider.memory import MemoryProvider
+from asgi_webdav.provider.s3 import S3_PROVIDER_URI_PREFIX, S3Provider
 from asgi_webdav.provider.webhdfs import WebHDFSProvider
 from asgi_webdav.request import DAVRequest
 from asgi_webdav.response import (
@@ -102,11 +105,75 @@ class PrefixProviderInfo:
         return f"{self.prefix} ==> {self.provider}{flag_str}"
 
 
+@dataclass(slots=True)
+class PrefixProviderTrieNode:
+    children: dict[str, PrefixProviderTrieNode] = field(default_factory=dict)
+
+    # provider mapped to this node's path
+    provider: DAVProvider | None = None
+    # providers mapped to this node's direct children's path
+    child_providers: list[DAVProvider] = field(default_factory=list)
+
+
+class PrefixProviderTrie:
+    """path segment trie, match provider in O(path depth)"""
+
+    _root: PrefixProviderTrieNode
+
+    def __init__(self) -> None:
+        self._root = PrefixProviderTrieNode()
+
+    def add(self, prefix: DAVPath, provider: DAVProvider) -> None:
+        parent = None
+        node = self._root
+        for part in prefix.parts:
+            parent = node
+            node = node.children.setdefault(part, PrefixProviderTrieNode())
+
+        if node.provider is not None:
+            # same prefix, first one wins
+            return
+
+        node.provider = provider
+        if parent is not None:
+            parent.child_providers.append(provider)
+
+    def match(self, path: DAVPath) -> DAVProvider | None:
+        """longest prefix match"""
+        node = self._root
+        provider = node.provider
+        for part in path.parts:
+            child = node.children.get(part)
+            if child is None:
+                break
+
+            node = child
+            if node.provider is not None:
+                provider = node.provider
+
+        return provider
+
+    def get_depth_1_child_providers(self, path: DAVPath) -> list[DAVProvider]:
+        node = self._root
+        for part in path.parts:
+            child = node.children.get(part)
+            if child is None:
+                return []
+
+            node = child
+
+        return node.child_providers
+
+
 class WebDAV:
-    prefix_provider_mapping: list[PrefixProviderInfo] = list()
+    prefix_provider_mapping: list[PrefixProviderInfo]
+    prefix_provider_trie: PrefixProviderTrie
     timezone: ZoneInfo
 
     def __init__(self, config: Config):
+        self.prefix_provider_mapping = list()
+        self.prefix_provider_trie = PrefixProviderTrie()
+
         # init prefix => provider
         for p_config in config.provider_mapping:
             try:
@@ -115,21 +182,42 @@ class WebDAV:
                 logger.error(f"{e}, please check your config, skip!")
                 continue
 
+            provider_kwargs = self.get_provider_kwargs(provider_class, p_config)
+            if provider_class is CachingProvider:
+                try:
+                    origin_class = self.match_provider_class(
+                        replace(
+                            p_config,
+                            uri=p_config.uri.removeprefix(CACHING_PROVIDER_URI_PREFIX),
+                        )
+                    )
+                except DAVExceptionProviderInitFailed as e:
+                    logger.error(f"{e}, please check your config, skip!")
+                    continue
+
+                provider_kwargs["origin_class"] = origin_class
+                provider_kwargs["origin_kwargs"] = self.get_provider_kwargs(
+                    origin_class, p_config
+                )
+                provider_kwargs["cache"] = p_config.cache
+
             try:
                 provider = provider_class(
                     config=config,
-                    prefix=DAVPath(p_config.prefix),
+                    prefix=DAVPath(p_config.prefix).intern(),
                     uri=p_config.uri,
                     home_dir=p_config.home_dir,
                     read_only=p_config.read_only,
                     ignore_property_extra=p_config.ignore_property_extra,
+                    property_store=p_config.property_store,
+                    **provider_kwargs,
                 )
             except DAVExceptionProviderInitFailed as e:
                 logger.error(f"Provider init failed: {p_config}, {e}, skip!")
                 continue
 
             ppi = PrefixProviderInfo(
-                prefix=DAVPath(p_config.prefix),
+                prefix=DAVPath(p_config.prefix).intern(),
                 prefix_weight=len(p_config.prefix),
                 provider=provider,
                 home_dir=p_config.home_dir,
@@ -142,6 +230,8 @@ class WebDAV:
         self.prefix_provider_mapping.sort(
             key=lambda x: getattr(x, "prefix_weight"), reverse=True
         )
+        for ppi in self.prefix_provider_mapping:
+            self.prefix_provider_trie.add(ppi.prefix, ppi.provider)
 
         # init dir browser config
         self.enable_dir_browser = config.enable_dir_browser
@@ -155,16 +245,38 @@ class WebDAV:
         except DAVException as e:
             DAVException(f"Please check environment variable: TZ, {e}")
 
+    async def close(self) -> None:
+        for ppi in self.prefix_provider_mapping:
+            await ppi.provider.close()
+
+    @staticmethod
+    def get_provider_kwargs(
+        provider_class: type[DAVProvider], p_config: Provider
+    ) -> dict[str, Any]:
+        """the provider's own options in the Provider entry"""
+        if provider_class is WebHDFSProvider:
+            return {"webhdfs": p_config.webhdfs}
+        if provider_class is S3Provider:
+            return {"s3": p_config.s3}
+
+        return dict()
+
     @staticmethod
     def match_provider_class(
         p_config: Provider,
     ) -> type[DAVProvider]:
-        if p_config.uri.startswith("file://"):
+        if p_config.uri.startswith(CACHING_PROVIDER_URI_PREFIX):
+            return CachingProvider
+
+        elif p_config.uri.startswith("file://"):
             return FileSystemProvider
 
         elif p_config.uri.startswith("memory://"):
             return MemoryProvider
 
+        elif p_config.uri.startswith(S3_PROVIDER_URI_PREFIX):
+            return S3Provider
+
         elif p_config.uri.startswith("http://") or p_config.uri.startswith("https://"):
             provider_class = _HTTP_PROVIDERS.get(p_config.type)
             if provider_class is None:
@@ -177,23 +289,7 @@ class WebDAV:
         raise DAVExceptionProviderInitFailed(f"Provider uri not supported: {p_config}")
 
     def match_provider(self, request: DAVRequest) -> DAVProvider | None:
-        weight = None
-        provider = None
-
-        # match provider
-        for ppi in self.prefix_provider_mapping:
-            if not ppi.prefix.is_parent_of_or_is_self(request.src_path):
-                continue
-
-            if weight is None:  # or ppm.weight < weight:
-                weight = ppi.prefix_weight
-                provider = ppi.provider
-                break  # self.prefix_provider_mapping is sorted!
-
-        if weight is None:
-            return None
-
-        return provider
+        return self.prefix_provider_trie.match(request.src_path)
 
     async def distribute(self, request: DAVRequest) -> DAVResponse:
         # match provider
@@ -271,13 +367,7 @@ class WebDAV:
         return response
 
     def get_depth_1_child_provider(self, prefix: DAVPath) -> list[DAVProvider]:
-        providers = list()
-        for ppm in self.prefix_provider_mapping:
-            if prefix.is_parent_of(ppm.prefix):
-                if ppm.prefix.get_child(prefix).parts_count == 1:
-                    providers.append(ppm.provider)
-
-        return providers
+        return self.prefix_provider_trie.get_depth_1_child_providers(prefix)
 
     async def do_propfind(
         self, request: DAVRequest, provider: DAVProvider
@@ -351,6 +441,13 @@ class WebDAV:
         http_status, property_basic_data, body_generator, response_content_range = (
             await provider.do_get(request)
         )
+        if http_status == 304 and property_basic_data is not None:
+            return DAVResponse(
+                304,
+                headers=property_basic_data.get_not_modified_response_headers(),
+                response_type=DAVResponseContentType.ANY,
+            )
+
         if http_status not in {200, 206, 416}:
             # TODO bug
             return DAVResponse(http_status)
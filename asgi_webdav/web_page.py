@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from asgi_webdav.log import get_log_messages
 from asgi_webdav.request import DAVRequest
+from asgi_webdav.response import DAVCompressionCache
 
 
 class WebPage:
+    def __init__(self, compression_cache: DAVCompressionCache | None = None):
+        self.compression_cache = compression_cache
 
     async def enter(self, request: DAVRequest) -> tuple[int, str]:
         if request.path.parts_count <= 2:
@@ -26,6 +29,10 @@ class WebPage:
             # route /_/admin/logging
             status, data = await self.get_logging_page()
 
+        elif request.path.parts[2] == "compression":
+            # route /_/admin/compression
+            status, data = self.get_compression_page()
+
         else:
             status, data = 500, "something wrong"
 
@@ -33,7 +40,10 @@ class WebPage:
 
     @staticmethod
     def get_index_page() -> str:
-        return '<a href="/_/admin/logging">Logging page</a>'
+        return (
+            '<a href="/_/admin/logging">Logging page</a><br>'
+            '<a href="/_/admin/compression">Compression page</a>'
+        )
 
     @staticmethod
     async def get_logging_page() -> tuple[int, str]:
@@ -42,3 +52,15 @@ class WebPage:
         for message in get_log_messages():
             data += message + "<br>"
         return 200, data
+
+    def get_compression_page(self) -> tuple[int, str]:
+        if self.compression_cache is None:
+            return 200, "compression cache: disabled"
+
+        data = "compression cache:<br>"
+        for k, v in self.compression_cache.get_info().items():
+            if isinstance(v, float):
+                data += f"{k}: {v:.2%}<br>"
+            else:
+                data += f"{k}: {v}<br>"
+        return 200, data
@@ -0,0 +1,89 @@
+"""
+Benchmark DAVPath allocations per PROPFIND entry
+
+python -m tests.by_hand.benchmark_dav_path
+"""
+
+import asyncio
+import tracemalloc
+from timeit import timeit
+
+from asgi_webdav.config import generate_config_from_dict
+from asgi_webdav.constants import DAVPath
+from asgi_webdav.server import DAVApp
+from tests.test_webdav_method import fake_send, get_test_scope
+
+ENTRY_COUNT = 1000
+
+CONFIG_OBJECT = {
+    "account_mapping": [
+        {"username": "username", "password": "password", "permissions": ["+"]},
+    ],
+    "provider_mapping": [
+        {"prefix": "/", "uri": "memory:///"},
+        {"prefix": "/memory", "uri": "memory:///"},
+    ],
+    "logging": {"enable": False},
+}
+
+
+def propfind_entry_path_ops(prefix: DAVPath, base_path: DAVPath, name: str) -> DAVPath:
+    """DAVPath operations of one entry in a Depth: 1 PROPFIND"""
+    path = base_path.add_child(name)
+    prefix.is_parent_of_or_is_self(path)
+    base_path.is_parent_of(path)
+    path.get_child(prefix)
+    path.parent
+
+    return path
+
+
+def benchmark_path_ops() -> None:
+    prefix = DAVPath("/memory").intern()
+    base_path = DAVPath("/memory/dir")
+    names = [f"file-{i:06}" for i in range(ENTRY_COUNT)]
+
+    tracemalloc.start()
+    snapshot_start = tracemalloc.take_snapshot()
+    paths = [propfind_entry_path_ops(prefix, base_path, name) for name in names]
+    snapshot_end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = snapshot_end.compare_to(snapshot_start, "filename")
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    count = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    print(
+        f"path ops, retained per entry: {count / len(paths):.2f} blocks,"
+        f" {size / len(paths):.1f} bytes"
+    )
+
+    seconds = timeit(
+        lambda: [propfind_entry_path_ops(prefix, base_path, name) for name in names],
+        number=100,
+    )
+    print(f"path ops, time per entry: {seconds / 100 / ENTRY_COUNT * 1e9:.0f} ns")
+
+
+async def benchmark_propfind() -> None:
+    dav_app = DAVApp(generate_config_from_dict(CONFIG_OBJECT))
+
+    scope, receive = get_test_scope("MKCOL", b"", "/memory/dir")
+    await dav_app.handle(scope, receive, fake_send)
+    for i in range(ENTRY_COUNT):
+        scope, receive = get_test_scope("PUT", b"", f"/memory/dir/file-{i:06}")
+        await dav_app.handle(scope, receive, fake_send)
+
+    tracemalloc.start()
+    scope, receive = get_test_scope("PROPFIND", b"", "/memory/dir")
+    scope["headers"].append((b"depth", b"1"))
+    _, response = await dav_app.handle(scope, receive, fake_send)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert response.status == 207
+    print(f"PROPFIND Depth: 1, peak per entry: {peak / ENTRY_COUNT:.1f} bytes")
+
+
+if __name__ == "__main__":
+    benchmark_path_ops()
+    asyncio.run(benchmark_propfind())
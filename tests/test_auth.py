@@ -1,10 +1,17 @@
+import hashlib
 from base64 import b64encode
 from copy import deepcopy
 
 import pytest
 from icecream import ic
 
-from asgi_webdav.auth import DAVAuth, DAVPassword, DAVPasswordType
+from asgi_webdav.auth import (
+    DAVAuth,
+    DAVPassword,
+    DAVPasswordType,
+    DigestNonceState,
+    HTTPDigestNonceKeeper,
+)
 from asgi_webdav.cache import DAVCacheType
 from asgi_webdav.config import Config, generate_config_from_dict
 from asgi_webdav.constants import DAVPath, DAVUser
@@ -542,3 +549,167 @@ def test_dav_auth_create_response_401():
     response = dav_auth.create_response_401(request, test_response_message)
     ic(response)
     assert response.headers.get(b"WWW-Authenticate").startswith(b"Basic")
+
+
+def test_http_digest_nonce_keeper():
+    keeper = HTTPDigestNonceKeeper(secret="secret", lifetime=300)
+    now = 1_700_000_000
+    nonce = keeper.new(now)
+
+    # reuse one nonce with increasing nc
+    assert keeper.check(nonce, "00000001", now) == DigestNonceState.VALID
+    assert keeper.check(nonce, "00000002", now + 10) == DigestNonceState.VALID
+    assert keeper.check(nonce, None, now + 10) == DigestNonceState.VALID
+
+    # replay
+    assert keeper.check(nonce, "00000002", now + 10) == DigestNonceState.REPLAY
+    assert keeper.check(nonce, "00000001", now + 10) == DigestNonceState.REPLAY
+    assert keeper.check(nonce, "bad-nc", now + 10) == DigestNonceState.INVALID
+
+    # out of order, every nc is accepted once
+    assert keeper.check(nonce, "00000005", now + 10) == DigestNonceState.VALID
+    assert keeper.check(nonce, "00000004", now + 10) == DigestNonceState.VALID
+    assert keeper.check(nonce, "00000003", now + 10) == DigestNonceState.VALID
+    assert keeper.check(nonce, "00000004", now + 10) == DigestNonceState.REPLAY
+
+    # out of the window
+    assert keeper.check(nonce, "00000100", now + 10) == DigestNonceState.VALID
+    assert keeper.check(nonce, "00000006", now + 10) == DigestNonceState.REPLAY
+    assert keeper.check(nonce, "000000ff", now + 10) == DigestNonceState.VALID
+
+    # stale
+    assert keeper.check(nonce, "00000003", now + 301) == DigestNonceState.STALE
+
+    # invalid
+    assert keeper.check("bad-nonce", "00000001", now) == DigestNonceState.INVALID
+    assert keeper.check(nonce[:-1] + "x", "00000001", now) == DigestNonceState.INVALID
+    other_keeper = HTTPDigestNonceKeeper(secret="other-secret", lifetime=300)
+    assert other_keeper.check(nonce, "00000001", now) == DigestNonceState.INVALID
+
+    # expired buckets are dropped
+    assert len(keeper) == 1
+    new_nonce = keeper.new(now + 900)
+    assert keeper.check(new_nonce, "00000001", now + 900) == DigestNonceState.VALID
+    assert len(keeper) == 1
+
+
+def test_http_digest_secret():
+    config = Config()
+    config.http_digest_auth.secret = "shared-secret"
+    nonce = DAVAuth(config).http_digest_auth.nonce_keeper.new()
+
+    # another worker
+    keeper = DAVAuth(config).http_digest_auth.nonce_keeper
+    assert keeper.check(nonce, "00000001") == DigestNonceState.VALID
+
+    # random secret
+    keeper = DAVAuth(Config()).http_digest_auth.nonce_keeper
+    assert keeper.check(nonce, "00000001") == DigestNonceState.INVALID
+
+
+def _get_digest_challenge_data(response) -> dict[str, str]:
+    challenge = response.headers.get(b"WWW-Authenticate").decode("utf-8")
+    assert challenge.startswith("Digest ")
+    return DAVAuth(Config()).http_digest_auth.authorization_str_parser_to_data(
+        challenge[7:]
+    )
+
+
+def _create_digest_authorization(
+    username: str, password: str, nonce: str, nc: str
+) -> str:
+    realm, uri, cnonce = "ASGI-WebDAV", "/", "0a4f113b"
+    ha1 = hashlib.md5(f"{username}:{realm}:{password}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"GET:{uri}".encode()).hexdigest()
+    response = hashlib.md5(
+        f"{ha1}:{nonce}:{nc}:{cnonce}:auth:{ha2}".encode()
+    ).hexdigest()
+    return (
+        f'Digest username="{username}", realm="{realm}", nonce="{nonce}", '
+        f'uri="{uri}", response="{response}", algorithm="MD5", '
+        f'opaque="opaque", qop=auth, nc={nc}, cnonce="{cnonce}"'
+    )
+
+
+@pytest.mark.asyncio
+async def test_dav_auth_pick_out_user_digest():
+    config = generate_config_from_dict(
+        BASIC_AUTHORIZATION_CONFIG_DATA, complete_config=True
+    )
+    config.http_digest_auth.enable = True
+    config.http_digest_auth.disable_rule = ""
+    dav_auth = DAVAuth(config)
+
+    # challenge
+    request = get_dav_request({})
+    assert await dav_auth.pick_out_user(request) is not None
+    challenge_data = _get_digest_challenge_data(
+        dav_auth.create_response_401(request, "")
+    )
+    assert challenge_data["stale"] == "false"
+    nonce = challenge_data["nonce"]
+
+    # reuse nonce without new challenge
+    for nc in ["00000001", "00000002", "00000003"]:
+        request = get_dav_request(
+            {
+                "authorization": _create_digest_authorization(
+                    USERNAME, PASSWORD, nonce, nc
+                )
+            }
+        )
+        assert await dav_auth.pick_out_user(request) is None
+        assert request.user.username == USERNAME
+        assert request.authorization_method == "Digest"
+
+    # replay
+    request = get_dav_request(
+        {
+            "authorization": _create_digest_authorization(
+                USERNAME, PASSWORD, nonce, "00000002"
+            )
+        }
+    )
+    assert await dav_auth.pick_out_user(request) is not None
+    assert not request.authorization_stale
+
+    # wrong password
+    request = get_dav_request(
+        {
+            "authorization": _create_digest_authorization(
+                USERNAME, "bad-password", nonce, "00000004"
+            )
+        }
+    )
+    assert await dav_auth.pick_out_user(request) is not None
+    assert not request.authorization_stale
+
+    # nonce not issued by server
+    request = get_dav_request(
+        {
+            "authorization": _create_digest_authorization(
+                USERNAME, PASSWORD, "0" * 40, "00000001"
+            )
+        }
+    )
+    assert await dav_auth.pick_out_user(request) is not None
+    assert not request.authorization_stale
+
+    # stale nonce
+    stale_nonce = dav_auth.http_digest_auth.nonce_keeper.new(
+        now=1_700_000_000 - config.http_digest_auth.nonce_lifetime
+    )
+    request = get_dav_request(
+        {
+            "authorization": _create_digest_authorization(
+                USERNAME, PASSWORD, stale_nonce, "00000001"
+            )
+        }
+    )
+    assert await dav_auth.pick_out_user(request) is not None
+    assert request.authorization_stale
+    challenge_data = _get_digest_challenge_data(
+        dav_auth.create_response_401(request, "")
+    )
+    assert challenge_data["stale"] == "true"
+    assert challenge_data["nonce"] != stale_nonce
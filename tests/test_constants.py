@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
 import pytest
@@ -11,7 +12,7 @@ def test_DAVPath_basic():
     path = DAVPath("/a/b/c")
 
     assert path.raw == "/a/b/c"
-    assert path.parts == ["a", "b", "c"]
+    assert path.parts == ("a", "b", "c")
     assert path.parts_count == 3
     assert path.parent == DAVPath("/a/b")
     assert path.name == "c"
@@ -91,6 +92,28 @@ def test_DAVPath_method():
 
     assert DAVPath("/a/b/c").add_child("d") == DAVPath("/a/b/c/d")
 
+    # root and self
+    assert DAVPath("/a/b").get_child(DAVPath("/a/b")) == DAVPath("/")
+    assert DAVPath("/a/b").get_child(DAVPath("/")) == DAVPath("/a/b")
+    assert DAVPath("/").add_child("a") == DAVPath("/a")
+    assert DAVPath("/a").add_child(DAVPath("/")) == DAVPath("/a")
+    assert DAVPath("/a").parent.raw == "/"
+    assert DAVPath("/a/b/c").add_child("d").parts == ("a", "b", "c", "d")
+    assert DAVPath("/a/b/c").parent.parts == ("a", "b")
+    assert DAVPath("/a/b/c").get_child(DAVPath("/a")).raw == "/b/c"
+    # not under the parent, eg: Destination in another provider
+    assert DAVPath("/x/y").get_child(DAVPath("/a/b")) == DAVPath("/x/y")
+    assert DAVPath("/a").get_child(DAVPath("/a/b")) == DAVPath("/a")
+    assert DAVPath("/ab/c").get_child(DAVPath("/a")) == DAVPath("/ab/c")
+    assert DAVPath(parts=["a", "b"], count=2) == DAVPath("/a/b")
+
+
+def test_DAVPath_intern():
+    path = DAVPath("/intern/a").intern()
+    assert DAVPath("/intern/a").intern() is path
+    assert DAVPath("/intern/b").intern() is not path
+    assert DAVPath("/").intern() is DAVPath("/").parent
+
 
 def test_DAVPath_magic_method():
     # hash
@@ -129,6 +152,28 @@ def test_DAVTime():
     assert dt.display(timezone_shanghai) == "1970-01-01 08:00:00+08:00"
 
 
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        0.0,
+        1.5,
+        -1.25,
+        784111777.0,
+        951782400.9999999,  # microsecond rounding carry, 2000-02-29
+        1700000000.123456,
+        4102444799.5,
+    ],
+)
+def test_DAVTime_format_same_as_datetime(timestamp):
+    dt = DAVTime(timestamp)
+    data = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+    assert dt.data == data
+    assert dt.iso_8601 == data.isoformat()
+    assert dt.w3c == data.isoformat(" ")
+    assert dt.http_date == data.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+
 def test_DAVTime_from_milliseconds():
     """测试从毫秒时间戳创建 DAVTime 实例"""
     # 测试 0 毫秒，对应 Unix 纪元
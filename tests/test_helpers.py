@@ -5,11 +5,14 @@ from asgi_webdav.config import get_global_config
 from asgi_webdav.constants import AppEntryParameters
 from asgi_webdav.helpers import (
     detect_charset,
+    generate_etag,
+    generate_strong_etag,
     get_dict_from_xml,
     get_str_from_first_brackets,
     get_timezone,
     guess_type,
     is_browser_user_agent,
+    is_etag,
 )
 
 from .kits.common import (
@@ -21,6 +24,22 @@ from .kits.common import (
 )
 
 
+def test_generate_etag():
+    assert generate_etag(0, 0) == 'W/"0-0-0"'
+    assert generate_etag(1024, 1_700_000_000_123_456_789, 42) == (
+        'W/"2a-400-17979cfe3d85cd15"'
+    )
+    assert generate_strong_etag("abc") == '"abc"'
+
+    assert is_etag(generate_etag(1024, 1_700_000_000_123_456_789, 42))
+    assert is_etag(generate_strong_etag("abc"))
+    assert is_etag('W/"aec2d98e33b04a06a67a292f66337302"')
+    assert is_etag('""')
+    assert is_etag("abc") is False
+    assert is_etag('"a"b"') is False
+    assert is_etag("Wed, 21 Oct 2015 07:28:00 GMT") is False
+
+
 def test_guess_type():
     config = get_global_config()
     config.update_from_app_args_and_env_and_default_value(AppEntryParameters())
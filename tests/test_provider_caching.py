@@ -0,0 +1,178 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from asgi_webdav.config import generate_config_from_dict
+from asgi_webdav.constants import DAVPath
+from asgi_webdav.provider.caching import (
+    CACHING_PROVIDER_DIR_NAME,
+    CachingProvider,
+    DAVContentCache,
+)
+from asgi_webdav.response import DAVResponse
+from asgi_webdav.server import DAVApp
+
+from .test_webdav_method import fake_send, get_response_content, get_test_scope
+
+
+def _get_caching_test_app(origin_root: Path, cache: dict) -> DAVApp:
+    config = generate_config_from_dict(
+        {
+            "account_mapping": [
+                {"username": "username", "password": "password", "permissions": ["+"]}
+            ],
+            "provider_mapping": [
+                {
+                    "prefix": "/",
+                    "uri": f"cache+file://{origin_root}",
+                    "cache": cache,
+                }
+            ],
+        }
+    )
+    return DAVApp(config)
+
+
+async def _request(
+    app: DAVApp,
+    method: str,
+    path: str,
+    data: bytes = b"",
+    headers: dict[bytes, bytes] | None = None,
+) -> tuple[DAVResponse, bytes]:
+    scope, receive = get_test_scope(method, data, path)
+    if headers:
+        scope["headers"].extend(headers.items())
+    _, response = await app.handle(scope, receive, fake_send)
+    if method != "GET" or response.status not in (200, 206):
+        return response, b""
+
+    return response, await get_response_content(response)
+
+
+def _update_origin_file(fs_path: Path, content: bytes) -> None:
+    mtime = fs_path.stat().st_mtime
+    fs_path.write_bytes(content)
+    os.utime(fs_path, (mtime + 10, mtime + 10))
+
+
+@pytest.mark.asyncio
+async def test_content_cache_lru_eviction(tmp_path):
+    # unrelated files in the configured path are kept
+    tmp_path.joinpath("other.cache").write_bytes(b"other")
+    cache_path = tmp_path.joinpath(CACHING_PROVIDER_DIR_NAME)
+    cache_path.mkdir()
+    cache_path.joinpath("last-run.cache").write_bytes(b"last run")
+
+    for path in (None, tmp_path):
+        cache = DAVContentCache(size=10, entry_max_size=6, path=path)
+        if path is not None:
+            assert cache.path == cache_path
+            assert tmp_path.joinpath("other.cache").read_bytes() == b"other"
+            assert not cache_path.joinpath("last-run.cache").exists()
+
+        await cache.set(DAVPath("/a"), "a", 1.0, b"aaaa")
+        await cache.set(DAVPath("/b"), "b", 1.0, b"bbbb")
+        await cache.set(DAVPath("/c"), "c", 1.0, b"c" * 7)  # too big
+        assert cache.get(DAVPath("/c"), "c", 1.0) is None
+        assert cache.get(DAVPath("/a"), "a", 1.0) is not None
+
+        await cache.set(DAVPath("/d"), "d", 1.0, b"dddd")  # evict /b
+        assert cache.get(DAVPath("/b"), "b", 1.0) is None
+        assert cache.get(DAVPath("/a"), "a", 1.0) is not None
+        assert cache.current_size == 8
+        assert cache.evictions == 1
+
+        # changed on origin
+        assert cache.get(DAVPath("/a"), "a2", 1.0) is None
+        assert cache.current_size == 4
+
+        if path is not None:
+            assert len(list(cache_path.glob("*.cache"))) == 1
+
+        cache.remove_tree(DAVPath("/"))
+        assert cache.current_size == 0
+        if path is not None:
+            assert len(list(cache_path.glob("*.cache"))) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cache_tier", ["memory", "disk"])
+async def test_caching_provider(tmp_path, cache_tier):
+    origin_root = tmp_path.joinpath("origin")
+    origin_root.mkdir()
+    cache_path = tmp_path.joinpath("cache")
+    cache = {"metadata_ttl": 0}
+    if cache_tier == "disk":
+        cache["path"] = str(cache_path)
+
+    app = _get_caching_test_app(origin_root, cache)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    assert isinstance(provider, CachingProvider)
+    content_cache = provider.content_cache
+
+    response, _ = await _request(app, "PUT", "/file.txt", b"0123456789")
+    assert response.status == 201
+    assert origin_root.joinpath("file.txt").read_bytes() == b"0123456789"
+
+    # miss, fill the cache
+    response, content = await _request(app, "GET", "/file.txt")
+    assert response.status == 200
+    assert content == b"0123456789"
+    assert content_cache.get_info()["entries"] == 1
+    if cache_tier == "disk":
+        assert len(list(cache_path.glob(f"{CACHING_PROVIDER_DIR_NAME}/*.cache"))) == 1
+
+    # hit
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"0123456789"
+    response, content = await _request(
+        app, "GET", "/file.txt", headers={b"range": b"bytes=2-4"}
+    )
+    assert response.status == 206
+    assert content == b"234"
+    assert content_cache.hits == 2
+
+    # changed on origin, validated with ETag
+    _update_origin_file(origin_root.joinpath("file.txt"), b"abcdefghij")
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"abcdefghij"
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"abcdefghij"
+    assert content_cache.hits == 3
+
+    # write through, invalidate the cache
+    response, _ = await _request(app, "PUT", "/file.txt", b"new")
+    assert content_cache.get_info()["entries"] == 0
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"new"
+
+    response, _ = await _request(app, "DELETE", "/file.txt")
+    assert response.status == 204
+    assert content_cache.get_info()["entries"] == 0
+    response, _ = await _request(app, "GET", "/file.txt")
+    assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_metadata_ttl(tmp_path):
+    app = _get_caching_test_app(tmp_path, {"metadata_ttl": 60})
+    response, _ = await _request(app, "PUT", "/file.txt", b"0123456789")
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"0123456789"
+
+    # metadata is not expired, serve from cache
+    _update_origin_file(tmp_path.joinpath("file.txt"), b"abcdefghij")
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"0123456789"
+
+    response, _ = await _request(app, "HEAD", "/file.txt")
+    assert response.status == 200
+
+    # expired
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    provider.metadata_ttl = 0
+    provider._metadata.clear()
+    response, content = await _request(app, "GET", "/file.txt")
+    assert content == b"abcdefghij"
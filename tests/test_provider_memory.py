@@ -1,7 +1,15 @@
+import asyncio
+from pathlib import Path
+
 import pytest
 
+from asgi_webdav.config import generate_config_from_dict
 from asgi_webdav.constants import DAVPath
 from asgi_webdav.provider.memory import MemoryFS
+from asgi_webdav.response import DAVResponse
+from asgi_webdav.server import DAVApp
+
+from .test_webdav_method import fake_send, get_response_content, get_test_scope
 
 root_path = DAVPath("/")
 p1_path = root_path.add_child("p1")
@@ -80,3 +88,173 @@ def test_get_node_children(fs):
     assert len(fs.get_node_children(fs.get_node(DAVPath("/p1/f1_1")))) == 0
 
     assert len(fs.get_node_children(fs.get_node(DAVPath("/")), recursive=True)) == 5
+
+
+def _get_snapshot_test_app(snapshot_path: Path, interval: int = 0) -> DAVApp:
+    config = generate_config_from_dict(
+        {
+            "account_mapping": [
+                {"username": "username", "password": "password", "permissions": ["+"]}
+            ],
+            "provider_mapping": [
+                {
+                    "prefix": "/memory",
+                    "uri": "memory:///",
+                    "ignore_property_extra": False,
+                }
+            ],
+            "memory_snapshot": {
+                "enable": True,
+                "path": str(snapshot_path),
+                "interval": interval,
+            },
+        }
+    )
+    return DAVApp(config)
+
+
+async def _request(
+    app: DAVApp,
+    method: str,
+    path: str,
+    data: bytes = b"",
+    dst_path: str | None = None,
+    headers: dict[bytes, bytes] | None = None,
+) -> DAVResponse:
+    scope, receive = get_test_scope(method, data, path, dst_path)
+    if headers:
+        scope["headers"].extend(headers.items())
+    _, response = await app.handle(scope, receive, fake_send)
+    return response
+
+
+async def _get_content(app: DAVApp, path: str) -> bytes | None:
+    response = await _request(app, "GET", path)
+    if response.status != 200:
+        return None
+
+    return await get_response_content(response)
+
+
+_PROPPATCH_BODY = (
+    b'<?xml version="1.0" encoding="utf-8" ?>'
+    b'<D:propertyupdate xmlns:D="DAV:"><D:set><D:prop>'
+    b'<color xmlns="http://example.com/ns">blue</color>'
+    b"</D:prop></D:set></D:propertyupdate>"
+)
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_journal(tmp_path):
+    app = _get_snapshot_test_app(tmp_path)
+    assert (await _request(app, "MKCOL", "/memory/dir")).status == 201
+    assert (await _request(app, "PUT", "/memory/dir/f1", b"content 1")).status == 201
+    assert (await _request(app, "PUT", "/memory/dir/f1", b"content 1+")).status == 201
+    assert (
+        await _request(app, "PROPPATCH", "/memory/dir/f1", _PROPPATCH_BODY)
+    ).status == 207
+    assert (await _request(app, "PUT", "/memory/f2", b"content 2")).status == 201
+    response = await _request(
+        app, "COPY", "/memory/dir", dst_path="/memory/dir2", headers={b"depth": b"1"}
+    )
+    assert response.status in (201, 204)
+    response = await _request(app, "MOVE", "/memory/f2", dst_path="/memory/dir2/f3")
+    assert response.status in (201, 204)
+    assert (await _request(app, "DELETE", "/memory/dir2/f1")).status == 204
+
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    etag = provider.fs.get_node(DAVPath("/dir/f1")).property_basic_data.etag
+
+    # restart, replay the journal
+    app = _get_snapshot_test_app(tmp_path)
+    assert await _get_content(app, "/memory/dir/f1") == b"content 1+"
+    assert await _get_content(app, "/memory/dir2/f3") == b"content 2"
+    assert await _get_content(app, "/memory/dir2/f1") is None
+    assert await _get_content(app, "/memory/f2") is None
+
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    node = provider.fs.get_node(DAVPath("/dir/f1"))
+    assert node.property_basic_data.etag == etag
+    assert node.property_extra_data == {("http://example.com/ns", "color"): "blue"}
+
+    # snapshot, the journals are removed
+    await provider.snapshot.take_snapshot()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "%2Fmemory.journal.3",
+        "%2Fmemory.snapshot",
+    ]
+
+    # restart, load the snapshot, content is materialized on first read
+    app = _get_snapshot_test_app(tmp_path)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    node = provider.fs.get_node(DAVPath("/dir/f1"))
+    assert node.content_view is not None
+    assert node.property_basic_data.etag == etag
+    assert node.property_basic_data.content_length == len(b"content 1+")
+    assert node.property_extra_data == {("http://example.com/ns", "color"): "blue"}
+    assert await _get_content(app, "/memory/dir/f1") == b"content 1+"
+    assert node.content_view is None
+    assert await _get_content(app, "/memory/dir2/f3") == b"content 2"
+
+    # truncated journal record is skipped
+    assert (await _request(app, "PUT", "/memory/f4", b"content 4")).status == 201
+    assert (await _request(app, "PUT", "/memory/f5", b"content 5")).status == 201
+    journal_path = tmp_path.joinpath("%2Fmemory.journal.4")
+    journal_path.write_bytes(journal_path.read_bytes()[:-1])
+
+    app = _get_snapshot_test_app(tmp_path)
+    assert await _get_content(app, "/memory/f4") == b"content 4"
+    assert await _get_content(app, "/memory/f5") is None
+    assert await _get_content(app, "/memory/dir/f1") == b"content 1+"
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_interval(tmp_path):
+    app = _get_snapshot_test_app(tmp_path, interval=1)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    assert (await _request(app, "PUT", "/memory/f1", b"content 1")).status == 201
+    assert not tmp_path.joinpath("%2Fmemory.snapshot").exists()
+
+    for _ in range(30):
+        await asyncio.sleep(0.1)
+        if tmp_path.joinpath("%2Fmemory.snapshot").exists():
+            break
+    provider.snapshot._snapshot_task.cancel()
+
+    app = _get_snapshot_test_app(tmp_path)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    assert provider.fs.get_node(DAVPath("/f1")).content_view is not None
+    assert await _get_content(app, "/memory/f1") == b"content 1"
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_close(tmp_path):
+    app = _get_snapshot_test_app(tmp_path, interval=3600)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    assert (await _request(app, "PUT", "/memory/f1", b"content 1")).status == 201
+    snapshot_task = provider.snapshot._snapshot_task
+    assert snapshot_task is not None
+
+    # shutdown, the final snapshot is taken
+    await app.web_dav.close()
+    assert snapshot_task.cancelled()
+    assert provider.snapshot._journal is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "%2Fmemory.journal.2",
+        "%2Fmemory.snapshot",
+    ]
+    assert tmp_path.joinpath("%2Fmemory.journal.2").stat().st_size == 0
+
+    # restart, nothing to replay; the mmap is released on close
+    app = _get_snapshot_test_app(tmp_path)
+    provider = app.web_dav.prefix_provider_mapping[0].provider
+    assert not provider.snapshot._journal_dirty
+    assert await _get_content(app, "/memory/f1") == b"content 1"
+    await app.web_dav.close()
+    assert provider.snapshot._mmap is None
+    # not modified, no snapshot again
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "%2Fmemory.journal.2",
+        "%2Fmemory.journal.3",
+        "%2Fmemory.snapshot",
+    ]
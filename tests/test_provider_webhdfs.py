@@ -1,18 +1,28 @@
+import asyncio
+from importlib.util import find_spec
+from time import monotonic
 from unittest.mock import AsyncMock, MagicMock
+from urllib.parse import parse_qsl
 
 import httpx
 import pytest
 
-from asgi_webdav.config import Config
+from asgi_webdav.config import Config, WebHDFS
 from asgi_webdav.constants import (
+    DAVDepth,
     DAVPath,
     DAVRangeType,
     DAVRequestRange,
     DAVTime,
     DAVUser,
 )
+from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
 from asgi_webdav.property import DAVProperty, DAVPropertyBasicData
-from asgi_webdav.provider.webhdfs import WebHDFSProvider
+from asgi_webdav.provider.webhdfs import (
+    WebHDFSProvider,
+    _create_not_found_error,
+    _DelegationTokenRetryTransport,
+)
 from asgi_webdav.request import DAVRequest
 
 
@@ -25,6 +35,7 @@ def mock_provider(mock_config):
         prefix="",
         read_only=False,
         ignore_property_extra=False,
+        webhdfs=WebHDFS(),
     )
     provider.client = AsyncMock()
     return provider
@@ -392,19 +403,6 @@ async def test_do_put(mock_provider, fake_request):
     assert response == 201
 
 
-@pytest.mark.asyncio
-async def test_do_copy(mock_provider, fake_request):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json = MagicMock(return_value={"FileStatus": {}})
-    mock_response.raise_for_status = MagicMock()
-
-    mock_provider.client.get.return_value = mock_response
-
-    with pytest.raises(NotImplementedError):
-        await mock_provider._do_copy(fake_request)
-
-
 @pytest.mark.asyncio
 async def test_do_mkcol(mock_provider, fake_request):
     mock_response = MagicMock()
@@ -507,6 +505,7 @@ async def test_do_head(mock_provider, fake_request):
 
 @pytest.mark.asyncio
 async def test_do_precheck_destination(mock_provider, fake_request):
+    fake_request.dist_dst_path = DAVPath("/testfile2.txt")
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.json = MagicMock(return_value={"FileStatus": {}})
@@ -550,3 +549,671 @@ async def test_do_move_destination_exists_no_overwrite(mock_provider, fake_reque
     result = await mock_provider._do_move(fake_request)
 
     assert result == 403
+
+
+def test_create_client_config():
+    webhdfs = WebHDFS(max_connections=8, read_timeout=120.0)
+    provider = WebHDFSProvider(
+        config=Config(),
+        prefix=DAVPath(),
+        uri="http://fake-hdfs:9870/webhdfs/v1",
+        home_dir=False,
+        read_only=False,
+        ignore_property_extra=False,
+        webhdfs=webhdfs,
+    )
+    assert provider.client.timeout.read == 120.0
+    assert provider.client.timeout.connect == webhdfs.connect_timeout
+
+
+@pytest.mark.skipif(find_spec("h2") is not None, reason="h2 is installed")
+def test_create_client_http2_without_h2():
+    with pytest.raises(DAVExceptionProviderInitFailed):
+        WebHDFSProvider(
+            config=Config(),
+            prefix=DAVPath(),
+            uri="http://fake-hdfs:9870/webhdfs/v1",
+            home_dir=False,
+            read_only=False,
+            ignore_property_extra=False,
+            webhdfs=WebHDFS(enable_http2=True),
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_url_query(mock_provider, fake_request):
+    url = await mock_provider._get_url(
+        fake_request, DAVPath("/a/file%231.txt"), "OPEN", offset=10
+    )
+    assert url == (
+        "http://fake-hdfs:9870/webhdfs/v1/a/file%231.txt"
+        "?op=OPEN&offset=10&doAs=testuser"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_url_with_delegation_token(mock_provider, fake_request):
+    mock_provider.enable_delegation_token = True
+
+    mock_response = MagicMock()
+    mock_response.raise_for_status = MagicMock()
+    mock_response.json = MagicMock(return_value={"Token": {"urlString": "TOKEN"}})
+    mock_provider.client.get.return_value = mock_response
+
+    urls = await asyncio.gather(
+        mock_provider._get_url(fake_request, DAVPath("/file.txt"), "OPEN"),
+        mock_provider._get_url(fake_request, DAVPath("/file.txt"), "GETFILESTATUS"),
+    )
+    assert urls == [
+        "http://fake-hdfs:9870/webhdfs/v1/file.txt?op=OPEN&delegation=TOKEN",
+        "http://fake-hdfs:9870/webhdfs/v1/file.txt?op=GETFILESTATUS&delegation=TOKEN",
+    ]
+    # fetched once
+    mock_provider.client.get.assert_called_once_with(
+        "http://fake-hdfs:9870/webhdfs/v1/?op=GETDELEGATIONTOKEN&doAs=testuser"
+    )
+
+    # expired
+    mock_provider.delegation_token_ttl = 0
+    mock_provider._delegation_tokens.clear()
+    await mock_provider._get_url(fake_request, DAVPath("/file.txt"), "OPEN")
+    await mock_provider._get_url(fake_request, DAVPath("/file.txt"), "OPEN")
+    assert mock_provider.client.get.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_delegation_token_rejected(mock_provider):
+    mock_provider._delegation_tokens["testuser"] = (monotonic() + 3600, "OLD")
+
+    mock_response = MagicMock()
+    mock_response.raise_for_status = MagicMock()
+    mock_response.json = MagicMock(return_value={"Token": {"urlString": "NEW"}})
+    mock_provider.client.get.return_value = mock_response
+
+    tokens = list()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.url.params.get("delegation")
+        tokens.append(token)
+        return httpx.Response(200 if token == "NEW" else 403)
+
+    client = httpx.AsyncClient(
+        transport=_DelegationTokenRetryTransport(
+            httpx.MockTransport(handler), mock_provider
+        )
+    )
+
+    # the namenode restarted, retry once with a new token
+    response = await client.get("http://fake-hdfs:9870/webhdfs/v1/a?delegation=OLD")
+    assert response.status_code == 200
+    assert tokens == ["OLD", "NEW"]
+    assert mock_provider._delegation_tokens["testuser"][1] == "NEW"
+
+    # sent with the old token before the renewal, no fetch again
+    tokens.clear()
+    response = await client.get("http://fake-hdfs:9870/webhdfs/v1/a?delegation=OLD")
+    assert response.status_code == 200
+    assert tokens == ["OLD", "NEW"]
+    mock_provider.client.get.assert_called_once()
+
+    # unknown token, not a delegation request
+    tokens.clear()
+    response = await client.get("http://fake-hdfs:9870/webhdfs/v1/a?delegation=BAD")
+    assert response.status_code == 403
+    response = await client.get("http://fake-hdfs:9870/webhdfs/v1/a?doAs=testuser")
+    assert response.status_code == 403
+    assert tokens == ["BAD", None]
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_close():
+    provider = WebHDFSProvider(
+        config=Config(),
+        prefix=DAVPath(),
+        uri="http://fake-hdfs:9870/webhdfs/v1",
+        home_dir=False,
+        read_only=False,
+        ignore_property_extra=False,
+        webhdfs=WebHDFS(enable_delegation_token=True),
+    )
+    await provider.close()
+    assert provider.client.is_closed
+
+
+def _create_file_status_response(file_status: dict | None) -> MagicMock:
+    response = MagicMock()
+    if file_status is None:
+        response.status_code = 404
+        response.raise_for_status = MagicMock(
+            side_effect=httpx.HTTPStatusError(
+                "error", request=MagicMock(), response=MagicMock(status_code=404)
+            )
+        )
+    else:
+        response.status_code = 200
+        response.raise_for_status = MagicMock()
+        response.json = MagicMock(return_value={"FileStatus": file_status})
+
+    return response
+
+
+@pytest.mark.asyncio
+async def test_do_filestatus_cache(mock_provider, fake_request):
+    mock_provider.client.get = AsyncMock(
+        return_value=_create_file_status_response({"type": "FILE", "length": 1})
+    )
+    url_path = DAVPath("/testfile.txt")
+
+    # in flight, one round trip
+    results = await asyncio.gather(
+        mock_provider._do_filestatus(fake_request, url_path),
+        mock_provider._do_filestatus(fake_request, url_path),
+    )
+    assert results[0] == results[1] == (200, {"type": "FILE", "length": 1})
+    assert mock_provider.client.get.call_count == 1
+
+    # cached
+    await mock_provider._do_filestatus(fake_request, url_path)
+    assert mock_provider.client.get.call_count == 1
+
+    # invalidated by parent's write
+    mock_provider._invalidate_file_status(DAVPath("/"))
+    mock_provider.client.get.return_value = _create_file_status_response(None)
+    with pytest.raises(httpx.HTTPStatusError):
+        await mock_provider._do_filestatus(fake_request, url_path)
+    assert mock_provider.client.get.call_count == 2
+
+    # not found is cached
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        await mock_provider._do_filestatus(fake_request, url_path)
+    assert exc_info.value.response.status_code == 404
+    assert mock_provider.client.get.call_count == 2
+
+    # disabled
+    mock_provider.metadata_ttl = 0
+    mock_provider._invalidate_file_status(url_path)
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await mock_provider._do_filestatus(fake_request, url_path)
+    assert mock_provider.client.get.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_do_put_round_trips(mock_provider, fake_request):
+    async def fake_receive():
+        return {"body": b"data", "more_body": False}
+
+    fake_request.receive = fake_receive
+    fake_request.dist_src_path = DAVPath("/dir/file.txt")
+
+    file_statuses = {
+        "/user/testuser/dir": {"type": "DIRECTORY"},
+        "/user/testuser/dir/file.txt": None,
+    }
+
+    async def fake_get(url):
+        path = url.split("webhdfs/v1", 1)[1].split("?", 1)[0]
+        return _create_file_status_response(file_statuses[path])
+
+    create_response = MagicMock(status_code=307)
+    create_response.headers = {"location": "http://datanode:9864/webhdfs/v1/x"}
+    data_response = MagicMock(status_code=201, raise_for_status=MagicMock())
+
+    mock_provider.client.get = AsyncMock(side_effect=fake_get)
+    mock_provider.client.put = AsyncMock(side_effect=[create_response, data_response])
+
+    assert await mock_provider._do_put(fake_request) == 201
+    assert mock_provider.client.get.call_count == 2
+    assert mock_provider.client.put.call_count == 2
+
+    # the new file is not cached as not found
+    file_statuses["/user/testuser/dir/file.txt"] = {"type": "FILE"}
+    parent_exists, file_exists, _ = await mock_provider._precheck_source(fake_request)
+    assert parent_exists and file_exists
+
+
+def _create_list_status_get(tree: dict[str, list[dict]], page_size: int):
+    def fake_get(url):
+        path, query = url.split("webhdfs/v1", 1)[1].split("?", 1)
+        params = dict(parse_qsl(query))
+        if params["op"] == "GETFILESTATUS":
+            return _create_file_status_response({"type": "DIRECTORY"})
+
+        children = tree[path]
+        if "startAfter" in params:
+            names = [child["pathSuffix"] for child in children]
+            children = children[names.index(params["startAfter"]) + 1 :]
+
+        response = MagicMock(status_code=200, raise_for_status=MagicMock())
+        response.json = MagicMock(
+            return_value={
+                "DirectoryListing": {
+                    "partialListing": {
+                        "FileStatuses": {"FileStatus": children[:page_size]}
+                    },
+                    "remainingEntries": max(len(children) - page_size, 0),
+                }
+            }
+        )
+        return response
+
+    return fake_get
+
+
+@pytest.mark.asyncio
+async def test_do_propfind_list_status_batch(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/dir")
+    fake_request.src_path = DAVPath("/dir")
+    fake_request.depth = DAVDepth.ONE
+
+    tree = {
+        "/user/testuser/dir": [
+            {"pathSuffix": f"part-{i:05}", "type": "FILE", "length": i}
+            for i in range(5)
+        ]
+    }
+    mock_provider.client.get = AsyncMock(
+        side_effect=_create_list_status_get(tree, page_size=2)
+    )
+
+    result = await mock_provider._do_propfind(fake_request)
+
+    # 1 GETFILESTATUS + 3 pages
+    assert mock_provider.client.get.call_count == 4
+    assert len(result) == 6
+    assert (
+        result[DAVPath("/user/testuser/dir/part-00004")].basic_data.content_length == 4
+    )
+
+
+@pytest.mark.asyncio
+async def test_do_propfind_infinity(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/dir")
+    fake_request.src_path = DAVPath("/dir")
+    fake_request.depth = DAVDepth.INFINITY
+
+    tree = {
+        "/user/testuser/dir": [
+            {"pathSuffix": "a", "type": "DIRECTORY"},
+            {"pathSuffix": "b", "type": "DIRECTORY"},
+            {"pathSuffix": "c.txt", "type": "FILE"},
+        ],
+        "/user/testuser/dir/a": [{"pathSuffix": "a.txt", "type": "FILE"}],
+        "/user/testuser/dir/b": [
+            {"pathSuffix": "b1", "type": "DIRECTORY"},
+        ],
+        "/user/testuser/dir/b/b1": [{"pathSuffix": "b1.txt", "type": "FILE"}],
+    }
+    mock_provider._list_status_semaphore = asyncio.Semaphore(1)
+    mock_provider.client.get = AsyncMock(
+        side_effect=_create_list_status_get(tree, page_size=2)
+    )
+
+    result = await mock_provider._do_propfind(fake_request)
+
+    assert set(result.keys()) == {
+        DAVPath("/dir"),
+        DAVPath("/user/testuser/dir/a"),
+        DAVPath("/user/testuser/dir/b"),
+        DAVPath("/user/testuser/dir/c.txt"),
+        DAVPath("/user/testuser/dir/a/a.txt"),
+        DAVPath("/user/testuser/dir/b/b1"),
+        DAVPath("/user/testuser/dir/b/b1/b1.txt"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_status_fallback(mock_provider, fake_request):
+    unsupported_response = MagicMock(status_code=400)
+    response = MagicMock(status_code=200, raise_for_status=MagicMock())
+    response.json = MagicMock(
+        return_value={
+            "FileStatuses": {"FileStatus": [{"pathSuffix": "a", "type": "FILE"}]}
+        }
+    )
+    mock_provider.client.get = AsyncMock(side_effect=[unsupported_response, response])
+
+    pages = [
+        page async for page in mock_provider._list_status(fake_request, DAVPath("/dir"))
+    ]
+
+    assert pages == [[{"pathSuffix": "a", "type": "FILE"}]]
+    assert "op=LISTSTATUS&" in mock_provider.client.get.call_args.args[0]
+    assert mock_provider._list_status_batch_supported is False
+
+
+class FakeWebHDFS:
+    """a namenode and a datanode in memory, for the COPY tests"""
+
+    def __init__(self, files: dict[str, bytes], dirs: set[str]):
+        self.files = files
+        self.dirs = dirs
+        self.ops: list[str] = list()
+
+    @staticmethod
+    def _parse(url: str) -> tuple[str, dict[str, str]]:
+        path, query = url.split("webhdfs/v1", 1)[1].split("?", 1)
+        return path, dict(parse_qsl(query))
+
+    async def get(self, url):
+        path, params = self._parse(url)
+        self.ops.append(params["op"])
+        if params["op"] == "GETFILESTATUS":
+            if path in self.dirs:
+                return _create_file_status_response({"type": "DIRECTORY"})
+            if path in self.files:
+                return _create_file_status_response(
+                    {"type": "FILE", "length": len(self.files[path])}
+                )
+            return _create_file_status_response(None)
+
+        children = [
+            {"pathSuffix": name.rsplit("/", 1)[1], "type": "FILE"}
+            for name in self.files
+            if name.rsplit("/", 1)[0] == path
+        ] + [
+            {"pathSuffix": name.rsplit("/", 1)[1], "type": "DIRECTORY"}
+            for name in self.dirs
+            if name.rsplit("/", 1)[0] == path
+        ]
+        response = MagicMock(status_code=200, raise_for_status=MagicMock())
+        response.json = MagicMock(
+            return_value={
+                "DirectoryListing": {
+                    "partialListing": {"FileStatuses": {"FileStatus": children}},
+                    "remainingEntries": 0,
+                }
+            }
+        )
+        return response
+
+    def stream(self, method, url, follow_redirects=False):
+        path, params = self._parse(url)
+        self.ops.append(params["op"])
+        offset = int(params.get("offset", 0))
+        data = self.files[path][offset:]
+        if "length" in params:
+            data = data[: int(params["length"])]
+
+        async def aiter_bytes():
+            for i in range(0, len(data), 2):
+                yield data[i : i + 2]
+
+        response = MagicMock(raise_for_status=MagicMock())
+        response.aiter_bytes = aiter_bytes
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=None)
+        return context
+
+    async def put(self, url, content=None):
+        if url.startswith("http://datanode"):
+            data = b""
+            async for chunk in content:
+                data += chunk
+            self.files[url.split("?", 1)[0][len("http://datanode") :]] = data
+            return MagicMock(status_code=201, raise_for_status=MagicMock())
+
+        path, params = self._parse(url)
+        self.ops.append(params["op"])
+        if params["op"] == "MKDIRS":
+            self.dirs.add(path)
+            return MagicMock(status_code=200, raise_for_status=MagicMock())
+
+        response = MagicMock(status_code=307)
+        response.headers = {"location": f"http://datanode{path}?op=CREATE"}
+        return response
+
+    async def post(self, url):
+        path, params = self._parse(url)
+        self.ops.append(params["op"])
+        for source in params["sources"].split(","):
+            self.files[path] += self.files.pop(source)
+        return MagicMock(status_code=200, raise_for_status=MagicMock())
+
+    async def delete(self, url):
+        path, params = self._parse(url)
+        self.ops.append(params["op"])
+        self.files.pop(path, None)
+        for name in [name for name in self.files if name.startswith(path + "/")]:
+            self.files.pop(name)
+        return MagicMock(status_code=200, raise_for_status=MagicMock())
+
+
+def _set_fake_webhdfs(mock_provider, fake_webhdfs: FakeWebHDFS) -> None:
+    mock_provider.client.get = AsyncMock(side_effect=fake_webhdfs.get)
+    mock_provider.client.stream = MagicMock(side_effect=fake_webhdfs.stream)
+    mock_provider.client.put = AsyncMock(side_effect=fake_webhdfs.put)
+    mock_provider.client.post = AsyncMock(side_effect=fake_webhdfs.post)
+    mock_provider.client.delete = AsyncMock(side_effect=fake_webhdfs.delete)
+
+
+@pytest.mark.asyncio
+async def test_do_copy_file(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a.txt")
+    fake_request.dist_dst_path = DAVPath("/b.txt")
+    fake_request.depth = DAVDepth.INFINITY
+    fake_webhdfs = FakeWebHDFS(
+        {"/user/testuser/a.txt": b"hello world"}, {"/user", "/user/testuser"}
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+
+    assert await mock_provider._do_copy(fake_request) == 201
+    assert fake_webhdfs.files["/user/testuser/b.txt"] == b"hello world"
+    assert "CONCAT" not in fake_webhdfs.ops
+
+    # the destination exists
+    fake_request.overwrite = False
+    assert await mock_provider._do_copy(fake_request) == 412
+
+    fake_request.overwrite = True
+    fake_webhdfs.files["/user/testuser/a.txt"] = b"new"
+    assert await mock_provider._do_copy(fake_request) == 204
+    assert fake_webhdfs.files["/user/testuser/b.txt"] == b"new"
+
+
+@pytest.mark.asyncio
+async def test_do_copy_file_not_found(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a.txt")
+    fake_request.dist_dst_path = DAVPath("/b.txt")
+    _set_fake_webhdfs(mock_provider, FakeWebHDFS({}, {"/user", "/user/testuser"}))
+
+    assert await mock_provider._do_copy(fake_request) == 404
+
+
+@pytest.mark.asyncio
+async def test_do_copy_file_concat(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a.bin")
+    fake_request.dist_dst_path = DAVPath("/b.bin")
+    fake_request.depth = DAVDepth.INFINITY
+    data = bytes(range(10))
+    fake_webhdfs = FakeWebHDFS(
+        {"/user/testuser/a.bin": data}, {"/user", "/user/testuser"}
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+    mock_provider.copy_segment_size = 4
+
+    assert await mock_provider._do_copy(fake_request) == 201
+    assert fake_webhdfs.files == {
+        "/user/testuser/a.bin": data,
+        "/user/testuser/b.bin": data,
+    }
+    assert fake_webhdfs.ops.count("OPEN") == 3
+    assert fake_webhdfs.ops.count("CONCAT") == 1
+
+
+@pytest.mark.asyncio
+async def test_do_copy_file_concat_failed(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a.bin")
+    fake_request.dist_dst_path = DAVPath("/b.bin")
+    fake_request.depth = DAVDepth.INFINITY
+    data = bytes(range(10))
+    fake_webhdfs = FakeWebHDFS(
+        {"/user/testuser/a.bin": data}, {"/user", "/user/testuser"}
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+    mock_provider.copy_segment_size = 4
+
+    # a segment failed, not an HTTP status error
+    stream = fake_webhdfs.stream
+
+    def stream_timeout(method, url, follow_redirects=False):
+        if "offset=8" in url:
+            raise httpx.ReadTimeout("timeout")
+        return stream(method, url, follow_redirects)
+
+    mock_provider.client.stream = MagicMock(side_effect=stream_timeout)
+    with pytest.raises(httpx.ReadTimeout):
+        await mock_provider._do_copy(fake_request)
+    assert fake_webhdfs.files == {"/user/testuser/a.bin": data}
+
+    # CONCAT failed, the truncated target is not left
+    mock_provider.client.stream = MagicMock(side_effect=stream)
+    response = MagicMock(status_code=500)
+    mock_provider.client.post = AsyncMock(
+        return_value=MagicMock(
+            raise_for_status=MagicMock(
+                side_effect=httpx.HTTPStatusError(
+                    "error", request=MagicMock(), response=response
+                )
+            )
+        )
+    )
+    assert await mock_provider._do_copy(fake_request) == 500
+    assert fake_webhdfs.files == {"/user/testuser/a.bin": data}
+
+
+@pytest.mark.asyncio
+async def test_do_copy_dir(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/src")
+    fake_request.dist_dst_path = DAVPath("/dst")
+    fake_request.depth = DAVDepth.INFINITY
+    fake_webhdfs = FakeWebHDFS(
+        {
+            "/user/testuser/src/a.txt": b"a",
+            "/user/testuser/src/sub/b.txt": b"b",
+        },
+        {"/user", "/user/testuser", "/user/testuser/src", "/user/testuser/src/sub"},
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+    mock_provider._copy_semaphore = asyncio.Semaphore(1)
+
+    assert await mock_provider._do_copy(fake_request) == 201
+    assert fake_webhdfs.files["/user/testuser/dst/a.txt"] == b"a"
+    assert fake_webhdfs.files["/user/testuser/dst/sub/b.txt"] == b"b"
+    assert "/user/testuser/dst/sub" in fake_webhdfs.dirs
+
+    # Depth: 0, the collection only
+    fake_request.dist_dst_path = DAVPath("/dst0")
+    fake_request.depth = DAVDepth.ZERO
+    assert await mock_provider._do_copy(fake_request) == 201
+    assert "/user/testuser/dst0" in fake_webhdfs.dirs
+    assert not [
+        name for name in fake_webhdfs.files if name.startswith("/user/testuser/dst0")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_do_copy_dst_under_src(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a")
+    fake_request.dist_dst_path = DAVPath("/a/b")
+    fake_request.depth = DAVDepth.INFINITY
+    fake_webhdfs = FakeWebHDFS(
+        {"/user/testuser/a/c.txt": b"c"},
+        {"/user", "/user/testuser", "/user/testuser/a"},
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+
+    assert await mock_provider._do_copy(fake_request) == 403
+    assert await mock_provider._do_move(fake_request) == 403
+    assert "MKDIRS" not in fake_webhdfs.ops
+    assert "/user/testuser/a/b" not in fake_webhdfs.dirs
+
+
+@pytest.mark.asyncio
+async def test_do_copy_src_under_dst(mock_provider, fake_request):
+    fake_request.dist_src_path = DAVPath("/a/b")
+    fake_request.dist_dst_path = DAVPath("/a")
+    fake_request.depth = DAVDepth.INFINITY
+    fake_request.overwrite = True
+    fake_webhdfs = FakeWebHDFS(
+        {"/user/testuser/a/b/c.txt": b"c"},
+        {"/user", "/user/testuser", "/user/testuser/a", "/user/testuser/a/b"},
+    )
+    _set_fake_webhdfs(mock_provider, fake_webhdfs)
+
+    assert await mock_provider._do_copy(fake_request) == 403
+    assert await mock_provider._do_move(fake_request) == 403
+    assert "DELETE" not in fake_webhdfs.ops
+    assert fake_webhdfs.files == {"/user/testuser/a/b/c.txt": b"c"}
+
+
+@pytest.mark.asyncio
+async def test_dav_response_data_generator_parallel(mock_provider, fake_request):
+    data = bytes(range(100))
+    fake_webhdfs = FakeWebHDFS({"/user/testuser/a.bin": data}, set())
+    stream = fake_webhdfs.stream
+
+    def slow_stream(method, url, follow_redirects=False):
+        context = stream(method, url, follow_redirects)
+        response = context.__aenter__.return_value
+        aiter_bytes = response.aiter_bytes
+
+        async def slow_aiter_bytes():
+            # the earlier segment is the slower one
+            delay = 0.01 if "offset" not in url else 0
+            async for chunk in aiter_bytes():
+                await asyncio.sleep(delay)
+                yield chunk
+
+        response.aiter_bytes = slow_aiter_bytes
+        return context
+
+    mock_provider.client.stream = MagicMock(side_effect=slow_stream)
+    mock_provider.enable_parallel_read = True
+    mock_provider.parallel_read_concurrency = 3
+    mock_provider.parallel_read_segment_size = 30
+
+    gen = mock_provider._dav_response_data_generator(
+        fake_request, DAVPath("/user/testuser/a.bin"), 0, 99
+    )
+    result = [(chunk, more) async for chunk, more in gen]
+
+    assert b"".join(chunk for chunk, _ in result) == data
+    assert [more for _, more in result] == [True] * (len(result) - 1) + [False]
+    assert fake_webhdfs.ops.count("OPEN") == 4
+
+    # a small range is read by one OPEN request
+    gen = mock_provider._dav_response_data_generator(
+        fake_request, DAVPath("/user/testuser/a.bin"), 10, 29
+    )
+    result = [chunk async for chunk, _ in gen]
+    assert b"".join(result) == data[10:30]
+    assert fake_webhdfs.ops.count("OPEN") == 5
+
+
+@pytest.mark.asyncio
+async def test_dav_response_data_generator_parallel_error(mock_provider, fake_request):
+    fake_webhdfs = FakeWebHDFS({"/user/testuser/a.bin": bytes(100)}, set())
+
+    def stream(method, url, follow_redirects=False):
+        context = fake_webhdfs.stream(method, url, follow_redirects)
+        if "offset=60" in url:
+            response = context.__aenter__.return_value
+            response.raise_for_status.side_effect = _create_not_found_error(
+                DAVPath("/user/testuser/a.bin")
+            )
+        return context
+
+    mock_provider.client.stream = MagicMock(side_effect=stream)
+    mock_provider.enable_parallel_read = True
+    mock_provider.parallel_read_segment_size = 30
+
+    gen = mock_provider._dav_response_data_generator(
+        fake_request, DAVPath("/user/testuser/a.bin"), 0, 99
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        async for _ in gen:
+            pass
@@ -1,10 +1,14 @@
 import pytest
 
-from asgi_webdav.constants import DAVDepth
+from asgi_webdav.constants import DAVDepth, DAVRequestContentRange
 from asgi_webdav.exceptions import DAVRequestParseError
 from asgi_webdav.request import (
     _parse_header_accept_encoding,
+    _parse_header_content_length,
+    _parse_header_content_range,
     _parse_header_depth,
+    _parse_header_if_modified_since,
+    _parse_header_if_none_match,
     _parse_header_overwrite,
 )
 
@@ -44,3 +48,63 @@ def test_parse_header_accept_encoding():
         _parse_header_accept_encoding(b"gzip, deflate, br, zstd")
         == "gzip, deflate, br, zstd"
     )
+
+
+def test_parse_header_content_length():
+    assert _parse_header_content_length(None) is None
+    assert _parse_header_content_length(b"0") == 0
+    assert _parse_header_content_length(b"3495") == 3495
+
+    # invalid
+    assert _parse_header_content_length(b"-1") is None
+    assert _parse_header_content_length(b"abc") is None
+
+
+def test_parse_header_content_range():
+    assert _parse_header_content_range(None) is None
+
+    content_range = _parse_header_content_range(b"bytes 0-499/1234")
+    assert content_range == DAVRequestContentRange(0, 499, 1234)
+    assert content_range.content_length == 500
+    assert _parse_header_content_range(b"bytes 500-1233/1234") == (
+        DAVRequestContentRange(500, 1233, 1234)
+    )
+
+    # query the uploaded offset
+    content_range = _parse_header_content_range(b"bytes */1234")
+    assert content_range == DAVRequestContentRange(None, None, 1234)
+    assert content_range.content_length == 0
+
+    # invalid
+    assert _parse_header_content_range(b"bytes 0-499/*") is None
+    assert _parse_header_content_range(b"bytes 500-499/1234") is None
+    assert _parse_header_content_range(b"bytes 0-1234/1234") is None
+    assert _parse_header_content_range(b"items 0-1/2") is None
+    assert _parse_header_content_range(b"invalid") is None
+
+
+def test_parse_header_if_none_match():
+    assert _parse_header_if_none_match(None) is None
+
+    assert _parse_header_if_none_match(b"*") == ["*"]
+    assert _parse_header_if_none_match(b'"abc"') == ['"abc"']
+    assert _parse_header_if_none_match(b'W/"67ab43", "54ed21", "7892dd"') == [
+        'W/"67ab43"',
+        '"54ed21"',
+        '"7892dd"',
+    ]
+    assert _parse_header_if_none_match(b"invalid") == []
+
+
+def test_parse_header_if_modified_since():
+    assert _parse_header_if_modified_since(None) is None
+
+    assert (
+        _parse_header_if_modified_since(b"Wed, 21 Oct 2015 07:28:00 GMT")
+        == 1445412480.0
+    )
+    assert _parse_header_if_modified_since(b"Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+
+    # invalid
+    assert _parse_header_if_modified_since(b"invalid") is None
+    assert _parse_header_if_modified_since(b"") is None
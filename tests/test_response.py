@@ -1,7 +1,9 @@
+import zlib
 from collections.abc import AsyncGenerator
 
-from asgi_webdav.config import Config
+from asgi_webdav.config import CompressionEncodingRule, Config
 from asgi_webdav.constants import (
+    DAVCompressLevel,
     DAVMethod,
     DAVRangeType,
     DAVResponseContentRange,
@@ -17,6 +19,10 @@ from asgi_webdav.response import (
     DAVSenderZstd,
     get_dav_sender,
     get_response_body_generator,
+    get_shannon_entropy,
+    is_incompressible,
+    negotiate_content_encoding,
+    parse_accept_encoding,
 )
 
 from .kits.common import (
@@ -313,3 +319,105 @@ def test_DAVResponseMethodNotAllowed():
     response = DAVResponseMethodNotAllowed(DAVMethod.GET)
     assert response.status == 405
     assert response.content == b"method:GET is not support method"
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("") == tuple()
+    assert parse_accept_encoding("gzip, deflate;q=0.5, *;q=0") == (
+        ("gzip", 1.0),
+        ("deflate", 0.5),
+        ("*", 0.0),
+    )
+    assert parse_accept_encoding("GZIP ; Q=0.8 ,zstd;q=2,br;q=x") == (
+        ("gzip", 0.8),
+        ("zstd", 1.0),
+        ("br", 0.0),
+    )
+
+
+def test_negotiate_content_encoding():
+    encodings = (DAVSenderName.ZSTD, DAVSenderName.DEFLATE, DAVSenderName.GZIP)
+
+    assert negotiate_content_encoding("", encodings) == DAVSenderName.RAW
+    assert negotiate_content_encoding("br", encodings) == DAVSenderName.RAW
+    # server's preference on a tie
+    assert negotiate_content_encoding("gzip, zstd", encodings) == DAVSenderName.ZSTD
+    # client's q-value first
+    assert (
+        negotiate_content_encoding("gzip, zstd;q=0.5", encodings) == DAVSenderName.GZIP
+    )
+    # q=0: not acceptable
+    assert negotiate_content_encoding("gzip;q=0", encodings) == DAVSenderName.RAW
+    assert negotiate_content_encoding("*, zstd;q=0", encodings) == DAVSenderName.DEFLATE
+    assert negotiate_content_encoding("*;q=0", encodings) == DAVSenderName.RAW
+
+
+def test_match_compression_method_with_encoding_rules():
+    config = Config()
+    config.compression.encoding_rules = [
+        CompressionEncodingRule(0, ["gzip", "zstd"]),
+        CompressionEncodingRule(64 * 1024, ["zstd", "gzip"]),
+    ]
+
+    def match(content_length: int | None) -> DAVSenderName:
+        response = DAVResponse(
+            200, content=get_response_body_generator(), content_length=content_length
+        )
+        return response._match_dav_sender(
+            config=config,
+            request_accept_encoding="gzip, deflate, zstd",
+            response_content_type_from_header=RESPONSE_HEADER_CONTENT_TYPE_TEXT_HTML,
+        )
+
+    assert match(4 * 1024) == DAVSenderName.GZIP
+    assert match(64 * 1024) == DAVSenderName.ZSTD
+    assert match(None) == DAVSenderName.ZSTD
+
+    config.compression.enable_zstd = False
+    assert match(64 * 1024) == DAVSenderName.GZIP
+
+
+def test_match_compression_method_with_content_type_rules():
+    config = Config()
+    config.compression.encoding_rules = [
+        CompressionEncodingRule(0),
+        CompressionEncodingRule(0, [], content_type_rule="^text/x-no-compress$"),
+        CompressionEncodingRule(
+            0,
+            ["gzip"],
+            content_type_rule="^text/",
+            level=DAVCompressLevel.BEST,
+        ),
+        CompressionEncodingRule(
+            0, ["deflate"], content_type_rule="^application/x-ndjson$"
+        ),
+    ]
+
+    def match(content_type: str) -> tuple[DAVSenderName, DAVCompressLevel | None]:
+        response = DAVResponse(200, content_length=64 * 1024)
+        sender_name = response._match_dav_sender(
+            config=config,
+            request_accept_encoding="gzip, deflate, zstd",
+            response_content_type_from_header=content_type,
+        )
+        return sender_name, response.compression_level
+
+    # generic rule
+    assert match("application/json") == (DAVSenderName.ZSTD, None)
+    # specific rule first
+    assert match("text/plain") == (DAVSenderName.GZIP, DAVCompressLevel.BEST)
+    # the type is compressible by rule
+    assert match("application/x-ndjson") == (DAVSenderName.DEFLATE, None)
+    assert match("application/zip") == (DAVSenderName.RAW, None)
+    # disabled by rule
+    assert match("text/x-no-compress")[0] == DAVSenderName.RAW
+
+
+def test_is_incompressible():
+    assert get_shannon_entropy(b"") == 0.0
+    assert get_shannon_entropy(b"aaaa") == 0.0
+    assert get_shannon_entropy(bytes(range(256))) == 8.0
+
+    assert is_incompressible(get_bytes(4096)) is False
+    assert is_incompressible(get_generate_random_bytes(4096))
+    assert is_incompressible(zlib.compress(get_generate_random_bytes(4096)))
@@ -1,11 +1,14 @@
 import pytest
 
-from asgi_webdav.config import Provider
+from asgi_webdav.config import S3, Config, Provider, WebHDFS
+from asgi_webdav.constants import DAVPath
 from asgi_webdav.exceptions import DAVExceptionProviderInitFailed
+from asgi_webdav.provider.caching import CachingProvider
 from asgi_webdav.provider.file_system import FileSystemProvider
 from asgi_webdav.provider.memory import MemoryProvider
+from asgi_webdav.provider.s3 import S3Provider
 from asgi_webdav.provider.webhdfs import WebHDFSProvider
-from asgi_webdav.web_dav import WebDAV
+from asgi_webdav.web_dav import PrefixProviderTrie, WebDAV
 
 
 def test_match_provider_class():
@@ -35,3 +38,104 @@ def test_match_provider_class():
                 type="wrong_http_provider",
             )
         )
+
+
+def test_prefix_provider_trie():
+    config = Config()
+    config.provider_mapping = [
+        Provider("/", "memory:///"),
+        Provider("/a", "memory:///"),
+        Provider("/a/b", "memory:///"),
+        Provider("/a/b/c", "memory:///"),
+        Provider("/a/d", "memory:///"),
+        Provider("/x/y", "memory:///"),
+    ]
+    web_dav = WebDAV(config)
+    providers = {
+        str(ppi.prefix): ppi.provider for ppi in web_dav.prefix_provider_mapping
+    }
+    trie = web_dav.prefix_provider_trie
+
+    # longest prefix match
+    assert trie.match(DAVPath("/")) == providers["/"]
+    assert trie.match(DAVPath("/other")) == providers["/"]
+    assert trie.match(DAVPath("/a")) == providers["/a"]
+    assert trie.match(DAVPath("/ab")) == providers["/"]
+    assert trie.match(DAVPath("/a/b/file")) == providers["/a/b"]
+    assert trie.match(DAVPath("/a/b/c/d/e")) == providers["/a/b/c"]
+    assert trie.match(DAVPath("/x")) == providers["/"]
+    assert trie.match(DAVPath("/x/y/z")) == providers["/x/y"]
+
+    # direct child providers
+    assert web_dav.get_depth_1_child_provider(DAVPath("/")) == [providers["/a"]]
+    assert web_dav.get_depth_1_child_provider(DAVPath("/a")) == [
+        providers["/a/b"],
+        providers["/a/d"],
+    ]
+    assert web_dav.get_depth_1_child_provider(DAVPath("/x")) == [providers["/x/y"]]
+    assert web_dav.get_depth_1_child_provider(DAVPath("/a/b/c")) == []
+    assert web_dav.get_depth_1_child_provider(DAVPath("/none")) == []
+
+    # not shared between instances
+    assert len(WebDAV(config).prefix_provider_mapping) == len(config.provider_mapping)
+
+
+def test_prefix_provider_trie_without_root():
+    def _create_provider() -> MemoryProvider:
+        return MemoryProvider(
+            config=Config(),
+            prefix=DAVPath("/a"),
+            uri="memory:///",
+            home_dir=False,
+            read_only=False,
+            ignore_property_extra=True,
+        )
+
+    trie = PrefixProviderTrie()
+    provider = _create_provider()
+    trie.add(DAVPath("/a"), provider)
+    trie.add(DAVPath("/a"), _create_provider())  # same prefix, first one wins
+
+    assert trie.match(DAVPath("/")) is None
+    assert trie.match(DAVPath("/b")) is None
+    assert trie.match(DAVPath("/a/b")) is provider
+    assert trie.get_depth_1_child_providers(DAVPath("/")) == [provider]
+
+
+def test_provider_options_per_provider():
+    config = Config()
+    config.provider_mapping = [
+        Provider(
+            "/hdfs1",
+            "http://namenode1:9870/webhdfs/v1",
+            type="webhdfs",
+            webhdfs=WebHDFS(read_timeout=120.0),
+        ),
+        Provider("/hdfs2", "http://namenode2:9870/webhdfs/v1", type="webhdfs"),
+        Provider(
+            "/hdfs3",
+            "cache+http://namenode3:9870/webhdfs/v1",
+            type="webhdfs",
+            webhdfs=WebHDFS(read_timeout=30.0),
+        ),
+        Provider("/s3a", "s3://a", s3=S3(endpoint_url="http://minio-a:9000")),
+        Provider("/s3b", "s3://b", s3=S3(access_key_id="key-b")),
+    ]
+    web_dav = WebDAV(config)
+    providers = {
+        str(ppi.prefix): ppi.provider for ppi in web_dav.prefix_provider_mapping
+    }
+
+    assert isinstance(providers["/hdfs1"], WebHDFSProvider)
+    assert providers["/hdfs1"].client.timeout.read == 120.0
+    assert isinstance(providers["/hdfs2"], WebHDFSProvider)
+    assert providers["/hdfs2"].client.timeout.read == WebHDFS().read_timeout
+    assert isinstance(providers["/hdfs3"], CachingProvider)
+    assert isinstance(providers["/hdfs3"].origin, WebHDFSProvider)
+    assert providers["/hdfs3"].origin.client.timeout.read == 30.0
+    assert isinstance(providers["/s3a"], S3Provider)
+    assert providers["/s3a"].endpoint_url == "http://minio-a:9000"
+    assert providers["/s3a"].access_key_id == ""
+    assert isinstance(providers["/s3b"], S3Provider)
+    assert providers["/s3b"].endpoint_url == S3().endpoint_url
+    assert providers["/s3b"].access_key_id == "key-b"
@@ -6,7 +6,7 @@ import pytest_asyncio
 from asgiref.typing import HTTPScope
 
 from asgi_webdav.config import Config, generate_config_from_dict
-from asgi_webdav.constants import RESPONSE_DATA_BLOCK_SIZE
+from asgi_webdav.constants import RESPONSE_DATA_BLOCK_SIZE, DAVPath
 from asgi_webdav.response import DAVResponse
 from asgi_webdav.server import DAVApp
 
@@ -246,6 +246,78 @@ async def test_method_copy_move(setup, provider_name):
     assert await get_response_content(response) == file_content
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider_name", PROVIDER_NAMES)
+async def test_method_get_head_conditional(setup, provider_name):
+    server, base_path = setup
+    file_path = f"{base_path}/conditional_file"
+
+    scope, receive = get_test_scope("PUT", b"conditional", file_path)
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 201
+
+    scope, receive = get_test_scope("GET", b"", file_path)
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 200
+    etag = response.headers[b"ETag"]
+    last_modified = response.headers[b"Last-Modified"]
+
+    async def call(method: str, headers: list[tuple[bytes, bytes]]) -> DAVResponse:
+        scope, receive = get_test_scope(method, b"", file_path)
+        scope["headers"] += headers  # type: ignore
+        _, response = await server.handle(scope, receive, fake_send)
+        return response
+
+    for method in ("GET", "HEAD"):
+        # If-None-Match
+        response = await call(method, [(b"if-none-match", etag)])
+        assert response.status == 304
+        assert response.headers[b"ETag"] == etag
+        assert await get_response_content(response) == b""
+
+        response = await call(method, [(b"if-none-match", b'"other", ' + etag)])
+        assert response.status == 304
+
+        response = await call(method, [(b"if-none-match", b"*")])
+        assert response.status == 304
+
+        response = await call(method, [(b"if-none-match", b'"other"')])
+        assert response.status == 200
+
+        # If-Modified-Since
+        response = await call(method, [(b"if-modified-since", last_modified)])
+        assert response.status == 304
+
+        response = await call(
+            method, [(b"if-modified-since", b"Thu, 01 Jan 1970 00:00:00 GMT")]
+        )
+        assert response.status == 200
+
+        # If-None-Match takes precedence over If-Modified-Since
+        response = await call(
+            method,
+            [
+                (b"if-none-match", b'"other"'),
+                (b"if-modified-since", last_modified),
+            ],
+        )
+        assert response.status == 200
+
+    # GET - content
+    response = await call("GET", [(b"if-none-match", b'"other"')])
+    assert await get_response_content(response) == b"conditional"
+
+    # collection, never 304
+    for method in ("GET", "HEAD"):
+        scope, receive = get_test_scope(method, b"", f"{base_path}/")
+        scope["headers"] += [  # type: ignore
+            (b"if-none-match", b"*"),
+            (b"if-modified-since", b"Fri, 01 Jan 2100 00:00:00 GMT"),
+        ]
+        _, response = await server.handle(scope, receive, fake_send)
+        assert response.status != 304
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("provider_name", PROVIDER_NAMES)
 async def test_method_lock_unlock_exclusive(setup, provider_name):
@@ -260,3 +332,92 @@ async def test_method_lock_unlock_exclusive(setup, provider_name):
     assert response.status == 201
 
     # LOCK
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider_name", PROVIDER_NAMES)
+async def test_method_put_resumable(setup, provider_name):
+    server, base_path = setup
+    file_path = f"{base_path}/resumable"
+    file_content = b"0123456789"
+
+    async def put(
+        data: bytes, content_range: str, headers: list[tuple[bytes, bytes]] = []
+    ) -> DAVResponse:
+        scope, receive = get_test_scope("PUT", data, file_path)
+        scope["headers"] += [(b"content-range", content_range.encode())]  # type: ignore
+        scope["headers"] += headers  # type: ignore
+        _, response = await server.handle(scope, receive, fake_send)
+        return response
+
+    # invalid Content-Range
+    response = await put(b"01234", "bytes 0-4/*")
+    assert response.status == 400
+
+    # first chunk
+    response = await put(file_content[:5], "bytes 0-4/10")
+    assert response.status == 202
+    assert response.headers[b"Range"] == b"bytes=0-4"
+
+    # query offset
+    response = await put(b"", "bytes */10")
+    assert response.status == 202
+    assert response.headers[b"Range"] == b"bytes=0-4"
+
+    # wrong offset
+    response = await put(file_content[6:], "bytes 6-9/10")
+    assert response.status == 416
+    assert response.headers[b"Range"] == b"bytes=0-4"
+
+    # not exists before committed
+    scope, receive = get_test_scope("GET", b"", file_path)
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 404
+
+    # locked while uploading
+    provider = [
+        p
+        for p in server.web_dav.prefix_provider_mapping
+        if p.prefix.raw == f"/{provider_name}"
+    ][0].provider
+    lock_obj = await provider.lock_keeper.new(owner="username", path=DAVPath(file_path))
+    response = await put(file_content[5:], "bytes 5-9/10")
+    assert response.status == 423
+
+    lock_if_header = (b"if", f"(<opaquelocktoken:{lock_obj.token}>)".encode())
+
+    # the rejected chunk is not appended
+    response = await put(b"", "bytes */10", [lock_if_header])
+    assert response.status == 202
+    assert response.headers[b"Range"] == b"bytes=0-4"
+
+    # last chunk with lock token
+    response = await put(file_content[5:], "bytes 5-9/10", [lock_if_header])
+    assert response.status == 201
+    await provider.lock_keeper.release(lock_obj.token)
+
+    scope, receive = get_test_scope("GET", b"", file_path)
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 200
+    assert await get_response_content(response) == file_content
+    assert provider.upload_sessions == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider_name", PROVIDER_NAMES)
+async def test_method_put_resumable_expired(setup, provider_name):
+    server, base_path = setup
+    server.config.upload.resumable_session_timeout = -1
+    file_path = f"{base_path}/resumable"
+
+    scope, receive = get_test_scope("PUT", b"01234", file_path)
+    scope["headers"] += [(b"content-range", b"bytes 0-4/10")]  # type: ignore
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 202
+
+    # purged, start over
+    scope, receive = get_test_scope("PUT", b"", file_path)
+    scope["headers"] += [(b"content-range", b"bytes */10")]  # type: ignore
+    _, response = await server.handle(scope, receive, fake_send)
+    assert response.status == 202
+    assert b"Range" not in response.headers